@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Jam Deck — embedded vs. subprocess server benchmark.
+
+Usage:
+    python bench/embedded.py [runs]
+
+Compares the menu bar app's two ways of running the server:
+
+- subprocess: music_server.py in its own interpreter, ready once it
+  prints JAMDECK_READY, stopped with SIGTERM
+- embedded: ServerRunner on a thread of the app's process, ready once
+  ready_event is set, stopped with stop()
+
+Each run happens in a fresh host interpreter standing in for the app. It
+starts the server the way ServerController does and measures the start
+and stop latency. It also measures the memory the server adds: the
+host's RSS growth in embedded mode, and the child's RSS plus the host's
+growth in subprocess mode. Prints the median and range for each mode.
+
+The hosts and servers run with HOME set to a temporary directory, so
+your config, history and saved state are not touched.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import tempfile
+import threading
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = os.path.join(ROOT, "music_server.py")
+MODES = ("subprocess", "embedded")
+READY_TIMEOUT = 30
+# Time for startup work (warm-up query, index builds) to finish before RSS is read
+SETTLE = 1.0  # seconds
+
+def rss_kb(pid):
+    """Resident set size of pid in KB, via ps (works on macOS and Linux)."""
+    out = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True).stdout
+    return int(out.strip())
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def host_subprocess(port):
+    """Start, measure and stop music_server.py like ServerController does."""
+    baseline = rss_kb(os.getpid())
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, SERVER, "--port", str(port)], cwd=ROOT,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    ready = threading.Event()
+
+    def monitor():
+        for line in process.stdout:
+            if line.startswith("JAMDECK_READY="):
+                ready.set()
+
+    threading.Thread(target=monitor, daemon=True).start()
+    if not ready.wait(READY_TIMEOUT):
+        process.kill()
+        raise RuntimeError("server did not report JAMDECK_READY")
+    start = time.perf_counter() - started
+
+    time.sleep(SETTLE)
+    added = rss_kb(process.pid) + rss_kb(os.getpid()) - baseline
+
+    started = time.perf_counter()
+    process.terminate()
+    process.wait(timeout=10)
+    stop = time.perf_counter() - started
+    return start, stop, added
+
+def host_embedded(port):
+    """Start, measure and stop an in-process ServerRunner like ServerController does."""
+    baseline = rss_kb(os.getpid())
+    started = time.perf_counter()
+    # Imported here so the host's baseline doesn't include the server modules
+    from jamdeck.server import runner as server_runner
+
+    runner = server_runner.ServerRunner(control_endpoint=None)
+    server_runner.active_runner = runner
+
+    def run():
+        try:
+            runner.run(port)
+        finally:
+            runner.close()
+
+    thread = threading.Thread(target=run, name="jamdeck-embedded-server", daemon=True)
+    thread.start()
+    if not runner.ready_event.wait(READY_TIMEOUT):
+        raise RuntimeError("embedded server did not become ready")
+    start = time.perf_counter() - started
+
+    time.sleep(SETTLE)
+    added = rss_kb(os.getpid()) - baseline
+
+    started = time.perf_counter()
+    runner.stop()
+    thread.join(timeout=10)
+    stop = time.perf_counter() - started
+    return start, stop, added
+
+def host(mode):
+    """Host process: run one mode and print its numbers as JSON."""
+    sys.path.insert(0, ROOT)
+    port = free_port()
+    # Server output would mix with the results on stdout
+    results_fd = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    start, stop, added = (host_embedded if mode == "embedded" else host_subprocess)(port)
+    with os.fdopen(results_fd, "w") as out:
+        json.dump({"start": start, "stop": stop, "rss_kb": added}, out)
+    # Skip interpreter teardown of the embedded server's leftovers
+    os._exit(0)
+
+def run_host(mode, home):
+    env = dict(os.environ, HOME=home)
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--host", mode],
+                            cwd=ROOT, env=env, capture_output=True, text=True, timeout=READY_TIMEOUT + 30)
+    if result.returncode != 0 or not result.stdout.strip():
+        raise RuntimeError(f"{mode} host failed: {result.stderr.strip()[-500:]}")
+    return json.loads(result.stdout)
+
+def spread(values, scale, unit):
+    values = sorted(v * scale for v in values)
+    return f"{statistics.median(values):7.1f} {unit} ({values[0]:.1f}-{values[-1]:.1f})"
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == "--host":
+        host(sys.argv[2])
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    home = tempfile.mkdtemp(prefix="jamdeck-bench-home-")
+    try:
+        results = {mode: [] for mode in MODES}
+        for _ in range(runs):
+            # Alternate so drift on the machine affects both modes alike
+            for mode in MODES:
+                results[mode].append(run_host(mode, home))
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    print(f"{runs} runs per mode, medians (range)")
+    for mode in MODES:
+        samples = results[mode]
+        print(f"{mode:<11} start {spread([s['start'] for s in samples], 1000, 'ms')}   "
+              f"stop {spread([s['stop'] for s in samples], 1000, 'ms')}   "
+              f"memory added {spread([s['rss_kb'] for s in samples], 1 / 1024, 'MB')}")
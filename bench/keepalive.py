@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Jam Deck — keep-alive benchmark.
+
+Usage:
+    python bench/keepalive.py [requests]
+
+Starts the server in-process on a free local port and fetches the same
+URLs two ways: a new TCP connection per request (what browsers got
+before HTTP/1.1 keep-alive) and one persistent connection. Prints the
+mean time per request and the request rate for each.
+"""
+import os
+import sys
+import time
+import threading
+import contextlib
+from http.client import HTTPConnection
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Overlay polls, and the stylesheet every scene loads
+PATHS = ("/healthz", "/overlay.css")
+
+def start_server():
+    """Serve the overlay files on a free local port. Returns the server."""
+    from jamdeck import get_resources_dir
+    from jamdeck.server.runner import JamDeckHTTPServer
+    from jamdeck.server.handler import MusicHandler
+    from jamdeck.server.static_files import StaticFileIndex
+
+    MusicHandler.root_dir = get_resources_dir()
+    MusicHandler.static_files = StaticFileIndex(MusicHandler.root_dir)
+    MusicHandler.static_files.build()
+    MusicHandler.started_at = time.time()
+    httpd = JamDeckHTTPServer(("127.0.0.1", 0), MusicHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+def fetch(conn, path):
+    conn.request("GET", path)
+    response = conn.getresponse()
+    response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{path} answered {response.status}")
+
+def per_request_connections(port, path, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        conn = HTTPConnection("127.0.0.1", port, timeout=10)
+        conn.request("GET", path, headers={"Connection": "close"})
+        conn.getresponse().read()
+        conn.close()
+    return time.perf_counter() - started
+
+def one_connection(port, path, requests):
+    # http.client reconnects by itself when the server ends the connection
+    # after KEEPALIVE_MAX_REQUESTS
+    conn = HTTPConnection("127.0.0.1", port, timeout=10)
+    started = time.perf_counter()
+    for _ in range(requests):
+        fetch(conn, path)
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return elapsed
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    httpd = start_server()
+    port = httpd.server_address[1]
+
+    results = []
+    # The handler logs every request; keep that out of the results
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for path in PATHS:
+            # Warm up the file cache and the interpreter
+            one_connection(port, path, 50)
+            for name, run in (("new connection", per_request_connections), ("keep-alive", one_connection)):
+                results.append((path, name, run(port, path, requests)))
+    httpd.shutdown()
+    httpd.server_close()
+
+    print(f"{requests} requests per row")
+    for path, name, elapsed in results:
+        print(f"{path:<14} {name:<16} {elapsed / requests * 1e6:7.0f} us/request   "
+              f"{requests / elapsed:7.0f} requests/s")
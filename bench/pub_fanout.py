@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Jam Deck — track feed fan-out benchmark.
+
+Usage:
+    python bench/pub_fanout.py [--subscribers 1,10,50] [--changes 20000] [--rate 0]
+
+For each subscriber count, binds a TrackPublisher on a temporary IPC
+endpoint, starts that many subscriber processes (like
+examples/track_subscriber.py), and pushes --changes track changes
+through TrackState, as fast as it can or at --rate changes per second.
+Prints the publish rate, and how many messages the subscribers received
+and how fast. The publisher keeps at most 100 messages per subscriber
+queued, so a subscriber that falls behind drops messages rather than
+slowing the server down.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zmq
+
+from jamdeck.server.state import TrackState
+from jamdeck.server.publisher import TrackPublisher
+
+STOP_TOPIC = b"bench-stop"
+# A subscriber gives up after this long without a message
+IDLE_TIMEOUT = 5000  # ms
+
+def subscribe(endpoint):
+    """Subscriber process: count messages until the stop topic arrives."""
+    context = zmq.Context()
+    socket = context.socket(zmq.SUB)
+    socket.setsockopt(zmq.RCVTIMEO, IDLE_TIMEOUT)
+    socket.setsockopt(zmq.SUBSCRIBE, b"")
+    socket.connect(endpoint)
+    print("ready", flush=True)
+    received = 0
+    first = last = None
+    try:
+        while True:
+            topic, _ = socket.recv_multipart()
+            if topic == STOP_TOPIC:
+                break
+            last = time.perf_counter()
+            if first is None:
+                first = last
+            received += 1
+    except zmq.Again:
+        pass
+    elapsed = (last - first) if received > 1 else 0.0
+    print(f"{received} {elapsed}", flush=True)
+    socket.close(0)
+    context.term()
+
+def run(subscribers, changes, rate, work_dir):
+    endpoint = f"ipc://{work_dir}/feed-{subscribers}.ipc"
+    context = zmq.Context()
+    publisher = TrackPublisher(context, endpoint)
+    track_state = TrackState()
+    track_state.add_listener(publisher.publish)
+
+    children = [subprocess.Popen([sys.executable, os.path.abspath(__file__), "--subscribe", endpoint],
+                                 stdout=subprocess.PIPE, text=True)
+                for _ in range(subscribers)]
+    try:
+        for child in children:
+            if child.stdout.readline().strip() != "ready":
+                raise RuntimeError("subscriber failed to start")
+        # Subscriptions reach the publisher asynchronously
+        time.sleep(0.5)
+
+        started = time.perf_counter()
+        for i in range(changes):
+            if rate:
+                delay = started + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            track_state.update({"playing": True, "title": f"Song {i}", "artist": "Artist", "album": "Album"})
+        elapsed = time.perf_counter() - started
+
+        time.sleep(0.2)
+        with publisher._lock:
+            publisher.socket.send_multipart([STOP_TOPIC, b""])
+        results = []
+        for child in children:
+            received, receive_time = child.communicate(timeout=IDLE_TIMEOUT / 1000 + 10)[0].split()
+            results.append((int(received), float(receive_time)))
+    finally:
+        for child in children:
+            if child.poll() is None:
+                child.kill()
+                child.wait()
+        publisher.close()
+        context.term()
+
+    # The first change publishes every topic, the rest only "track"
+    messages = changes + 2
+    delivered = sorted(received / messages for received, _ in results)
+    rates = [received / t for received, t in results if t > 0]
+    print(f"{subscribers:>4} subscribers   publish {changes / elapsed:8.0f} changes/s   "
+          f"delivered median {statistics.median(delivered):6.1%} (min {delivered[0]:6.1%})   "
+          f"receive {statistics.median(rates) if rates else 0:8.0f} msgs/s each")
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == "--subscribe":
+        subscribe(sys.argv[2])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Jam Deck track feed fan-out benchmark")
+    parser.add_argument('--subscribers', default="1,10,50",
+                        help='Comma-separated subscriber counts to run (default: 1,10,50).')
+    parser.add_argument('--changes', type=int, default=20000, help='Track changes per run (default: 20000).')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Changes per second to publish at, 0 for as fast as possible (default: 0).')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="jamdeck-bench-")
+    try:
+        print(f"{args.changes} track changes per run, "
+              f"{f'{args.rate:.0f}/s' if args.rate else 'as fast as possible'}")
+        for count in args.subscribers.split(","):
+            run(int(count), args.changes, args.rate, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Jam Deck — per-request routing cost benchmark.
+
+Usage:
+    python bench/routes.py [requests]
+
+Two measurements:
+
+- Path resolution: StaticFileIndex.lookup() against the per-request
+  resolution it replaced (basename and join, realpath of the directory
+  and of the file, a prefix check and an exists check), timed with timeit.
+- Server CPU per request: the server runs in-process while a child
+  process makes the requests over one keep-alive connection, so this
+  process's CPU time is the server's. Reported per route.
+"""
+import os
+import sys
+import time
+import timeit
+import threading
+import contextlib
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jamdeck import get_resources_dir
+from jamdeck.server.static_files import StaticFileIndex
+
+def legacy_resolve_text(base_dir, path):
+    """How overlay files were resolved on every request before the index."""
+    safe_name = 'overlay.html' if path == '/' else os.path.basename(path)
+    file_path = os.path.join(base_dir, safe_name)
+    real_base_dir = os.path.realpath(base_dir)
+    real_file_path = os.path.realpath(file_path)
+    if not real_file_path.startswith(real_base_dir + os.sep) and real_file_path != real_base_dir:
+        return None
+    os.path.exists(real_file_path)
+    return real_file_path
+
+def legacy_resolve_font(base_dir, path):
+    """How font files were resolved on every request before the index."""
+    font_path = os.path.join(base_dir, 'assets', 'fonts', path.split('/')[-1])
+    base_fonts_dir = os.path.realpath(os.path.join(base_dir, 'assets', 'fonts'))
+    real_font_path = os.path.realpath(font_path)
+    if not real_font_path.startswith(base_fonts_dir + os.sep):
+        return None
+    return real_font_path
+
+def font_url(index):
+    return next(url for url, entry in sorted(index.files.items()) if entry.kind == 'font')
+
+def resolution(index, base_dir):
+    font = font_url(index)
+    cases = (
+        ("overlay file", "/overlay.css", legacy_resolve_text),
+        ("font", font, legacy_resolve_font),
+    )
+    for name, path, legacy in cases:
+        before = min(timeit.repeat(lambda: legacy(base_dir, path), number=20000, repeat=5)) / 20000
+        after = min(timeit.repeat(lambda: index.lookup(path), number=200000, repeat=5)) / 200000
+        print(f"{name:<14} per-request resolution {before * 1e6:6.2f} us   index lookup {after * 1e6:6.2f} us")
+
+def client(port, path, requests):
+    """Child process: make requests GETs of path over one connection."""
+    from http.client import HTTPConnection
+    conn = HTTPConnection("127.0.0.1", port, timeout=10)
+    for _ in range(requests):
+        conn.request("GET", path)
+        conn.getresponse().read()
+    conn.close()
+
+def server_cpu(index, base_dir, requests):
+    from jamdeck.server.runner import JamDeckHTTPServer
+    from jamdeck.server.handler import MusicHandler
+
+    MusicHandler.root_dir = base_dir
+    MusicHandler.static_files = index
+    MusicHandler.started_at = time.time()
+    httpd = JamDeckHTTPServer(("127.0.0.1", 0), MusicHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    port = httpd.server_address[1]
+
+    paths = ("/", "/overlay.css", font_url(index), "/healthz", "/nowplaying", "/missing.png")
+    results = []
+    # The handler logs every request; keep that out of the results
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for path in paths:
+            command = [sys.executable, os.path.abspath(__file__), "--client", str(port), path]
+            subprocess.run(command + ["50"], check=True)   # warm-up
+            cpu = time.process_time()
+            started = time.perf_counter()
+            subprocess.run(command + [str(requests)], check=True)
+            results.append((path, time.process_time() - cpu, time.perf_counter() - started))
+    httpd.shutdown()
+    httpd.server_close()
+
+    print(f"Server CPU per request, {requests} requests per route:")
+    for path, cpu, elapsed in results:
+        print(f"  {path:<46} {cpu / requests * 1e6:6.0f} us CPU   {elapsed / requests * 1e6:6.0f} us wall")
+
+if __name__ == '__main__':
+    if len(sys.argv) == 5 and sys.argv[1] == "--client":
+        client(int(sys.argv[2]), sys.argv[3], int(sys.argv[4]))
+        sys.exit(0)
+
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    base_dir = get_resources_dir()
+    index = StaticFileIndex(base_dir)
+    index.build()
+    resolution(index, base_dir)
+    server_cpu(index, base_dir, requests)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Jam Deck — remote session load test.
+
+Usage:
+    python bench/sessions_load.py [--sessions 300] [--updates 20]
+    python bench/sessions_load.py --url http://host:8080 --token TOKEN
+
+Simulates many remote agents pushing to /ingest/<session> at once. Each
+session pushes --updates track changes, with a cover after every
+--artwork-every of them, over its own keep-alive connection, then reads
+its /s/<session>/nowplaying back. Prints the update rate, latency
+percentiles, errors and how much memory a session costs.
+
+Without --url an in-process server is started with a throwaway token.
+The memory figure is always measured in-process.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import contextlib
+import statistics
+import tracemalloc
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jamdeck.server.sessions import SessionRegistry
+
+# Stand-in cover; sessions keep the latest one, so its size adds per session
+ARTWORK = b"\xff\xd8\xff\xe0" + b"\0" * (16 * 1024)
+
+def start_server(token, max_sessions):
+    """Serve the ingest API on a free local port. Returns (httpd, base URL)."""
+    from jamdeck.server.runner import JamDeckHTTPServer
+    from jamdeck.server.handler import MusicHandler
+
+    MusicHandler.session_registry = SessionRegistry(token, max_sessions)
+    httpd = JamDeckHTTPServer(("127.0.0.1", 0), MusicHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+
+def run_session(base_url, token, name, updates, artwork_every, latencies, errors):
+    parts = urlsplit(base_url)
+    conn = HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    auth = {"Authorization": f"Bearer {token}"}
+
+    def request(method, path, body=None, headers=None):
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=dict(auth, **(headers or {})))
+            response = conn.getresponse()
+            response.read()
+        except OSError as e:
+            errors.append(f"{name}: {e}")
+            conn.close()
+            return None
+        latencies.append(time.perf_counter() - started)
+        if response.status != 200:
+            errors.append(f"{name}: {method} {path} answered {response.status}")
+        return response.status
+
+    for i in range(updates):
+        track = {"playing": True, "title": f"Song {i}", "artist": f"Artist {name}", "album": "Album"}
+        request("POST", f"/ingest/{name}", json.dumps(track), {"Content-Type": "application/json"})
+        if artwork_every and (i + 1) % artwork_every == 0:
+            request("POST", f"/ingest/{name}/artwork", ARTWORK, {"Content-Type": "image/jpeg"})
+    request("GET", f"/s/{name}/nowplaying")
+    conn.close()
+
+def load(base_url, token, sessions, updates, artwork_every):
+    latencies, errors = [], []
+    threads = [threading.Thread(target=run_session,
+                                args=(base_url, token, f"load-{n}", updates, artwork_every, latencies, errors))
+               for n in range(sessions)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, errors
+
+def session_memory(sessions, with_artwork):
+    """Bytes of Python heap per session holding one track (and one cover)."""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        registry = SessionRegistry("token", max_sessions=sessions)
+        for n in range(sessions):
+            name = f"mem-{n}"
+            registry.ingest(name, {"playing": True, "title": "Song", "artist": "Artist", "album": "Album"})
+            if with_artwork:
+                registry.set_artwork(name, bytes(bytearray(ARTWORK)), "image/jpeg")
+        used = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    return used / sessions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Jam Deck remote session load test")
+    parser.add_argument('--sessions', type=int, default=300, help='Concurrent sessions (default: 300).')
+    parser.add_argument('--updates', type=int, default=20, help='Track updates per session (default: 20).')
+    parser.add_argument('--artwork-every', type=int, default=5, metavar='N',
+                        help='Push a cover after every N updates, 0 for none (default: 5).')
+    parser.add_argument('--url', help='Base URL of a running server (default: start one in-process).')
+    parser.add_argument('--token', help="The server's ingest_token (required with --url).")
+    args = parser.parse_args()
+
+    httpd = None
+    if args.url:
+        if not args.token:
+            parser.error("--token is required with --url")
+        base_url, token = args.url.rstrip("/"), args.token
+    else:
+        token = "load-test-token"
+        httpd, base_url = start_server(token, args.sessions)
+
+    # The handler logs every request; keep that out of the results
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        elapsed, latencies, errors = load(base_url, token, args.sessions, args.updates, args.artwork_every)
+    if httpd:
+        httpd.shutdown()
+        httpd.server_close()
+
+    ms = sorted(latency * 1000 for latency in latencies)
+    print(f"{args.sessions} sessions x {args.updates} updates against {base_url}")
+    print(f"requests     {len(latencies)} in {elapsed:.2f} s ({len(latencies) / elapsed:.0f}/s)")
+    if ms:
+        print(f"latency      p50 {statistics.median(ms):.1f} ms   "
+              f"p99 {ms[int(len(ms) * 0.99) - 1]:.1f} ms   max {ms[-1]:.1f} ms")
+    print(f"errors       {len(errors)}")
+    for error in errors[:10]:
+        print(f"  {error}")
+    print(f"memory       {session_memory(args.sessions, False) / 1024:.1f} KB per session, "
+          f"{session_memory(args.sessions, True) / 1024:.1f} KB with a cover")
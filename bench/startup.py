@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Jam Deck — startup benchmark.
+
+Usage:
+    python bench/startup.py [runs] [-- server args ...]
+
+Measures, in fresh interpreters, how long importing the server takes and
+how long music_server.py takes from spawn to its JAMDECK_READY line (the
+point where the menu bar app starts loading the overlay). Prints the
+median and the spread over all runs.
+
+Extra arguments after "--" are passed to the server, e.g. "-- --no-pub
+--no-control" to leave the ZMQ feeds out.
+"""
+import os
+import sys
+import time
+import queue
+import socket
+import threading
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = os.path.join(ROOT, "music_server.py")
+READY_TIMEOUT = 30
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def import_time():
+    """Seconds a fresh interpreter spends importing jamdeck.server.runner."""
+    code = ("import time; t = time.perf_counter(); import jamdeck.server.runner; "
+            "print(time.perf_counter() - t)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+def time_to_ready(server_args):
+    """Seconds from spawning the server to its JAMDECK_READY line."""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, SERVER, "--port", str(free_port())] + server_args,
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    lines = queue.Queue()
+
+    def read():
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    threading.Thread(target=read, daemon=True).start()
+    try:
+        while True:
+            line = lines.get(timeout=READY_TIMEOUT)
+            if line is None:
+                raise RuntimeError("server exited before JAMDECK_READY")
+            if line.startswith("JAMDECK_READY="):
+                return time.perf_counter() - started
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+def report(name, samples):
+    ms = sorted(s * 1000 for s in samples)
+    print(f"{name:<16} median {statistics.median(ms):7.1f} ms   "
+          f"min {ms[0]:7.1f} ms   max {ms[-1]:7.1f} ms")
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    server_args = []
+    if "--" in args:
+        split = args.index("--")
+        args, server_args = args[:split], args[split + 1:]
+    runs = int(args[0]) if args else 10
+
+    print(f"{runs} runs, server args: {' '.join(server_args) or '(none)'}")
+    report("import runner", [import_time() for _ in range(runs)])
+    report("JAMDECK_READY", [time_to_ready(server_args) for _ in range(runs)])
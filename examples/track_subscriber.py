@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Jam Deck — example subscriber for the ZMQ track-change feed.
+
+Usage:
+    python examples/track_subscriber.py [endpoint] [topic ...]
+
+With no topics every message is printed. Topics are "track", "artwork"
+and "state".
+"""
+import sys
+import json
+import zmq
+
+DEFAULT_ENDPOINT = "ipc:///tmp/jamdeck-track.ipc"
+
+if __name__ == '__main__':
+    endpoint = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ENDPOINT
+    topics = sys.argv[2:] or [""]
+
+    context = zmq.Context()
+    socket = context.socket(zmq.SUB)
+    socket.connect(endpoint)
+    for topic in topics:
+        socket.setsockopt(zmq.SUBSCRIBE, topic.encode())
+
+    print(f"Listening on {endpoint} for topics: {', '.join(t or '*' for t in topics)}")
+    try:
+        while True:
+            topic, payload = socket.recv_multipart()
+            data = json.loads(payload)
+            if topic == b"track" and data.get("playing"):
+                print(f"Now playing: {data.get('title')} - {data.get('artist')}")
+            else:
+                print(f"[{topic.decode()}] {data}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        socket.close()
+        context.term()
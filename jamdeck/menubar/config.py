@@ -95,13 +95,34 @@ class ConfigManager:
             print(f"Unexpected error during config loading/migration: {e}. Using defaults.")
             return ["default"], DEFAULT_PORT
 
+    @staticmethod
+    def load_setting(key, default=None):
+        """Read a single top-level setting from the JSON config file."""
+        try:
+            if os.path.exists(CONFIG_FILE):
+                with open(CONFIG_FILE, "r") as f:
+                    return json.load(f).get(key, default)
+        except Exception as e:
+            print(f"Warning: Could not read setting '{key}': {e}")
+        return default
+
     @staticmethod
     def save_config(scenes, preferred_port):
-        """Save current configuration (scenes and port) to JSON file."""
-        config = {
-            "scenes": scenes,
-            "preferred_port": preferred_port
-        }
+        """Save current configuration (scenes and port) to JSON file.
+
+        Other keys already in the file (such as the server settings) are kept.
+        """
+        config = {}
+        try:
+            if os.path.exists(CONFIG_FILE):
+                with open(CONFIG_FILE, "r") as f:
+                    existing = json.load(f)
+                if isinstance(existing, dict):
+                    config = existing
+        except Exception as e:
+            print(f"Warning: Could not read existing config before saving: {e}")
+        config["scenes"] = scenes
+        config["preferred_port"] = preferred_port
         try:
             with open(CONFIG_FILE, "w") as f:
                 json.dump(config, f, indent=4)
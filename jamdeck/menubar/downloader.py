@@ -0,0 +1,155 @@
+# jamdeck/menubar/downloader.py
+import os
+import re
+import time
+import random
+import hashlib
+import subprocess
+
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # 4 MB per range request
+MAX_CHUNK_RETRIES = 5
+BACKOFF_BASE = 1.0   # seconds, doubled after each failed attempt
+BACKOFF_MAX = 30.0
+CHUNK_TIMEOUT = 60   # seconds allowed for a single chunk
+
+class DownloadError(Exception):
+    """Raised when a download can't be completed or fails verification."""
+
+def parse_sha256(text, file_name=None):
+    """Extract a SHA-256 hex digest from a checksum file or digest string.
+
+    Accepts 'sha256:<hex>', a bare digest, or 'sha256sum' style lines
+    ('<hex>  <name>'), preferring the line that names file_name.
+    """
+    candidates = []
+    for line in text.splitlines():
+        match = re.search(r'\b([0-9a-fA-F]{64})\b', line)
+        if match:
+            candidates.append((line, match.group(1).lower()))
+    if file_name:
+        for line, digest in candidates:
+            if file_name in line:
+                return digest
+    return candidates[0][1] if candidates else None
+
+class ChunkedDownloader:
+    """Download a file in byte-range chunks with resume and SHA-256 checking.
+
+    Data goes to '<dest>.part' and is hashed as it arrives. If a download is
+    interrupted, the next attempt re-hashes the partial file and continues
+    from where it stopped instead of starting over. Each chunk is retried
+    with exponential backoff. Uses curl like the rest of the app to avoid
+    SSL issues in py2app bundles.
+    """
+
+    def __init__(self, url, dest_path, total_size=None, expected_sha256=None,
+                 chunk_size=DOWNLOAD_CHUNK_SIZE, max_retries=MAX_CHUNK_RETRIES,
+                 progress_callback=None):
+        self.url = url
+        self.dest_path = dest_path
+        self.part_path = dest_path + ".part"
+        self.total_size = total_size
+        self.expected_sha256 = expected_sha256.lower() if expected_sha256 else None
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        # Called as progress_callback(bytes_done, total_bytes)
+        self.progress_callback = progress_callback
+
+    def _probe_size(self):
+        """Ask the server for the file size with a HEAD request."""
+        result = subprocess.run(
+            ['curl', '-s', '-f', '-I', '-L', '--max-time', '15', self.url],
+            capture_output=True, timeout=20
+        )
+        if result.returncode != 0:
+            raise DownloadError("Could not determine download size.")
+        # With -L every redirect hop prints headers; the last length wins
+        lengths = re.findall(rb'(?im)^content-length:\s*(\d+)', result.stdout)
+        if not lengths:
+            raise DownloadError("Server did not report the download size.")
+        return int(lengths[-1])
+
+    def _fetch_range(self, start, end):
+        """Fetch bytes start..end (inclusive), retrying with backoff."""
+        expected = end - start + 1
+        delay = BACKOFF_BASE
+        last_error = None
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                result = subprocess.run(
+                    ['curl', '-L', '-s', '-f', '--max-time', str(CHUNK_TIMEOUT),
+                     '-r', f'{start}-{end}', self.url],
+                    capture_output=True, timeout=CHUNK_TIMEOUT + 5
+                )
+                data = result.stdout
+                if result.returncode != 0:
+                    last_error = f"curl exited with {result.returncode}"
+                elif len(data) == expected:
+                    return data
+                elif len(data) == self.total_size:
+                    # Server ignored the Range header and sent everything
+                    return data[start:end + 1]
+                else:
+                    last_error = f"expected {expected} bytes, got {len(data)}"
+            except subprocess.TimeoutExpired:
+                last_error = "timed out"
+
+            if attempt < self.max_retries:
+                # Jitter keeps retries from many clients from lining up
+                wait = min(BACKOFF_MAX, delay) * random.uniform(0.8, 1.2)
+                print(f"Download chunk {start}-{end} failed ({last_error}), retrying in {wait:.1f}s...")
+                time.sleep(wait)
+                delay *= 2
+
+        raise DownloadError(f"Failed to download bytes {start}-{end}: {last_error}")
+
+    def _resume(self, hasher):
+        """Hash any existing partial file and return its length."""
+        if not os.path.exists(self.part_path):
+            return 0
+        size = os.path.getsize(self.part_path)
+        if size > self.total_size:
+            # Left over from a different file; start over
+            os.remove(self.part_path)
+            return 0
+        with open(self.part_path, 'rb') as f:
+            while True:
+                block = f.read(1024 * 1024)
+                if not block:
+                    break
+                hasher.update(block)
+        if size:
+            print(f"Resuming download at {size} of {self.total_size} bytes")
+        return size
+
+    def download(self):
+        """Download to dest_path. Returns the SHA-256 hex digest of the file."""
+        if self.total_size is None:
+            self.total_size = self._probe_size()
+
+        hasher = hashlib.sha256()
+        offset = self._resume(hasher)
+        if self.progress_callback:
+            self.progress_callback(offset, self.total_size)
+
+        with open(self.part_path, 'ab') as f:
+            while offset < self.total_size:
+                end = min(offset + self.chunk_size, self.total_size) - 1
+                data = self._fetch_range(offset, end)
+                f.write(data)
+                f.flush()
+                hasher.update(data)
+                offset += len(data)
+                if self.progress_callback:
+                    self.progress_callback(offset, self.total_size)
+
+        digest = hasher.hexdigest()
+        if self.expected_sha256 and digest != self.expected_sha256:
+            # A corrupt partial file would fail again on resume, so drop it
+            os.remove(self.part_path)
+            raise DownloadError(
+                f"Checksum mismatch: expected {self.expected_sha256}, got {digest}."
+            )
+
+        os.replace(self.part_path, self.dest_path)
+        return digest
@@ -0,0 +1,151 @@
+# jamdeck/menubar/release_cache.py
+import os
+import json
+import time
+import tempfile
+import threading
+import subprocess
+
+LATEST_RELEASE_URL = "https://api.github.com/repos/detekoi/jam-deck/releases/latest"
+RELEASE_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".jamdeck_release_cache.json")
+# Don't ask GitHub again within this many seconds (unauthenticated API
+# requests are limited to 60 per hour per IP)
+DEFAULT_MIN_CHECK_INTERVAL = 15 * 60
+
+class ReleaseCheckError(Exception):
+    """Raised when release metadata can't be fetched and nothing is cached."""
+
+def parse_response_headers(raw):
+    """Parse curl's dumped headers into (status, {lowercased name: value}).
+
+    curl writes one header block per response it reads: interim 100
+    Continue responses, a proxy's CONNECT reply and redirects come before
+    the final response, so only the last block is used.
+    """
+    text = raw.decode("iso-8859-1").replace("\r\n", "\n")
+    blocks = [block for block in text.split("\n\n") if block.startswith("HTTP/")]
+    if not blocks:
+        raise ReleaseCheckError("Received invalid response from GitHub.")
+    lines = blocks[-1].split("\n")
+    try:
+        status = int(lines[0].split()[1])
+    except (IndexError, ValueError):
+        raise ReleaseCheckError("Received invalid response from GitHub.")
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return status, headers
+
+class ReleaseCache:
+    """Latest-release metadata shared by the update check and install flows.
+
+    The parsed release is persisted along with its ETag/Last-Modified, so
+    repeat checks send conditional requests and a 304 reuses the cached
+    copy. Requests within min_check_interval of the last one are served
+    from the cache without touching the network.
+    """
+
+    def __init__(self, url=LATEST_RELEASE_URL, cache_file=RELEASE_CACHE_FILE,
+                 min_check_interval=DEFAULT_MIN_CHECK_INTERVAL):
+        self.url = url
+        self.cache_file = cache_file
+        self.min_check_interval = min_check_interval
+        self._lock = threading.Lock()
+        self.etag = None
+        self.last_modified = None
+        self.release = None
+        self.checked_at = 0
+        self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, "r") as f:
+                    cached = json.load(f)
+                self.etag = cached.get("etag")
+                self.last_modified = cached.get("last_modified")
+                self.release = cached.get("release")
+                self.checked_at = cached.get("checked_at", 0)
+        except Exception as e:
+            print(f"Warning: Could not load release cache: {e}")
+
+    def _save(self):
+        cached = {
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "release": self.release,
+            "checked_at": self.checked_at,
+        }
+        try:
+            tmp_path = self.cache_file + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(cached, f)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            print(f"Warning: Could not save release cache: {e}")
+
+    def _fetch(self):
+        """Send a conditional GET. Returns (status, headers, body bytes)."""
+        fd, header_path = tempfile.mkstemp(prefix="jamdeck-release-", suffix=".headers")
+        os.close(fd)
+        # Headers go to a file (-D) so the body on stdout is never mixed
+        # with them
+        cmd = ['curl', '-s', '-D', header_path, '--max-time', '5',
+               '-H', 'Accept: application/vnd.github+json']
+        if self.release is not None:
+            if self.etag:
+                cmd += ['-H', f'If-None-Match: {self.etag}']
+            if self.last_modified:
+                cmd += ['-H', f'If-Modified-Since: {self.last_modified}']
+        cmd.append(self.url)
+
+        try:
+            result = subprocess.run(cmd, capture_output=True, timeout=7)
+            if result.returncode != 0:
+                raise ReleaseCheckError("Could not connect to GitHub.")
+            with open(header_path, "rb") as f:
+                status, headers = parse_response_headers(f.read())
+        finally:
+            os.remove(header_path)
+        return status, headers, result.stdout
+
+    def get_release(self, force=False):
+        """Return the latest release as a dict.
+
+        force skips the minimum re-check interval (the request is still
+        conditional). If GitHub can't be reached, the cached release is
+        returned when there is one.
+        """
+        with self._lock:
+            now = time.time()
+            if not force and self.release is not None and now - self.checked_at < self.min_check_interval:
+                return self.release
+
+            try:
+                status, headers, body = self._fetch()
+            except (ReleaseCheckError, subprocess.TimeoutExpired) as e:
+                if self.release is not None:
+                    print(f"Release check failed ({e}), using cached release")
+                    return self.release
+                raise ReleaseCheckError(str(e))
+
+            if status == 304 and self.release is not None:
+                print("Release check: not modified, using cached release")
+            elif status == 200:
+                try:
+                    self.release = json.loads(body.decode("utf-8", errors="replace"))
+                except ValueError:
+                    raise ReleaseCheckError("Received invalid response from GitHub.")
+                self.etag = headers.get("etag")
+                self.last_modified = headers.get("last-modified")
+            elif self.release is not None:
+                print(f"Release check: GitHub returned {status}, using cached release")
+                return self.release
+            else:
+                raise ReleaseCheckError(f"GitHub returned HTTP {status}.")
+
+            self.checked_at = now
+            self._save()
+            return self.release
@@ -8,39 +8,32 @@ import rumps
 from jamdeck import get_resources_dir
 from jamdeck.menubar.config import ConfigManager
 
+# How long to wait for the server's JAMDECK_READY line before giving up
+SERVER_READY_TIMEOUT = 10  # seconds
+
 class ServerController:
     def __init__(self, app):
         self.app = app
+        # Set by monitor_server once the server reports it is serving
+        self.server_ready = threading.Event()
+        # Control channel endpoint reported by the running server, if any
+        self.control_endpoint = None
+        # Optional in-process mode: run the server on a thread instead of a
+        # separate interpreter (saves memory and startup time)
+        self.embedded = bool(ConfigManager.load_setting("embedded_server", False))
+        self.embedded_runner = None
 
     def start_server(self):
         """Start the music server"""
         if not self.app.server_running:
             try:
-                # Find music_server.py using get_resources_dir
-                resources_dir = get_resources_dir()
-                server_path = os.path.join(resources_dir, "music_server.py")
-                
-                # Use Python from the current executable
-                python_path = sys.executable
-                
-                # Start the server in a separate process, passing the preferred port
-                cmd = [python_path, server_path, "--port", str(self.app.preferred_port)]
-                print(f"Starting server with command: {' '.join(cmd)}")
-                self.app.server_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT, # Redirect stderr to stdout
-                    text=True,
-                    encoding='utf-8'
-                )
-                
-                # Monitor the server output in a separate thread
-                self.app.server_thread = threading.Thread(target=self.monitor_server)
-                self.app.server_thread.daemon = True
-                self.app.server_thread.start()
-                
-                # Give server a moment to start
-                time.sleep(1)
+                started = time.perf_counter()
+                if self.embedded:
+                    self._start_embedded()
+                else:
+                    self._start_subprocess()
+                mode = "embedded" if self.embedded else "subprocess"
+                print(f"Server ready in {time.perf_counter() - started:.3f}s ({mode} mode)")
                 
                 # Update state
                 self.app.server_running = True
@@ -61,19 +54,102 @@ class ServerController:
                     sound=False
                 )
 
+    def _start_subprocess(self):
+        """Launch music_server.py in its own interpreter and wait until it serves."""
+        # Find music_server.py using get_resources_dir
+        resources_dir = get_resources_dir()
+        server_path = os.path.join(resources_dir, "music_server.py")
+        
+        # Use Python from the current executable
+        python_path = sys.executable
+        
+        # Start the server in a separate process, passing the preferred port
+        cmd = [python_path, server_path, "--port", str(self.app.preferred_port)]
+        print(f"Starting server with command: {' '.join(cmd)}")
+        self.app.server_process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, # Redirect stderr to stdout
+            text=True,
+            encoding='utf-8'
+        )
+        
+        # Monitor the server output in a separate thread
+        self.server_ready.clear()
+        self.control_endpoint = None
+        self.app.server_thread = threading.Thread(target=self.monitor_server)
+        self.app.server_thread.daemon = True
+        self.app.server_thread.start()
+        
+        # Wait for the server's readiness line instead of a fixed sleep
+        if not self.server_ready.wait(timeout=SERVER_READY_TIMEOUT):
+            print("Server did not report readiness in time, continuing anyway")
+        if self.app.server_process.poll() is not None:
+            self.app.server_process = None
+            raise Exception("Server exited during startup. Check log for details.")
+
+    def _start_embedded(self):
+        """Run the server on a background thread inside this process."""
+        # Imported here so subprocess mode never loads the server modules
+        from jamdeck.server import runner as server_runner
+
+        # No control channel needed: the runner is called directly
+        runner = server_runner.ServerRunner(control_endpoint=None)
+        # Let the runner module's exit cleanup close our sockets too
+        server_runner.active_runner = runner
+        self.embedded_runner = runner
+        self.app.server_thread = threading.Thread(
+            target=self._run_embedded, args=(runner,), name="jamdeck-embedded-server", daemon=True
+        )
+        self.app.server_thread.start()
+
+        deadline = time.monotonic() + SERVER_READY_TIMEOUT
+        while not runner.ready_event.wait(timeout=0.05):
+            if not self.app.server_thread.is_alive():
+                self.embedded_runner = None
+                raise Exception("Server exited during startup. Check log for details.")
+            if time.monotonic() > deadline:
+                print("Server did not report readiness in time, continuing anyway")
+                break
+        self.app.actual_port = runner.actual_port
+
+    def _run_embedded(self, runner):
+        """Thread target for embedded mode."""
+        try:
+            runner.run(self.app.preferred_port)
+        except Exception as e:
+            print(f"Embedded server error: {e}")
+        finally:
+            runner.close()
+
+        # Only report a crash if nobody asked this runner to stop
+        if self.embedded_runner is runner:
+            self.embedded_runner = None
+            self._handle_unexpected_exit()
+
     def stop_server(self):
         """Stop the music server"""
-        if self.app.server_running and self.app.server_process:
+        if self.app.server_running and (self.app.server_process or self.embedded_runner):
             try:
-                # Store reference to process before nulling it
+                # Store references before nulling them
                 process_to_terminate = self.app.server_process
+                runner_to_stop = self.embedded_runner
                 
                 # Update state first to prevent monitor_server from triggering crash notification
                 self.app.server_running = False
                 self.app.server_process = None
+                self.embedded_runner = None
                 self.app.actual_port = self.app.preferred_port 
                 self.app.update_menu_state()
                 
+                # Stop the embedded server and wait for its sockets to close
+                if runner_to_stop:
+                    started = time.perf_counter()
+                    runner_to_stop.stop()
+                    if self.app.server_thread:
+                        self.app.server_thread.join(timeout=5)
+                    print(f"Embedded server stopped in {time.perf_counter() - started:.3f}s")
+
                 # Terminate the server process
                 if process_to_terminate:
                     try:
@@ -119,14 +195,30 @@ class ServerController:
                         except (IndexError, ValueError) as e:
                             print(f"Error parsing port from server output: {e}")
 
+                    # The server is bound and about to serve requests
+                    elif line.startswith("JAMDECK_READY="):
+                        self.server_ready.set()
+
+                    # The server accepts control commands on this endpoint
+                    elif line.startswith("JAMDECK_CONTROL="):
+                        self.control_endpoint = line.split("=", 1)[1]
+                        print(f"Detected control endpoint: {self.control_endpoint}")
+
                 # Check if the server_process reference has changed (happens when stop_server is called)
                 if self.app.server_process is None or self.app.server_process != process_ref:
                     break
                     
             except (AttributeError, ValueError):
                 break
+
+        # Unblock start_server if the process exited before becoming ready
+        self.server_ready.set()
                 
         # Only send notification if we didn't expect the process to end (i.e., it crashed)
+        self._handle_unexpected_exit()
+
+    def _handle_unexpected_exit(self):
+        """Reset state and notify the user if the server died while running."""
         if self.app.server_running:
             self.app.server_running = False
             self.app.actual_port = self.app.preferred_port
@@ -141,6 +233,33 @@ class ServerController:
             # Update menu state on main thread
             self.app.run_on_main_thread(self.app.update_menu_state)
 
+    def send_control(self, method, **params):
+        """Send a command to the running server over its control channel.
+
+        Raises ControlError if the server has no control channel or the
+        command fails.
+        """
+        from jamdeck.server.control import ControlClient, ControlError
+
+        if not self.app.server_running or not self.control_endpoint:
+            raise ControlError("Server control channel is not available")
+        return ControlClient(self.control_endpoint).call(method, **params)
+
+    def rebind_server(self, port):
+        """Move the running server to port in place. Returns True on success."""
+        try:
+            if self.embedded_runner:
+                result = self.embedded_runner.rebind(port)
+            else:
+                result = self.send_control("rebind", port=port)
+        except Exception as e:
+            print(f"In-place rebind failed: {e}")
+            return False
+
+        self.app.actual_port = result.get("port", port)
+        self.app.update_menu_state()
+        return True
+
     def set_server_port(self, _):
         """Show dialog to set the preferred server port."""
         current_state_msg = "The server will restart if running." if self.app.server_running else "Change applies on next start."
@@ -169,7 +288,15 @@ class ServerController:
                     if port_changed:
                         ConfigManager.save_config(self.app.scenes, self.app.preferred_port)
 
-                    if was_running:
+                    if was_running and self.rebind_server(port_num):
+                        print(f"Server rebound to port {self.app.actual_port} without restarting.")
+                        rumps.notification(
+                            title="Port Updated",
+                            subtitle=f"Preferred port set to {self.app.preferred_port}",
+                            message=f"Server is now on port {self.app.actual_port}.",
+                            sound=False
+                        )
+                    elif was_running:
                         print(f"Port {'changed' if port_changed else 'unchanged but actual port mismatched'}. Restarting server...")
                         rumps.notification(
                             title="Port Updated",
@@ -1,11 +1,13 @@
 # jamdeck/menubar/updater.py
 import os
 import sys
-import json
 import threading
 import subprocess
 import rumps
 from jamdeck import VERSION
+from jamdeck.menubar.config import ConfigManager
+from jamdeck.menubar.downloader import ChunkedDownloader, parse_sha256
+from jamdeck.menubar.release_cache import ReleaseCache, ReleaseCheckError, DEFAULT_MIN_CHECK_INTERVAL
 
 class UpdateManager:
     def __init__(self, app):
@@ -14,6 +16,11 @@ class UpdateManager:
         self.latest_release_url = "https://github.com/detekoi/jam-deck/releases"
         self.latest_version_str = None
         self.update_checking_in_progress = False
+        self._last_progress_percent = None
+        # Shared by the check and install flows so one fetch serves both
+        self.release_cache = ReleaseCache(
+            min_check_interval=ConfigManager.load_setting("update_check_interval", DEFAULT_MIN_CHECK_INTERVAL)
+        )
 
     def _parse_version(self, version_str):
         """Parse a version string like '1.1.6' or 'v1.1.6' into a comparable tuple of ints."""
@@ -36,19 +43,15 @@ class UpdateManager:
             
         def run_check():
             try:
-                # Use curl to request the latest release JSON
-                url = "https://api.github.com/repos/detekoi/jam-deck/releases/latest"
-                cmd = ['curl', '-s', '--max-time', '5', url]
-                result = subprocess.run(cmd, capture_output=True, timeout=7)
-                
-                if result.returncode != 0:
-                    print("Update check: curl failed")
+                # Manual checks skip the re-check interval but are still conditional
+                try:
+                    data = self.release_cache.get_release(force=manual)
+                except ReleaseCheckError as e:
+                    print(f"Update check: {e}")
                     if manual:
                         self.app.run_on_main_thread(lambda: rumps.alert("Update Check Failed", "Could not connect to GitHub. Please check your internet connection and try again."))
                     return
                 
-                stdout_str = result.stdout.decode('utf-8', errors='replace')
-                data = json.loads(stdout_str)
                 latest_tag = data.get("tag_name")
                 release_url = data.get("html_url", "https://github.com/detekoi/jam-deck/releases")
                 
@@ -128,25 +131,25 @@ class UpdateManager:
         self.app.update_menu_item.title = "Downloading Update..."
         
         def run_update():
-            dmg_path = "/tmp/JamDeck_latest.dmg"
+            # Versioned name so a partial download is only resumed for the same release
+            dmg_path = f"/tmp/JamDeck_{self.latest_version_str or 'latest'}.dmg"
+            self._last_progress_percent = None
             try:
                 # 1. Download DMG
                 print(f"Downloading update from {self.latest_release_url}...")
                 
-                # Fetch direct download URL from release JSON
-                url = "https://api.github.com/repos/detekoi/jam-deck/releases/latest"
-                cmd = ['curl', '-s', '--max-time', '5', url]
-                result = subprocess.run(cmd, capture_output=True, timeout=7)
-                
-                if result.returncode != 0:
+                # Fetch direct download URL from release JSON (usually the
+                # copy cached by the preceding update check)
+                try:
+                    data = self.release_cache.get_release()
+                except ReleaseCheckError:
                     raise Exception("Failed to contact GitHub to retrieve download link.")
-                    
-                stdout_str = result.stdout.decode('utf-8', errors='replace')
-                data = json.loads(stdout_str)
                 assets = data.get("assets", [])
                 download_url = None
+                dmg_asset = None
                 for asset in assets:
                     if asset.get("name", "").endswith(".dmg"):
+                        dmg_asset = asset
                         download_url = asset.get("browser_download_url")
                         break
                         
@@ -154,11 +157,22 @@ class UpdateManager:
                     latest_tag = data.get("tag_name", self.latest_version_str)
                     download_url = f"https://github.com/detekoi/jam-deck/releases/download/{latest_tag}/JamDeck.dmg"
                 
+                expected_sha256 = self._find_expected_sha256(assets, dmg_asset)
+                if expected_sha256:
+                    print(f"Expecting SHA-256 {expected_sha256}")
+                else:
+                    print("Warning: No published checksum for this release, skipping verification.")
+
                 print(f"Downloading DMG from: {download_url}")
-                dl_cmd = ['curl', '-L', '-s', '--max-time', '60', '-o', dmg_path, download_url]
-                dl_result = subprocess.run(dl_cmd, capture_output=True, timeout=65)
+                downloader = ChunkedDownloader(
+                    download_url, dmg_path,
+                    total_size=dmg_asset.get("size") if dmg_asset else None,
+                    expected_sha256=expected_sha256,
+                    progress_callback=self._report_download_progress,
+                )
+                downloader.download()
                 
-                if dl_result.returncode != 0 or not os.path.exists(dmg_path) or os.path.getsize(dmg_path) < 1000000:
+                if not os.path.exists(dmg_path) or os.path.getsize(dmg_path) < 1000000:
                     raise Exception("Failed to download the update DMG file.")
                     
                 # 2. Mount DMG
@@ -231,6 +245,39 @@ class UpdateManager:
                 
         threading.Thread(target=run_update, daemon=True).start()
 
+    def _find_expected_sha256(self, assets, dmg_asset):
+        """Find the published SHA-256 for the DMG, or None if there isn't one.
+
+        Uses the asset's 'digest' field from the GitHub API when present, and
+        otherwise looks for a '.sha256' or 'SHA256SUMS' asset in the release.
+        """
+        digest = (dmg_asset or {}).get("digest") or ""
+        if digest.startswith("sha256:"):
+            return digest.split(":", 1)[1].lower()
+
+        dmg_name = (dmg_asset or {}).get("name")
+        for asset in assets:
+            name = asset.get("name", "")
+            if not (name.endswith(".sha256") or name.upper().startswith("SHA256SUMS")):
+                continue
+            url = asset.get("browser_download_url")
+            if not url:
+                continue
+            result = subprocess.run(['curl', '-L', '-s', '-f', '--max-time', '10', url], capture_output=True, timeout=15)
+            if result.returncode == 0:
+                checksum = parse_sha256(result.stdout.decode('utf-8', errors='replace'), dmg_name)
+                if checksum:
+                    return checksum
+        return None
+
+    def _report_download_progress(self, done, total):
+        """Show download progress in the update menu item."""
+        percent = int(done * 100 / total) if total else 0
+        if percent == self._last_progress_percent:
+            return
+        self._last_progress_percent = percent
+        self.app.run_on_main_thread(lambda: setattr(self.app.update_menu_item, 'title', f"Downloading Update... {percent}%"))
+
     def _run_updater_script(self, dmg_path, mount_point, src_app_path, dest_app_path, is_bundled):
         """Spawn a detached shell script to replace the app and relaunch it."""
         parent_pid = os.getpid()
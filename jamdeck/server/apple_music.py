@@ -1,14 +1,154 @@
 # jamdeck/server/apple_music.py
 import os
 import json
+import time
+import threading
 import subprocess
 
+from jamdeck.server.breaker import CircuitBreaker
+
+# Error reported when osascript doesn't answer in time (Music.app hung)
+APPLESCRIPT_TIMEOUT_ERROR = "AppleScript timed out"
+
+class ProviderBusy(Exception):
+    """A request's deadline passed while it waited for another query."""
+
+def music_app_running():
+    """Cheap check for a Music.app process, used before spawning osascript.
+
+    Returns True if pgrep isn't available so we fall back to asking
+    AppleScript.
+    """
+    try:
+        result = subprocess.run(['pgrep', '-x', 'Music'], capture_output=True, timeout=2)
+    except (OSError, subprocess.TimeoutExpired):
+        return True
+    return result.returncode == 0
+
 class AppleMusicProvider:
-    def __init__(self, artwork_manager, artwork_path="/tmp/harmony_deck_cover.jpg"):
+    def __init__(self, artwork_manager, artwork_path="/tmp/harmony_deck_cover.jpg", track_state=None,
+                 metrics=None, breaker=None, is_running=music_app_running, tracer=None):
         self.artwork_manager = artwork_manager
         self.artwork_path = artwork_path
+        # Optional TrackState that is updated with every query result
+        self.track_state = track_state
+        # Optional ServerMetrics for breaker counters and state
+        self.metrics = metrics
+        # Stops us paying the full osascript timeout on every poll while
+        # Music is hung
+        self.breaker = breaker or CircuitBreaker()
+        self.is_running = is_running
+        # Optional TraceRecorder capturing raw AppleScript output for replay
+        self.tracer = tracer
+        # Requests are served on multiple threads, but the AppleScript writes
+        # a single shared artwork file, so queries must not overlap.
+        self._lock = threading.Lock()
+
+    def get_apple_music_track(self, received_at=None, deadline=None):
+        """Query Music.app and return the now-playing data as a JSON string.
+
+        received_at (time.time() when the request arrived) lets a request
+        that queued behind another query reuse that query's result
+        instead of running its own. deadline (time.monotonic()) bounds
+        how long it queues; ProviderBusy is raised once it passes.
+        """
+        if deadline is None:
+            self._lock.acquire()
+        elif not self._lock.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            self._count("provider_deadline_dropped")
+            raise ProviderBusy("Request deadline passed while waiting for the provider")
+        try:
+            if received_at is not None and self.track_state is not None:
+                snapshot, _ = self.track_state.get()
+                updated_at = self.track_state.updated_at
+                if snapshot is not None and updated_at is not None and updated_at >= received_at:
+                    # Answered by a query that ran while this request waited
+                    self._count("provider_coalesced")
+                    return json.dumps(snapshot)
+            return self._query_locked()
+        finally:
+            self._lock.release()
+
+    def _query_locked(self):
+        """Run one query; the caller holds self._lock."""
+        if self.tracer is not None:
+            self.tracer.record("query")
+        data = self._guarded_query()
+        data["breaker"] = self.breaker.state
+        if self.metrics is not None:
+            self.metrics.set_gauge("provider_breaker", self.breaker.state)
+        # Updated under the lock so listeners see changes in order
+        if self.track_state is not None:
+            self.track_state.update(data)
+        return json.dumps(data)
+
+    def _count(self, name):
+        if self.metrics is not None:
+            self.metrics.increment(name)
+
+    def _guarded_query(self):
+        """Run _query_track unless Music is absent or the breaker is open."""
+        if not self.breaker.allow():
+            self._count("provider_breaker_rejected")
+            return {"playing": False, "error": "Music app not responding"}
+
+        running = self.is_running()
+        if self.tracer is not None:
+            self.tracer.record("running", running=running)
+        if not running:
+            # Nothing to ask, and an absent app isn't a hang
+            self._count("provider_not_running")
+            self.breaker.record_success()
+            return {"playing": False, "error": "Music app not running"}
 
-    def get_apple_music_track(self):
+        data = self._query_track()
+        if data.get("error") == APPLESCRIPT_TIMEOUT_ERROR:
+            self._count("provider_timeouts")
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return data
+
+    def _run_applescript(self, script):
+        """Run script with osascript and return (stdout, stderr).
+
+        Raises subprocess.TimeoutExpired if Music doesn't answer. When
+        tracing, the raw output and timing are recorded for replay.
+        """
+        started = time.monotonic()
+        try:
+            result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True, timeout=5)
+        except subprocess.TimeoutExpired:
+            if self.tracer is not None:
+                self.tracer.record("applescript", duration=time.monotonic() - started, timeout=True)
+            raise
+        if self.tracer is not None:
+            self.tracer.record("applescript", duration=time.monotonic() - started,
+                               stdout=result.stdout, stderr=result.stderr,
+                               artwork_size=self._artwork_size(result.stdout))
+        return result.stdout, result.stderr
+
+    def _artwork_timestamp(self):
+        """The artwork file's mtime, which keys artworkPath for cache busting.
+
+        Raises FileNotFoundError if there is no artwork file. Recorded when
+        tracing, so a replay produces the same artworkPath.
+        """
+        timestamp = int(os.path.getmtime(self.artwork_path))
+        if self.tracer is not None:
+            self.tracer.record("artwork_mtime", mtime=timestamp)
+        return timestamp
+
+    def _artwork_size(self, stdout):
+        """Size of the artwork file if this output says the script wrote one."""
+        if not stdout.strip().lower().endswith("|||true"):
+            return None
+        try:
+            return os.path.getsize(self.artwork_path)
+        except OSError:
+            return None
+
+    def _query_track(self):
         # Define a unique delimiter unlikely to be in metadata
         delimiter = "|||"
         
@@ -62,16 +202,16 @@ class AppleMusicProvider:
         
         try:
             print("Executing AppleScript...")
-            result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True, timeout=5)
+            stdout, stderr = self._run_applescript(script)
             
-            print(f"AppleScript raw output: {result.stdout}")
-            if result.stderr:
-                print(f"AppleScript error output: {result.stderr}")
+            print(f"AppleScript raw output: {stdout}")
+            if stderr:
+                print(f"AppleScript error output: {stderr}")
             
-            output = result.stdout.strip()
+            output = stdout.strip()
             if not output:
                 print("Warning: Empty response from AppleScript")
-                return json.dumps({"playing": False, "error": "Empty response from AppleScript"})
+                return {"playing": False, "error": "Empty response from AppleScript"}
                 
             # Parse the delimited string
             parts = output.split(delimiter)
@@ -101,8 +241,8 @@ class AppleMusicProvider:
 
                     # Add artwork path if available (from AppleScript or iTunes fallback)
                     if not has_artwork:
-                        # Try iTunes Search API as fallback
-                        has_artwork = self.artwork_manager.fetch_itunes_artwork(artist, title, album)
+                        # Fall back to the local folder / cache / iTunes / secondary source chain
+                        has_artwork = self.artwork_manager.fetch_fallback_artwork(artist, title, album)
                     
                     if has_artwork:
                         # Only serve the artwork file if it belongs to the current track.
@@ -111,17 +251,16 @@ class AppleMusicProvider:
                         if self.artwork_manager.last_artwork_track == track_id:
                             # Generate timestamp for cache busting
                             try:
-                                timestamp = int(os.path.getmtime(self.artwork_path))
-                                data["artworkPath"] = f"/artwork?t={timestamp}"
+                                data["artworkPath"] = f"/artwork?t={self._artwork_timestamp()}"
                             except FileNotFoundError:
                                 print("Warning: Artwork file not found for timestamp, skipping artwork path.")
                         else:
                             print(f"Artwork on disk belongs to '{self.artwork_manager.last_artwork_track}', not current track '{track_id}'. Skipping stale art.")
 
-                    return json.dumps(data)
+                    return data
                 else:
                     print(f"Error: Unexpected number of parts from AppleScript when playing. Parts: {parts}")
-                    return json.dumps({"playing": False, "error": "Malformed response from AppleScript (playing)"})
+                    return {"playing": False, "error": "Malformed response from AppleScript (playing)"}
             elif status == 'false':
                 # Not playing or error reading track
                 error_message = parts[1] if len(parts) > 1 else "Unknown state"
@@ -130,22 +269,22 @@ class AppleMusicProvider:
                     print(f"Music app state: {error_message}")
 
                 if error_message == "Not playing":
-                    return json.dumps({"playing": False, "error": None})
+                    return {"playing": False, "error": None}
                 else:
-                    return json.dumps({"playing": False, "error": error_message})
+                    return {"playing": False, "error": error_message}
             elif status == 'not_running':
                 # Music app not running
                 error_message = parts[1] if len(parts) > 1 else "Music app not running"
                 print(error_message)
-                return json.dumps({"playing": False, "error": error_message})
+                return {"playing": False, "error": error_message}
             else:
                 # Unexpected status from AppleScript
                 print(f"Error: Unexpected status from AppleScript: {status}. Parts: {parts}")
-                return json.dumps({"playing": False, "error": "Unknown response from AppleScript"})
+                return {"playing": False, "error": "Unknown response from AppleScript"}
 
         except subprocess.TimeoutExpired:
             print("Error: AppleScript timed out after 5 seconds")
-            return json.dumps({"playing": False, "error": "AppleScript timed out"})
+            return {"playing": False, "error": APPLESCRIPT_TIMEOUT_ERROR}
         except Exception as e:
             print(f"Error processing AppleScript output or getting artwork timestamp: {e}")
-            return json.dumps({"playing": False, "error": f"Python processing error: {str(e)}"})
+            return {"playing": False, "error": f"Python processing error: {str(e)}"}
@@ -1,135 +1,231 @@
 # jamdeck/server/artwork.py
 import os
-import re
-import json
-import subprocess
-from urllib.parse import quote_plus
+import time
+import threading
+
+from jamdeck.server.itunes import ITunesScheduler
+from jamdeck.server.matching import match_key, normalize_artist, normalize_title, normalize_album, best_match
+from jamdeck.server.resolver import (
+    ArtworkResolver, ArtworkUnavailable, LocalFolderTier, PersistentCacheTier,
+    ITunesTier, HttpTemplateTier, ARTWORK_CACHE_DIR, _curl_bytes,
+)
+
+# Search results fetched per lookup and scored against the track
+ITUNES_CANDIDATES = 5
+# How long a song whose sources couldn't answer (throttled, offline) is
+# skipped before its artwork is looked up again
+UNAVAILABLE_RETRY = 60  # seconds
 
 class ArtworkManager:
-    def __init__(self, artwork_path="/tmp/harmony_deck_cover.jpg"):
+    def __init__(self, artwork_path="/tmp/harmony_deck_cover.jpg", itunes_scheduler=None,
+                 local_folder=None, secondary_url=None, cache_dir=ARTWORK_CACHE_DIR, download=None,
+                 clock=time.monotonic, time_scale=1.0):
         self.artwork_path = artwork_path
-        # Key: "artist - title", Value: True (found & downloaded) or False (not found)
+        # Time source and resolver time scale; trace replay substitutes its own
+        self.clock = clock
+        self.time_scale = time_scale
+        # Fetches artwork images for the network tiers (replaceable for trace replay)
+        self.download = download or _curl_bytes
+        # Every iTunes Search API call goes through this
+        self.itunes_scheduler = itunes_scheduler or ITunesScheduler()
+        # Key: normalized "artist - title" (matching.match_key),
+        # Value: artwork URL (found) or False (not found)
         self.itunes_artwork_cache = {}
+        # Songs no tier had artwork for (normalized keys)
+        self.artwork_misses = set()
+        # Songs whose sources couldn't answer: key -> clock() time to retry at.
+        # Kept short-lived, unlike misses, and never saved.
+        self.artwork_unavailable = {}
+        # Counters for judging how well lookups are doing
+        self.lookup_stats = {"lookups": 0, "cache_hits": 0, "matched": 0, "misses": 0, "unavailable": 0}
         # Track which song's artwork is currently written to the temp file.
         self.last_artwork_track = None  # Will be set to "artist|||title"
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        # Guards lookup_stats and itunes_artwork_cache. Separate from _lock,
+        # which fetch_fallback_artwork holds while the resolver's tier
+        # threads call find_itunes_artwork_url.
+        self._lookup_lock = threading.Lock()
+        self.configure(local_folder, secondary_url)
+
+    def configure(self, local_folder=None, secondary_url=None):
+        """(Re)build the artwork source chain.
+
+        Order: local cover folder -> persistent cache -> iTunes -> secondary
+        HTTP source. The folder and secondary source are optional.
+        """
+        cache_tier = PersistentCacheTier(self.cache_dir)
+        tiers = []
+        # Index of the local cover folder, if one is configured
+        self.local_index = None
+        if local_folder:
+            local_tier = LocalFolderTier(local_folder)
+            self.local_index = local_tier.index
+            tiers.append(local_tier)
+        tiers.append(cache_tier)
+        tiers.append(ITunesTier(self, download=self.download))
+        if secondary_url:
+            try:
+                tiers.append(HttpTemplateTier(secondary_url, download=self.download))
+            except ValueError as e:
+                print(f"Warning: Secondary artwork source disabled: {e}")
+        self.resolver = ArtworkResolver(tiers, cache_tier=cache_tier, time_scale=self.time_scale)
+        self.artwork_misses.clear()
+        self.artwork_unavailable.clear()
+
+    def clear_caches(self):
+        """Forget cached iTunes lookups so the next request searches again."""
+        with self._lookup_lock:
+            self.itunes_artwork_cache.clear()
+        self.artwork_misses.clear()
+        self.artwork_unavailable.clear()
+        self.last_artwork_track = None
+
+    def export_state(self):
+        """Lookup caches as JSON-serializable data, for a warm restart."""
+        with self._lock:
+            with self._lookup_lock:
+                itunes = dict(self.itunes_artwork_cache)
+            return {
+                "itunes": itunes,
+                "misses": sorted(self.artwork_misses),
+                "lastArtworkTrack": self.last_artwork_track,
+            }
+
+    def restore_state(self, state):
+        """Load caches saved by export_state()."""
+        with self._lock:
+            itunes = state.get("itunes")
+            if isinstance(itunes, dict):
+                with self._lookup_lock:
+                    self.itunes_artwork_cache.update(itunes)
+            self.artwork_misses.update(state.get("misses") or [])
+            # Only trust the owner of an artwork file that is still there
+            if os.path.exists(self.artwork_path):
+                self.last_artwork_track = state.get("lastArtworkTrack")
 
     def _itunes_search(self, search_term, entity="song", limit=1):
         """Perform an iTunes Search API query and return the parsed JSON data.
-        
-        Returns the parsed dict on success, or None on failure.
-        Uses subprocess curl to avoid SSL issues in py2app bundles.
-        """
-        query = f"term={quote_plus(search_term)}&media=music&entity={entity}&limit={limit}"
-        url = f"https://itunes.apple.com/search?{query}"
-        
-        try:
-            result = subprocess.run(
-                ['curl', '-s', '--max-time', '3', url],
-                capture_output=True, text=True, timeout=5
-            )
-            
-            if result.returncode != 0:
-                print(f"iTunes search: curl failed for '{search_term}'")
-                return None
-            
-            return json.loads(result.stdout)
-        except Exception as e:
-            print(f"iTunes search error for '{search_term}': {e}")
-            return None
 
-    def _download_itunes_artwork(self, art_url, search_term):
-        """Download artwork from a given URL to the temp file.
-        
-        Upscales from 100x100 to 600x600 and saves to self.artwork_path.
-        Returns True on success, False on failure.
+        Goes through the shared ITunesScheduler, which rate-limits and
+        de-duplicates calls. Raises ITunesUnavailable if the search couldn't
+        be made (throttled, timed out, network error).
         """
-        # Upscale from 100x100 to 600x600
-        art_url = art_url.replace("100x100bb", "600x600bb")
-        
-        try:
-            dl_result = subprocess.run(
-                ['curl', '-s', '--max-time', '3', '-o', self.artwork_path, art_url],
-                capture_output=True, timeout=5
-            )
-            
-            if dl_result.returncode != 0:
-                print(f"iTunes artwork: failed to download for '{search_term}'")
-                return False
-            
-            file_size = os.path.getsize(self.artwork_path)
-            print(f"iTunes artwork: downloaded for '{search_term}' ({file_size} bytes)")
-            return True
-        except Exception as e:
-            print(f"iTunes artwork download error: {e}")
-            return False
+        return self.itunes_scheduler.search(search_term, entity=entity, limit=limit)
+
+    def fetch_fallback_artwork(self, artist, title, album):
+        """Find artwork when AppleScript can't provide it.
 
-    def fetch_itunes_artwork(self, artist, title, album):
-        """Fetch album artwork from iTunes Search API as a fallback.
-        
         Used when AppleScript can't retrieve artwork (e.g., macOS Tahoe streaming bug,
-        or non-JPEG artwork formats).
-        Downloads 600x600 artwork to self.artwork_path.
+        or non-JPEG artwork formats). Asks the resolver's sources in turn and
+        writes the result to self.artwork_path.
         Returns True if artwork was found and saved, False otherwise.
         """
-        cache_key = f"{artist} - {title}"
         track_id = f"{artist}|||{title}"
-        
-        # If the cache says we already found this song's art AND the file on disk
-        # still belongs to this song, we can skip the download.
-        if self.itunes_artwork_cache.get(cache_key) is True and self.last_artwork_track == track_id:
-            return True
-        
-        # If cache says we previously couldn't find art for this song, don't retry.
-        if self.itunes_artwork_cache.get(cache_key) is False:
-            return False
-        
-        try:
-            art_url = None
-            strategy_used = None
-            
-            # Strategy 1: Search by artist + title (original behavior)
-            search_term = f"{artist} {title}"
-            data = self._itunes_search(search_term, entity="song", limit=1)
-            if data and data.get("resultCount", 0) > 0:
-                art_url = data["results"][0].get("artworkUrl100", "")
-                strategy_used = "artist+title"
-            
-            # Strategy 2: Strip censoring characters (e.g. "F**k" -> "Fk") and retry
-            if not art_url:
-                cleaned_title = re.sub(r'[*]+', '', title)
-                if cleaned_title != title:
-                    search_term_clean = f"{artist} {cleaned_title}"
-                    print(f"iTunes artwork: retrying with cleaned title: '{search_term_clean}'")
-                    data = self._itunes_search(search_term_clean, entity="song", limit=1)
-                    if data and data.get("resultCount", 0) > 0:
-                        art_url = data["results"][0].get("artworkUrl100", "")
-                        strategy_used = "artist+cleaned_title"
-            
-            # Strategy 3: Search by artist + album for album-level artwork
-            if not art_url and album:
-                search_term_album = f"{artist} {album}"
-                print(f"iTunes artwork: falling back to album search: '{search_term_album}'")
-                data = self._itunes_search(search_term_album, entity="song", limit=1)
-                if data and data.get("resultCount", 0) > 0:
-                    art_url = data["results"][0].get("artworkUrl100", "")
-                    strategy_used = "artist+album"
-            
-            # If no artwork URL found from any strategy, cache the miss
-            if not art_url:
-                print(f"iTunes artwork fallback: no results for '{artist} - {title}' (album: {album}) after all strategies")
-                self.itunes_artwork_cache[cache_key] = False
+        key = match_key(artist, title)
+        with self._lock:
+            # The file on disk already belongs to this song
+            if self.last_artwork_track == track_id and os.path.exists(self.artwork_path):
+                return True
+            if key in self.artwork_misses:
                 return False
-            
-            # Download the artwork
-            if not self._download_itunes_artwork(art_url, f"{artist} - {title} [via {strategy_used}]"):
-                self.itunes_artwork_cache[cache_key] = False
+            now = self.clock()
+            if self.artwork_unavailable.get(key, 0) > now:
+                return False
+
+            try:
+                data, source = self.resolver.resolve(artist, title, album)
+            except ArtworkUnavailable as e:
+                # Not a real miss, so it isn't remembered for good. Skipping
+                # the song for a while keeps every poll (which holds the
+                # provider lock) from waiting on a throttled or offline source.
+                print(f"Artwork fallback unavailable for '{artist} - {title}': {e}; "
+                      f"retrying in {UNAVAILABLE_RETRY}s")
+                self._count("unavailable")
+                self.artwork_unavailable[key] = now + UNAVAILABLE_RETRY
+                if len(self.artwork_unavailable) > 100:
+                    self.artwork_unavailable = {k: t for k, t in self.artwork_unavailable.items() if t > now}
                 return False
-            
-            self.itunes_artwork_cache[cache_key] = True
+            self.artwork_unavailable.pop(key, None)
+
+            if not data:
+                print(f"Artwork fallback: nothing found for '{artist} - {title}' (album: {album})")
+                self.artwork_misses.add(key)
+                return False
+
+            try:
+                tmp_path = self.artwork_path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.artwork_path)
+            except OSError as e:
+                print(f"Artwork fallback: could not write artwork: {e}")
+                return False
+            print(f"Artwork fallback: '{artist} - {title}' from {source} ({len(data)} bytes)")
             self.last_artwork_track = track_id
             return True
-            
-        except Exception as e:
-            print(f"iTunes artwork fallback error: {e}")
-            self.itunes_artwork_cache[cache_key] = False
-            return False
+
+    def find_itunes_artwork_url(self, artist, title, album):
+        """Look the track up on the iTunes Search API and return its artwork URL.
+
+        Returns None if there is no good match. Raises ITunesUnavailable
+        if the search couldn't be made.
+
+        Lookups are keyed by the normalized artist/title, so "Song",
+        "Song (Remastered 2011)" and "Song - feat. X" share one search,
+        and several candidates are scored instead of trusting the first.
+        """
+        cache_key = match_key(artist, title)
+        with self._lookup_lock:
+            self.lookup_stats["lookups"] += 1
+            cached_url = self.itunes_artwork_cache.get(cache_key)
+            if cached_url is not None:
+                # A URL, or False if we previously couldn't find art for this song
+                self.lookup_stats["cache_hits"] += 1
+                return cached_url or None
+
+        art_url = None
+        strategy_used = None
+        norm_artist = normalize_artist(artist)
+
+        # Strategy 1: Search by artist + normalized title (which also
+        # drops censoring characters, e.g. "F**k" -> "fk")
+        search_term = f"{norm_artist} {normalize_title(title)}"
+        data = self._itunes_search(search_term, entity="song", limit=ITUNES_CANDIDATES)
+        match, score = best_match(data.get("results") if data else None, artist, title, album)
+        if match:
+            art_url = match["artworkUrl100"]
+            strategy_used = f"artist+title, score {score:.2f}"
+
+        # Strategy 2: Search by artist + album for album-level artwork
+        if not art_url and album:
+            search_term_album = f"{norm_artist} {normalize_album(album)}"
+            print(f"iTunes artwork: falling back to album search: '{search_term_album}'")
+            data = self._itunes_search(search_term_album, entity="song", limit=ITUNES_CANDIDATES)
+            match, score = best_match(data.get("results") if data else None, artist, None, album)
+            if match:
+                art_url = match["artworkUrl100"]
+                strategy_used = f"artist+album, score {score:.2f}"
+
+        # If no artwork URL found from any strategy, cache the miss
+        if not art_url:
+            print(f"iTunes artwork: no good match for '{artist} - {title}' (album: {album})")
+            with self._lookup_lock:
+                self.lookup_stats["misses"] += 1
+                self.itunes_artwork_cache[cache_key] = False
+            return None
+
+        print(f"iTunes artwork: found '{artist} - {title}' via {strategy_used}")
+        with self._lookup_lock:
+            self.lookup_stats["matched"] += 1
+            self.itunes_artwork_cache[cache_key] = art_url
+        return art_url
+
+    def _count(self, name):
+        with self._lookup_lock:
+            self.lookup_stats[name] += 1
+
+    def lookup_snapshot(self):
+        """A consistent copy of lookup_stats, for the status endpoint."""
+        with self._lookup_lock:
+            return dict(self.lookup_stats)
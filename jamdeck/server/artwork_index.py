@@ -0,0 +1,228 @@
+# jamdeck/server/artwork_index.py
+import os
+import json
+import time
+import threading
+
+from jamdeck.server.matching import album_key, normalize_album
+
+ARTWORK_INDEX_FILE = os.path.join(os.path.expanduser("~"), ".jamdeck_artwork_index.json")
+# Bump when the key format changes so old indexes are rebuilt
+INDEX_VERSION = 2
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+# Per-album cover file names, most preferred first
+COVER_NAMES = ("cover", "folder", "front", "album")
+# A lookup miss starts a rescan if the last scan is older than this
+REFRESH_INTERVAL = 60  # seconds
+
+def _split_artist_album(name):
+    """'Artist - Album' -> ('Artist', 'Album'), or None."""
+    artist, sep, album = name.partition(" - ")
+    if not sep or not artist.strip() or not album.strip():
+        return None
+    return artist.strip(), album.strip()
+
+class ArtworkIndex:
+    """Index of album covers kept in a folder tree.
+
+    Two layouts are recognised, and can be mixed:
+      - one folder per album holding cover.jpg / folder.png / front.jpg,
+        named 'Artist - Album' or nested as 'Artist/Album'
+      - loose files named 'Artist - Album.jpg' (or .png)
+
+    Covers are keyed by normalized artist/album (matching.album_key), so
+    a lookup is a dict get. A second map by album alone catches
+    compilations filed under 'Various Artists'; albums whose name is
+    shared by several covers are left out of it.
+
+    The index is saved to disk with every directory's mtime. A rescan
+    only lists directories whose mtime changed (a file was added, removed
+    or renamed in them) and reuses the saved results for the rest, so
+    refreshing a large, mostly unchanged library costs one stat per
+    directory.
+    """
+
+    def __init__(self, root, path=ARTWORK_INDEX_FILE, refresh_interval=REFRESH_INTERVAL):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # relative dir -> [mtime, [subdir names], [[key, album, file name], ...]]
+        self._dirs = {}
+        self._by_key = {}
+        self._by_album = {}
+        self.scanned_at = 0
+        self.stats = {"entries": 0, "dirs": 0, "rescanned": 0, "scan_ms": 0}
+        if path:
+            self._load()
+
+    # --- Persistence ---
+
+    def _load(self):
+        try:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+                return
+            self._dirs = data.get("dirs") or {}
+            self._rebuild_maps()
+            print(f"Loaded artwork index: {self.stats['entries']} covers in {self.root}")
+        except Exception as e:
+            print(f"Warning: Could not load artwork index: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"version": INDEX_VERSION, "root": self.root, "dirs": self._dirs},
+                          f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not save artwork index: {e}")
+
+    # --- Scanning ---
+
+    def _scan_dir(self, rel):
+        """List one directory: return (subdirs, covers)."""
+        subdirs = []
+        images = {}
+        with os.scandir(os.path.join(self.root, rel)) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                    continue
+                stem, ext = os.path.splitext(entry.name)
+                if ext.lower() in IMAGE_EXTENSIONS:
+                    images[stem] = entry.name
+
+        covers = []
+        # Loose 'Artist - Album.jpg' files
+        for stem, name in images.items():
+            parts = _split_artist_album(stem)
+            if parts:
+                covers.append([album_key(*parts), normalize_album(parts[1]), name])
+
+        # A cover.jpg-style file describes the folder it's in
+        cover_file = None
+        lowered = {stem.lower(): name for stem, name in images.items()}
+        for cover_name in COVER_NAMES:
+            if cover_name in lowered:
+                cover_file = lowered[cover_name]
+                break
+        if cover_file and rel:
+            dir_name = os.path.basename(rel)
+            parts = _split_artist_album(dir_name)
+            if not parts:
+                parent = os.path.basename(os.path.dirname(rel))
+                parts = (parent, dir_name) if parent else None
+            if parts:
+                covers.append([album_key(*parts), normalize_album(parts[1]), cover_file])
+        return subdirs, covers
+
+    def refresh(self):
+        """Bring the index up to date with the folder. Returns directories rescanned.
+
+        Waits for a scan that is already running to finish first.
+        """
+        with self._refresh_lock:
+            return self._refresh_locked()
+
+    def refresh_in_background(self):
+        """Rescan on a background thread, unless a scan is already running.
+
+        Returns True if a scan was started.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self._refresh_locked()
+            except Exception as e:
+                print(f"Artwork index: scan failed: {e}")
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=run, name="jamdeck-artwork-index", daemon=True).start()
+        return True
+
+    def _refresh_locked(self):
+        """Scan the folder; the caller holds _refresh_lock."""
+        started = time.monotonic()
+        old_dirs = self._dirs
+        new_dirs = {}
+        rescanned = 0
+        pending = [""]
+        while pending:
+            rel = pending.pop()
+            try:
+                mtime = os.stat(os.path.join(self.root, rel)).st_mtime
+            except OSError:
+                continue
+            record = old_dirs.get(rel)
+            if record is None or record[0] != mtime:
+                try:
+                    subdirs, covers = self._scan_dir(rel)
+                except OSError as e:
+                    print(f"Artwork index: could not read {rel or self.root}: {e}")
+                    continue
+                record = [mtime, subdirs, covers]
+                rescanned += 1
+            new_dirs[rel] = record
+            pending.extend(os.path.join(rel, name) for name in record[1])
+
+        changed = rescanned or len(new_dirs) != len(old_dirs)
+        with self._lock:
+            self._dirs = new_dirs
+            self._rebuild_maps()
+            self.scanned_at = time.monotonic()
+            self.stats["rescanned"] = rescanned
+            self.stats["scan_ms"] = round((self.scanned_at - started) * 1000, 1)
+        if changed:
+            self._save()
+            print(f"Artwork index: {self.stats['entries']} covers, "
+                  f"{rescanned} of {len(new_dirs)} folders rescanned")
+        return rescanned
+
+    def _rebuild_maps(self):
+        by_key = {}
+        by_album = {}
+        for rel, (_, _, covers) in self._dirs.items():
+            for key, album, name in covers:
+                path = os.path.join(rel, name)
+                by_key.setdefault(key, path)
+                if album:
+                    # None marks an album name shared by different covers
+                    by_album[album] = path if by_album.get(album, path) == path else None
+        self._by_key = by_key
+        self._by_album = by_album
+        self.stats["entries"] = len(by_key)
+        self.stats["dirs"] = len(self._dirs)
+
+    # --- Lookup ---
+
+    def _get(self, artist, album):
+        with self._lock:
+            rel = self._by_key.get(album_key(artist, album)) or self._by_album.get(normalize_album(album))
+        return os.path.join(self.root, rel) if rel else None
+
+    def lookup(self, artist, album):
+        """Return the path of the cover for this album, or None.
+
+        Only reads the current index, so it never waits for a scan. A miss
+        starts a background rescan if the index is older than
+        refresh_interval, so a newly added cover is found by a later lookup.
+        """
+        if not album:
+            return None
+        path = self._get(artist, album)
+        if path is None and time.monotonic() - self.scanned_at > self.refresh_interval:
+            self.refresh_in_background()
+        return path
@@ -0,0 +1,64 @@
+# jamdeck/server/breaker.py
+import time
+import threading
+
+BREAKER_CLOSED = "closed"        # calls go through
+BREAKER_OPEN = "open"            # calls are skipped until the backoff expires
+BREAKER_HALF_OPEN = "half_open"  # one probe call is allowed through
+
+class CircuitBreaker:
+    """Stop calling something that keeps hanging, and probe it with backoff.
+
+    After failure_threshold consecutive failures the breaker opens and
+    allow() returns False for base_delay seconds. The next call after that
+    is a probe: success closes the breaker, failure reopens it with the
+    delay doubled (up to max_delay).
+
+    clock() returns the current time in seconds (time.monotonic by
+    default; trace replay passes the replayed clock).
+    """
+
+    def __init__(self, failure_threshold=2, base_delay=5.0, max_delay=60.0, clock=time.monotonic):
+        self.clock = clock
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.delay = base_delay
+        self.open_until = 0
+
+    def allow(self):
+        """Return True if a call may be made now."""
+        with self._lock:
+            if self.state == BREAKER_CLOSED:
+                return True
+            if self.state == BREAKER_OPEN and self.clock() >= self.open_until:
+                self.state = BREAKER_HALF_OPEN
+                return True
+            # Open and still backing off, or a probe is already in flight
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = BREAKER_CLOSED
+            self.failures = 0
+            self.delay = self.base_delay
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == BREAKER_HALF_OPEN:
+                # The probe failed: back off for longer
+                self.delay = min(self.delay * 2, self.max_delay)
+            elif self.failures < self.failure_threshold:
+                return
+            self.state = BREAKER_OPEN
+            self.open_until = self.clock() + self.delay
+            print(f"Circuit breaker open, retrying in {self.delay:.0f}s")
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = max(0.0, self.open_until - self.clock()) if self.state == BREAKER_OPEN else 0.0
+            return {"state": self.state, "failures": self.failures, "retry_in": round(retry_in, 1)}
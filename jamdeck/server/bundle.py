@@ -0,0 +1,94 @@
+# jamdeck/server/bundle.py
+import os
+import re
+import hashlib
+
+# Tags in overlay.html replaced by the inlined files
+STYLESHEET_TAG = '<link rel="stylesheet" href="overlay.css">'
+SCRIPT_TAG = '<script src="overlay.js"></script>'
+# Opening tag of the inlined script; the handler embeds the first-paint
+# state just before it
+BUNDLE_SCRIPT_TAG = '<script id="overlayScript">'
+
+FONT_URL_RE = re.compile(r"url\('(/assets/fonts/([^')]+))'\)")
+
+def content_hash(data, length=12):
+    return hashlib.sha256(data).hexdigest()[:length]
+
+def minify_css(css):
+    """Drop comments and collapse whitespace (safe for our stylesheet)."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    # Spaces before ':' can be significant in selectors, so only trim after
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+def minify_js(js):
+    """Strip indentation, blank lines and whole-line comments.
+
+    Deliberately conservative: a real JS minifier would need a tokenizer,
+    and this already removes most of overlay.js's bulk.
+    """
+    lines = []
+    for line in js.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+    return '\n'.join(lines)
+
+def hash_font_urls(css, base_dir):
+    """Version font URLs with their content hash so they can be cached forever."""
+    def replace(match):
+        url, name = match.group(1), match.group(2)
+        try:
+            with open(os.path.join(base_dir, 'assets', 'fonts', name), 'rb') as f:
+                return f"url('{url}?v={content_hash(f.read())}')"
+        except OSError:
+            return match.group(0)
+    return FONT_URL_RE.sub(replace, css)
+
+class OverlayBundle:
+    """overlay.html with its stylesheet and script inlined, held in memory.
+
+    Built once at server startup (and on reload_config), so a browser
+    source loads the overlay with a single request instead of three and
+    the handler never touches the disk for it. Font URLs carry a content
+    hash, which lets the handler mark them immutable.
+
+    The first-paint track state is still added per request by the handler.
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.content = None
+        self.source_size = 0
+
+    def build(self):
+        """(Re)build the bundle. Returns True on success."""
+        try:
+            with open(os.path.join(self.base_dir, 'overlay.html'), 'r', encoding='utf-8') as f:
+                html = f.read()
+            with open(os.path.join(self.base_dir, 'overlay.css'), 'r', encoding='utf-8') as f:
+                css = f.read()
+            with open(os.path.join(self.base_dir, 'overlay.js'), 'r', encoding='utf-8') as f:
+                js = f.read()
+        except OSError as e:
+            print(f"Could not build overlay bundle: {e}")
+            return False
+
+        self.source_size = len(html.encode()) + len(css.encode()) + len(js.encode())
+        css = minify_css(hash_font_urls(css, self.base_dir))
+        js = minify_js(js)
+        # Keep '</' sequences in the inlined code from ending the element
+        js = js.replace('</', '<\\/')
+        bundled = html.replace(STYLESHEET_TAG, f'<style>{css}</style>', 1)
+        bundled = re.sub(r'<!--.*?-->', '', bundled, flags=re.S)
+        bundled = re.sub(r'>\s+<', '><', bundled)
+        # Inlined last so the markup clean-up above can't touch the script
+        bundled = bundled.replace(SCRIPT_TAG, f'{BUNDLE_SCRIPT_TAG}\n{js}\n</script>', 1)
+
+        self.content = bundled.encode('utf-8')
+        print(f"Built overlay bundle: {len(self.content)} bytes (from {self.source_size})")
+        return True
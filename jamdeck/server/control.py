@@ -0,0 +1,113 @@
+# jamdeck/server/control.py
+import json
+import threading
+
+DEFAULT_CONTROL_ENDPOINT = "ipc:///tmp/jamdeck-control.ipc"
+
+class ControlError(Exception):
+    """Raised by ControlClient when a command fails or the server is unreachable."""
+
+class ControlServer:
+    """Local JSON request/reply control channel on a ZMQ REP socket.
+
+    Requests look like {"method": "rebind", "params": {"port": 8081}} and are
+    answered with {"result": ...} or {"error": "message"}.
+    """
+
+    def __init__(self, context, endpoint=DEFAULT_CONTROL_ENDPOINT):
+        self.context = context
+        self.endpoint = endpoint
+        self.methods = {}
+        self._socket = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def register(self, name, handler):
+        """Expose handler(**params) as a control method."""
+        self.methods[name] = handler
+
+    def start(self):
+        import zmq
+
+        self._socket = self.context.socket(zmq.REP)
+        self._socket.setsockopt(zmq.LINGER, 0)
+        self._socket.bind(self.endpoint)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="jamdeck-control", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    def dispatch(self, request):
+        """Run one decoded request and build the reply dict."""
+        if not isinstance(request, dict):
+            return {"error": "Request must be a JSON object"}
+        method = request.get("method")
+        handler = self.methods.get(method)
+        if handler is None:
+            return {"error": f"Unknown method: {method}"}
+        params = request.get("params") or {}
+        try:
+            return {"result": handler(**params)}
+        except Exception as e:
+            print(f"Control method '{method}' failed: {e}")
+            return {"error": str(e)}
+
+    def _run(self):
+        import zmq
+
+        poller = zmq.Poller()
+        poller.register(self._socket, zmq.POLLIN)
+        try:
+            while not self._stop_event.is_set():
+                # Poll with a timeout so stop() is noticed promptly
+                if not dict(poller.poll(500)):
+                    continue
+                raw = self._socket.recv()
+                try:
+                    reply = self.dispatch(json.loads(raw))
+                except ValueError as e:
+                    reply = {"error": f"Invalid JSON: {e}"}
+                self._socket.send(json.dumps(reply).encode())
+        except zmq.ZMQError as e:
+            if not self._stop_event.is_set():
+                print(f"Control channel error: {e}")
+        finally:
+            self._socket.close()
+            self._socket = None
+
+class ControlClient:
+    """Blocking client for ControlServer, used by the menu bar app."""
+
+    def __init__(self, endpoint=DEFAULT_CONTROL_ENDPOINT, timeout=2.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def call(self, method, **params):
+        import zmq
+
+        context = zmq.Context.instance()
+        # A REQ socket is unusable after a timed-out request, so each call
+        # gets its own short-lived socket.
+        socket = context.socket(zmq.REQ)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.setsockopt(zmq.RCVTIMEO, int(self.timeout * 1000))
+        socket.setsockopt(zmq.SNDTIMEO, int(self.timeout * 1000))
+        try:
+            socket.connect(self.endpoint)
+            socket.send(json.dumps({"method": method, "params": params}).encode())
+            reply = json.loads(socket.recv())
+        except zmq.Again:
+            raise ControlError(f"No reply from server for '{method}'")
+        except (zmq.ZMQError, ValueError) as e:
+            raise ControlError(f"Control call '{method}' failed: {e}")
+        finally:
+            socket.close()
+
+        if "error" in reply:
+            raise ControlError(reply["error"])
+        return reply.get("result")
@@ -0,0 +1,14 @@
+# jamdeck/server/defaults.py
+"""Defaults shared with the command line.
+
+Kept free of imports so music_server.py can show them in --help without
+loading the profiling and trace modules, which are only needed when
+--profile or --trace is given.
+"""
+
+# Where profile captures are written
+PROFILE_DIR = "/tmp/jamdeck-profiles"
+DEFAULT_PROFILE_DURATION = 30  # seconds; 0 captures until stopped
+
+# Where provider traces are recorded
+TRACE_DIR = "/tmp/jamdeck-traces"
@@ -1,227 +1,630 @@
 # jamdeck/server/handler.py
 import os
+import json
+import time
+import email.utils
 from http.server import BaseHTTPRequestHandler
-from urllib.parse import urlparse
+from urllib.parse import urlparse, parse_qs
+
+from jamdeck.server.metrics import route_label
+from jamdeck.server.history import DEFAULT_HISTORY_PAGE_SIZE
+from jamdeck.server.bundle import BUNDLE_SCRIPT_TAG
+from jamdeck.server.sessions import SessionError, MAX_INGEST_BODY, MAX_ARTWORK_BYTES, MAX_WAIT
+from jamdeck.server.apple_music import ProviderBusy
+from jamdeck.server.static_files import StaticFileIndex
+
+# Chunk size used when streaming files without sendfile support
+FILE_CHUNK_SIZE = 64 * 1024
+
+# Persistent connection limits. Overlays poll every few seconds, so an idle
+# timeout a little above the poll interval keeps one connection per scene.
+KEEPALIVE_TIMEOUT = 15  # seconds
+KEEPALIVE_MAX_REQUESTS = 1000
+
+# overlay.html anchors used to inline the first paint
+OVERLAY_SCRIPT_TAG = b'<script src="overlay.js"></script>'
+OVERLAY_STYLESHEET_TAG = b'<link rel="stylesheet" href="overlay.css">'
 
 class MusicHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 enables persistent connections; every response must be framed
+    # with Content-Length so the client knows where it ends.
+    protocol_version = 'HTTP/1.1'
+    # Socket timeout applied by StreamRequestHandler; an idle keep-alive
+    # connection is closed once it expires.
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body go out in separate writes; with Nagle on, the body of
+    # a second response on a kept-alive connection waits for a delayed ACK.
+    disable_nagle_algorithm = True
+
     # Class variables to be configured before starting the server
     apple_music_provider = None
     artwork_manager = None
+    track_state = None
+    # Background TrackPoller, if running; /nowplaying reuses its results
+    track_poller = None
+    play_history = None
+    metrics = None
+    profiler = None
+    # Remote sessions pushed to /ingest/<session> (SessionRegistry), if enabled
+    session_registry = None
+    # Per-client rate and concurrency limits (RequestLimiter), if enabled
+    request_limiter = None
+    # Seconds a /nowplaying poll may wait for the provider before it's dropped
+    request_deadline = None
+    # Inline overlay.css into overlay.html (server setting, ?inline_css= overrides)
+    inline_css = False
+    # In-memory single-file overlay (OverlayBundle), served at /bundle
+    overlay_bundle = None
+    # Serve the bundle for '/' and overlay.html too
+    serve_bundle = False
     root_dir = None
+    # Servable files under root_dir (StaticFileIndex), built at startup
+    static_files = None
+    # Startup bookkeeping reported by /healthz
+    started_at = None
+    warmed_up = False
+
+    def setup(self):
+        super().setup()
+        self.requests_on_connection = 0
+        self.response_status = None
+        self._holding_slot = False
+
+    def send_response(self, code, message=None):
+        # Remember the status so do_GET can record it in the metrics
+        self.response_status = code
+        super().send_response(code, message)
 
     def log_message(self, format, *args):
         # Print to stdout instead of stderr for better visibility
         print(f"{self.address_string()} - - [{self.log_date_time_string()}] {format % args}")
+
+    def end_headers(self):
+        """Add keep-alive bookkeeping headers before finishing the header block."""
+        self.requests_on_connection += 1
+        if self.requests_on_connection >= KEEPALIVE_MAX_REQUESTS:
+            # send_header marks the connection for closing as well
+            self.send_header('Connection', 'close')
+        elif not self.close_connection:
+            remaining = KEEPALIVE_MAX_REQUESTS - self.requests_on_connection
+            self.send_header('Keep-Alive', f'timeout={KEEPALIVE_TIMEOUT}, max={remaining}')
+        super().end_headers()
+
+    def _send_body(self, status, body, content_type='text/plain', headers=None):
+        """Send a complete in-memory response with a correct Content-Length."""
+        if isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _render_overlay(self, content, base_dir, query):
+        """Fill overlay.html in so the first frame needs no extra round trip.
+
+        Embeds the current TrackState snapshot as inline JSON that overlay.js
+        renders before its first /nowplaying fetch, and optionally replaces
+        the stylesheet link with the stylesheet itself.
+        """
+        snapshot = self.track_state.get()[0] if self.track_state else None
+        if 'session' in query:
+            # An overlay for a remote session shows that session's track
+            session = self.session_registry.get(query['session'][0]) if self.session_registry else None
+            snapshot = session.track_state.get()[0] if session else None
+        if snapshot is not None:
+            # Escape '<' so track names can't close the script element
+            state_json = json.dumps(snapshot).replace('<', '\\u003c')
+            tag = f'<script id="initialState" type="application/json">{state_json}</script>\n    '
+            anchor = OVERLAY_SCRIPT_TAG if OVERLAY_SCRIPT_TAG in content else BUNDLE_SCRIPT_TAG.encode()
+            content = content.replace(anchor, tag.encode() + anchor, 1)
+
+        inline_css = self.inline_css
+        if 'inline_css' in query:
+            inline_css = query['inline_css'][0] not in ('0', 'false')
+        if inline_css:
+            try:
+                with open(os.path.join(base_dir, 'overlay.css'), 'rb') as f:
+                    css = f.read()
+                content = content.replace(OVERLAY_STYLESHEET_TAG, b'<style>\n' + css + b'\n</style>', 1)
+            except OSError as e:
+                print(f"Could not inline overlay.css: {e}")
+        return content
+
+    def _parse_range(self, range_header, size):
+        """Parse a single-range 'Range: bytes=...' header.
+
+        Returns (start, end) inclusive for a satisfiable range, None if the
+        range can't be satisfied, or (0, size - 1) when the header is
+        malformed or asks for multiple ranges (which we simply ignore).
+        """
+        full = (0, size - 1)
+        units, _, spec = range_header.partition('=')
+        if units.strip().lower() != 'bytes' or ',' in spec:
+            return full
+
+        start_str, sep, end_str = spec.strip().partition('-')
+        if not sep:
+            return full
+        try:
+            if start_str == '':
+                # Suffix range: the last N bytes
+                suffix = int(end_str)
+                if suffix <= 0:
+                    return None
+                return (max(0, size - suffix), size - 1)
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        except ValueError:
+            return full
+
+        if start >= size or end < start:
+            return None
+        return (start, min(end, size - 1))
+
+    def _not_modified_since(self, mtime):
+        """Return True if the client's If-Modified-Since covers mtime."""
+        ims = self.headers.get('If-Modified-Since')
+        if not ims:
+            return False
+        try:
+            ims_time = email.utils.parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+        return int(mtime) <= ims_time
+
+    def _copy_file(self, f, offset, count):
+        """Write count bytes of f starting at offset to the client.
+
+        Uses socket.sendfile (zero-copy os.sendfile where the platform has
+        it) and falls back to streaming fixed-size chunks otherwise, so the
+        memory used per request doesn't grow with the file size.
+        """
+        sendfile = getattr(self.connection, 'sendfile', None)
+        if sendfile is not None:
+            sendfile(f, offset, count)
+            return
+
+        f.seek(offset)
+        remaining = count
+        while remaining > 0:
+            chunk = f.read(min(FILE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
+
+    def _send_file(self, f, content_type, cache_control):
+        """Send an already opened binary file as the response.
+
+        Always sets Content-Length, answers If-Modified-Since with 304 and
+        supports single byte ranges (206 / 416).
+        """
+        fs = os.fstat(f.fileno())
+        size = fs.st_size
+        last_modified = self.date_time_string(int(fs.st_mtime))
+        range_header = self.headers.get('Range')
+
+        if not range_header and self._not_modified_since(fs.st_mtime):
+            self.send_response(304)
+            self.send_header('Last-Modified', last_modified)
+            self.send_header('Cache-Control', cache_control)
+            self.end_headers()
+            return
+
+        start, end = 0, size - 1
+        status = 200
+        if range_header and size > 0:
+            byte_range = self._parse_range(range_header, size)
+            if byte_range is None:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            start, end = byte_range
+            if (start, end) != (0, size - 1):
+                status = 206
+        length = max(0, end - start + 1)
+
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(length))
+        self.send_header('Last-Modified', last_modified)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Cache-Control', cache_control)
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+
+        if length > 0:
+            self._copy_file(f, start, length)
     
     def do_GET(self):
+        self._handle_timed(self._handle_get)
+
+    def do_POST(self):
+        self._handle_timed(self._handle_post)
+
+    def _handle_timed(self, handle):
+        """Run a request handler, recording its route, status and latency."""
+        started = time.perf_counter()
+        # Arrival time, for the provider's deadline and reuse of fresh results
+        self.received_at = time.time()
+        self.received_monotonic = time.monotonic()
+        self.response_status = None
+        try:
+            if not self._admit():
+                return
+            if self.profiler is not None:
+                with self.profiler.capture():
+                    handle()
+            else:
+                handle()
+        finally:
+            self._release_slot()
+            duration = time.perf_counter() - started
+            path = urlparse(self.path).path
+            route = route_label(path)
+            if self.metrics is not None:
+                self.metrics.record_request(route, self.response_status, duration)
+            if self.profiler is not None:
+                self.profiler.record_request(route, path, self.response_status, duration)
+
+    def _admit(self):
+        """Apply the request limiter. Sends the rejection and returns False if refused."""
+        limiter = self.request_limiter
+        if limiter is None or urlparse(self.path).path == '/healthz':
+            return True
+        verdict = limiter.admit(self.client_address[0], self.headers.get('Referer'))
+        if verdict is None:
+            self._holding_slot = True
+            return True
+
+        status, retry_after = verdict
+        if self.metrics is not None:
+            self.metrics.increment("rejected_rate_limited" if status == 429 else "rejected_overloaded")
+        if self.command == 'POST':
+            # The body is left unread, so the connection can't be reused
+            self.close_connection = True
+        self._send_body(status, b'Too Many Requests' if status == 429 else b'Server busy', headers={
+            'Retry-After': str(retry_after),
+            'Cache-Control': 'no-store',
+        })
+        return False
+
+    def _release_slot(self):
+        """Stop counting this request against the concurrency limit.
+
+        Called when it finishes, and before a long poll starts waiting.
+        """
+        if self._holding_slot:
+            self._holding_slot = False
+            self.request_limiter.release()
+
+    # Exact-path GET routes; anything else is tried against PREFIX_ROUTES,
+    # then the static file index
+    ROUTES = {
+        '/nowplaying': '_get_nowplaying',
+        '/healthz': '_get_healthz',
+        '/history': '_get_history',
+        '/debug/profile': '_get_profile',
+        '/artwork': '_get_artwork',
+    }
+    PREFIX_ROUTES = (
+        ('/s/', '_handle_session_get'),
+    )
+
+    @classmethod
+    def _static_index(cls):
+        """The StaticFileIndex, built here if the runner didn't configure one."""
+        if cls.static_files is None:
+            root_dir = cls.root_dir
+            if not root_dir:
+                from jamdeck import get_resources_dir
+                root_dir = cls.root_dir = get_resources_dir()
+            index = StaticFileIndex(root_dir)
+            index.build()
+            cls.static_files = index
+        return cls.static_files
+
+    def _handle_get(self):
         # Parse the URL
         parsed_path = urlparse(self.path)
         path = parsed_path.path
         print(f"Request received: {path}")
-        
-        # Use configured root_dir or calculate using get_resources_dir
-        base_dir = self.root_dir
-        if not base_dir:
-            from jamdeck import get_resources_dir
-            base_dir = get_resources_dir()
-        
-        # Serve static files (HTML, CSS, JS)
-        if path == '/' or path.endswith('.html') or path.endswith('.css') or path.endswith('.js'):
-            # Use os.path.basename to strip directory components, preventing path traversal
-            if path == '/':
-                safe_name = 'overlay.html'
-            else:
-                safe_name = os.path.basename(path)
-            file_path = os.path.join(base_dir, safe_name)
-            
-            # Prevent path traversal attacks
-            real_base_dir = os.path.realpath(base_dir)
-            real_file_path = os.path.realpath(file_path)
-            if not real_file_path.startswith(real_base_dir + os.sep) and real_file_path != real_base_dir:
-                self.send_response(403)
-                self.send_header('Content-type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(b'Forbidden')
-                return
-            
-            # Add debugging for file resolution
-            print(f"Static file requested: {path}")
-            print(f"Resolving to path: {real_file_path}")
-            print(f"File exists: {os.path.exists(real_file_path)}")
-            
+
+        # Single-file overlay, served from memory
+        bundle = self.overlay_bundle
+        if bundle is not None and bundle.content is not None and (
+                path == '/bundle' or (self.serve_bundle and path in ('/', '/overlay.html'))):
+            content = self._render_overlay(bundle.content, self._static_index().root_dir,
+                                           parse_qs(parsed_path.query))
+            self._send_body(200, content, 'text/html', {
+                'Cache-Control': 'no-cache, must-revalidate',
+            })
+            return
+
+        route = self.ROUTES.get(path)
+        if route is None:
+            for prefix, handler in self.PREFIX_ROUTES:
+                if path.startswith(prefix):
+                    route = handler
+                    break
+        if route is not None:
+            getattr(self, route)(path, parsed_path.query)
+            return
+
+        entry = self._static_index().lookup(path)
+        if entry is not None:
+            self._serve_static(entry, path, parsed_path.query)
+        else:
+            print(f"404 Not Found: {path}")
+            self._send_body(404, b"404 Not Found")
+
+    def _serve_static(self, entry, path, query):
+        """Serve a file from the static index with its MIME type and cache policy."""
+        print(f"Serving {path} from {entry.path}")
+        if entry.kind == 'text':
             try:
-                with open(real_file_path, 'rb') as f:
+                with open(entry.path, 'rb') as f:
                     content = f.read()
-                
-                self.send_response(200)
-                # Set correct content type based on file extension
-                if path.endswith('.html'):
-                    content_type = 'text/html'
-                elif path.endswith('.css'):
-                    content_type = 'text/css'
-                elif path.endswith('.js'):
-                    content_type = 'text/javascript'
-                else:
-                    content_type = 'text/html'  # default for '/' path
-                
-                content_length = len(content)
-                print(f"Serving {path} ({content_length} bytes) as {content_type}")
-                
-                self.send_header('Content-type', content_type)
-                self.send_header('Content-Length', str(content_length))
-                self.send_header('Cache-Control', 'no-cache, must-revalidate')
-                self.end_headers()
-                self.wfile.write(content)
-                return
             except FileNotFoundError:
-                print(f"ERROR: File not found: {file_path}")
-                self.send_response(404)
-                self.send_header('Content-type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(b'File not found')
+                print(f"ERROR: File not found: {entry.path}")
+                self._send_body(404, b'File not found')
                 return
             except Exception as e:
                 print(f"ERROR serving {path}: {str(e)}")
-                self.send_response(500)
-                self.send_header('Content-type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(f"Error: {str(e)}".encode())
+                self._send_body(500, f"Error: {str(e)}")
                 return
-        
-        # Route requests
-        if path == '/nowplaying':
-            print("Handling /nowplaying request")
-            if self.apple_music_provider:
-                music_data = self.apple_music_provider.get_apple_music_track()
-            else:
-                music_data = '{"playing": false, "error": "Apple Music provider not configured"}'
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET')
-            self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
-            self.end_headers()
-            
-            # Debug the output we're sending
-            print(f"Sending JSON response: {music_data}")
-            
-            # Always ensure we send valid JSON
-            self.wfile.write(music_data.encode())
-            
-        elif path == '/artwork' or path.startswith('/artwork?'):
-            # Fixed path to the artwork file
-            artwork_path = self.artwork_manager.artwork_path if self.artwork_manager else "/tmp/harmony_deck_cover.jpg"
-            print(f"Serving artwork from: {artwork_path}")
-            
+            if entry.path.endswith(os.sep + 'overlay.html'):
+                content = self._render_overlay(content, self._static_index().root_dir, parse_qs(query))
+            self._send_body(200, content, entry.content_type, {
+                'Cache-Control': entry.cache_control,
+            })
+            return
+
+        try:
+            f = open(entry.path, 'rb')
+        except OSError as e:
+            print(f"Error serving {path}: {e}")
+            self._send_body(404, f'File not found: {str(e)}')
+            return
+        cache_control = entry.cache_control
+        if entry.kind == 'font' and 'v=' in query:
+            # Content-hashed URL from the overlay bundle: never changes
+            cache_control = 'public, max-age=31536000, immutable'
+        with f:
+            self._send_file(f, entry.content_type, cache_control)
+
+    def _get_nowplaying(self, path, query_string):
+        print("Handling /nowplaying request")
+        query = parse_qs(query_string)
+        if 'since' in query and self.track_state is not None:
+            # Long poll: answer when the track changes (used by relays)
             try:
-                # Read the file
-                with open(artwork_path, 'rb') as f:
-                    file_data = f.read()
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'image/jpeg')
-                self.send_header('Cache-Control', 'no-cache')  # Prevent caching
-                self.end_headers()
-                self.wfile.write(file_data)
-                print("Artwork served successfully")
-                
-            except Exception as e:
-                print(f"Error serving artwork: {e}")
-                self.send_response(404)
-                self.send_header('Content-type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(b'Artwork not found')
-                
-        elif path.startswith('/assets/fonts/'):
-            # Extract the filename from the path
-            font_file = path.split('/')[-1]
-            font_path = os.path.join(base_dir, 'assets', 'fonts', font_file)
-            
-            # Prevent path traversal attacks
-            base_fonts_dir = os.path.realpath(os.path.join(base_dir, 'assets', 'fonts'))
-            real_font_path = os.path.realpath(font_path)
-            if not real_font_path.startswith(base_fonts_dir + os.sep):
-                self.send_response(403)
-                self.send_header('Content-type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(b'Forbidden')
+                since, wait = self._long_poll_args(query)
+            except ValueError:
+                self._send_body(400, b'since and wait must be numbers')
                 return
-            
-            print(f"Serving font file: {real_font_path}")
-            
+            self._release_slot()
+            self._send_track(*self.track_state.wait_for_change(since, wait))
+            return
+        snapshot = self._recent_snapshot()
+        if snapshot is not None:
+            music_data = json.dumps(snapshot)
+        elif self.apple_music_provider:
+            deadline = self.received_monotonic + self.request_deadline if self.request_deadline else None
             try:
-                # Open in binary mode for font files
-                with open(real_font_path, 'rb') as f:
-                    file_data = f.read()
-                
-                self.send_response(200)
-                # Set the correct MIME type for TTF fonts
-                self.send_header('Content-type', 'font/ttf')
-                # Allow caching for fonts (unlike dynamic content)
-                self.send_header('Cache-Control', 'max-age=86400')  # Cache for 24 hours
-                self.end_headers()
-                self.wfile.write(file_data)
-                print(f"Font file '{font_file}' served successfully")
-                
-            except Exception as e:
-                print(f"Error serving font file: {e}")
-                self.send_response(404)
-                self.send_header('Content-type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(f'Font file not found: {str(e)}'.encode())
-                
-        elif path.startswith('/assets/images/'):
-            # Extract the filename from the path
-            image_file = path.split('/')[-1]
-            image_path = os.path.join(base_dir, 'assets', 'images', image_file)
-            
-            # Prevent path traversal attacks
-            base_images_dir = os.path.realpath(os.path.join(base_dir, 'assets', 'images'))
-            real_image_path = os.path.realpath(image_path)
-            if not real_image_path.startswith(base_images_dir + os.sep):
-                self.send_response(403)
-                self.send_header('Content-type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(b'Forbidden')
+                music_data = self.apple_music_provider.get_apple_music_track(
+                    received_at=self.received_at, deadline=deadline)
+            except ProviderBusy:
+                # Stale by now; the overlay's next poll gets a fresh answer
+                self._send_body(503, b'Provider busy', headers={
+                    'Retry-After': '1',
+                    'Cache-Control': 'no-store',
+                })
                 return
-            
-            print(f"Serving image file: {real_image_path}")
-            
-            try:
-                # Open in binary mode for image files
-                with open(real_image_path, 'rb') as f:
-                    file_data = f.read()
-                
-                self.send_response(200)
-                # Set content type based on file extension
-                if image_file.lower().endswith('.png'):
-                    content_type = 'image/png'
-                elif image_file.lower().endswith(('.jpg', '.jpeg')):
-                    content_type = 'image/jpeg'
-                elif image_file.lower().endswith('.gif'):
-                    content_type = 'image/gif'
-                elif image_file.lower().endswith('.svg'):
-                    content_type = 'image/svg+xml'
-                else:
-                    content_type = 'application/octet-stream'
-                
-                self.send_header('Content-type', content_type)
-                self.send_header('Cache-Control', 'max-age=86400')  # Cache for 24 hours
-                self.end_headers()
-                self.wfile.write(file_data)
-                print(f"Image file '{image_file}' served successfully")
-                
-            except Exception as e:
-                print(f"Error serving image file: {e}")
-                self.send_response(404)
-                self.send_header('Content-type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(f'Image file not found: {str(e)}'.encode())
-                
         else:
-            print(f"404 Not Found: {path}")
-            self.send_response(404)
-            self.send_header('Content-type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(b"404 Not Found")
+            music_data = '{"playing": false, "error": "Apple Music provider not configured"}'
+
+        # Debug the output we're sending
+        print(f"Sending JSON response: {music_data}")
+
+        # Always ensure we send valid JSON
+        self._send_body(200, music_data, 'application/json', {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'GET',
+            'Cache-Control': 'no-store, no-cache, must-revalidate',
+        })
+
+    def _recent_snapshot(self):
+        """A TrackState snapshot that can answer /nowplaying without a query, or None."""
+        if self.track_state is None:
+            return None
+        if self.track_poller is not None:
+            # The poller queried Music moments ago; another query would
+            # return the same thing
+            snapshot = self.track_state.fresh(self.track_poller.max_age)
+            if snapshot is not None:
+                if self.metrics is not None:
+                    self.metrics.increment("nowplaying_from_state")
+                return snapshot
+        if not self.warmed_up:
+            snapshot = self.track_state.get()[0]
+            if snapshot is not None and snapshot.get("stale"):
+                # Restored from the last run; answer now rather than wait
+                # for the first query, which is still running
+                return snapshot
+        return None
+
+    def _get_healthz(self, path, query_string):
+        # Readiness probe: answering at all means the server is serving
+        uptime = time.time() - self.started_at if self.started_at else 0
+        health = {"status": "ok", "warm": self.warmed_up, "uptime": round(uptime, 3)}
+        self._send_body(200, json.dumps(health), 'application/json', {
+            'Cache-Control': 'no-store',
+        })
+
+    def _get_history(self, path, query_string):
+        if self.play_history is None:
+            self._send_body(404, b"404 Not Found")
+            return
+        query = parse_qs(query_string)
+        try:
+            limit = int(query.get('limit', [DEFAULT_HISTORY_PAGE_SIZE])[0])
+            before = int(query['before'][0]) if 'before' in query else None
+        except ValueError:
+            self._send_body(400, b'limit and before must be integers')
+            return
+        page = self.play_history.page(limit, before)
+        self._send_body(200, json.dumps(page), 'application/json', {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'GET',
+            'Cache-Control': 'no-store',
+        })
+
+    def _get_profile(self, path, query_string):
+        # Profiling controls are only for the streaming machine itself
+        if self.profiler is None or self.client_address[0] not in ('127.0.0.1', '::1'):
+            self._send_body(404, b"404 Not Found")
+            return
+        query = parse_qs(query_string)
+        action = query.get('action', ['status'])[0]
+        try:
+            if action == 'start':
+                duration = query.get('duration')
+                result = self.profiler.start(duration[0]) if duration else self.profiler.start()
+            elif action == 'stop':
+                result = self.profiler.stop()
+            elif action == 'status':
+                result = self.profiler.status()
+            else:
+                self._send_body(400, b'action must be start, stop or status')
+                return
+        except ValueError:
+            self._send_body(400, b'duration must be a number')
+            return
+        self._send_body(200, json.dumps(result), 'application/json', {
+            'Cache-Control': 'no-store',
+        })
+
+    def _get_artwork(self, path, query_string):
+        # Fixed path to the artwork file
+        artwork_path = self.artwork_manager.artwork_path if self.artwork_manager else "/tmp/harmony_deck_cover.jpg"
+        print(f"Serving artwork from: {artwork_path}")
+
+        try:
+            f = open(artwork_path, 'rb')
+        except OSError as e:
+            print(f"Error serving artwork: {e}")
+            self._send_body(404, b'Artwork not found')
+            return
+
+        with f:
+            # no-cache still lets the browser revalidate with If-Modified-Since
+            self._send_file(f, 'image/jpeg', 'no-cache')
+        print("Artwork served successfully")
+
+    def _handle_session_get(self, path, query_string):
+        """Serve /s/<session>/nowplaying and /s/<session>/artwork."""
+        query = parse_qs(query_string)
+        parts = path.split('/')
+        if self.session_registry is None or len(parts) != 4 or parts[3] not in ('nowplaying', 'artwork'):
+            self._send_body(404, b"404 Not Found")
+            return
+        session = self.session_registry.get(parts[2])
+
+        if parts[3] == 'artwork':
+            artwork = session.artwork if session else None
+            if artwork is None:
+                self._send_body(404, b'Artwork not found')
+                return
+            body, content_type = artwork
+            # ?t= is a hash of the image, so a cached copy is never a different cover
+            self._send_body(200, body, content_type, {'Cache-Control': 'max-age=86400'})
+            return
+
+        try:
+            since, wait = self._long_poll_args(query)
+        except ValueError:
+            self._send_body(400, b'since and wait must be numbers')
+            return
+        if session is None:
+            snapshot, version = None, 0
+        elif since is not None:
+            self._release_slot()
+            snapshot, version = session.wait_for_change(since, wait)
+        else:
+            snapshot, version = session.track_state.get()
+        self._send_track(snapshot, version)
+
+    @staticmethod
+    def _long_poll_args(query):
+        """Read ?since=<version>&wait=<seconds>; since is None without it.
+
+        A request with since is held until the track version differs
+        from it (long polling), for at most MAX_WAIT seconds.
+        Raises ValueError for non-numeric values.
+        """
+        since = int(query['since'][0]) if 'since' in query else None
+        wait = min(max(0.0, float(query.get('wait', [MAX_WAIT])[0])), MAX_WAIT)
+        return since, wait
+
+    def _send_track(self, snapshot, version):
+        """Send a TrackState snapshot as /nowplaying JSON, with its version."""
+        data = dict(snapshot) if snapshot else {"playing": False}
+        data["version"] = version
+        self._send_body(200, json.dumps(data), 'application/json', {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'GET',
+            'Cache-Control': 'no-store, no-cache, must-revalidate',
+        })
+
+    def _handle_post(self):
+        """Remote ingestion: POST /ingest/<session> and /ingest/<session>/artwork."""
+        path = urlparse(self.path).path
+        parts = path.split('/')
+        registry = self.session_registry
+        if registry is None or parts[1:2] != ['ingest'] or len(parts) not in (3, 4) or (
+                len(parts) == 4 and parts[3] != 'artwork'):
+            # The body is left unread, so the connection can't be reused
+            self.close_connection = True
+            self._send_body(404, b"404 Not Found")
+            return
+        if not registry.authorized(self.headers.get('Authorization')):
+            self.close_connection = True
+            self._send_body(401, b'Unauthorized', headers={'WWW-Authenticate': 'Bearer'})
+            return
+
+        is_artwork = len(parts) == 4
+        limit = MAX_ARTWORK_BYTES if is_artwork else MAX_INGEST_BODY
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self.close_connection = True
+            self._send_body(411, b'Content-Length required')
+            return
+        if length < 0 or length > limit:
+            self.close_connection = True
+            self._send_body(413, f'Body must be at most {limit} bytes')
+            return
+        body = self.rfile.read(length)
+
+        try:
+            if is_artwork:
+                version = registry.set_artwork(parts[2], body, self.headers.get('Content-Type'))
+            else:
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    raise SessionError(400, "Invalid JSON")
+                version = registry.ingest(parts[2], payload)
+        except SessionError as e:
+            self._send_body(e.status, str(e))
+            return
+        self._send_body(200, json.dumps({"version": version}), 'application/json', {
+            'Cache-Control': 'no-store',
+        })
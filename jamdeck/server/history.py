@@ -0,0 +1,160 @@
+# jamdeck/server/history.py
+import os
+import json
+import time
+import threading
+from collections import deque
+
+from jamdeck.server.matching import match_key
+
+HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".jamdeck_history.jsonl")
+DEFAULT_HISTORY_CAPACITY = 200
+DEFAULT_HISTORY_PAGE_SIZE = 20
+# Pausing and resuming the same song within this window continues its entry
+RESUME_WINDOW = 300  # seconds
+
+class PlayHistory:
+    """Fixed-size ring buffer of recently played tracks.
+
+    Registered as a TrackState listener, so the poller keeps it current
+    whether or not an overlay is open. Each entry records the track
+    identity, when it started and ended, and its artwork key (the
+    normalized key ArtworkManager caches iTunes lookups under).
+
+    Entries are appended to a JSON-lines file as they start and end; the
+    latest record for an id wins on load. Once the file holds a couple of
+    buffers' worth of records it is rewritten with just the live entries,
+    so both memory and disk use stay bounded on multi-day streams.
+    """
+
+    def __init__(self, capacity=DEFAULT_HISTORY_CAPACITY, path=HISTORY_FILE):
+        self.capacity = capacity
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=capacity)
+        self._current = None      # entry still playing, also in _entries
+        self._next_id = 1
+        self._records_written = 0  # records appended since the last compaction
+        if path:
+            self._load()
+
+    # --- Persistence ---
+
+    def _load(self):
+        try:
+            if not os.path.exists(self.path):
+                return
+            entries = {}
+            records = 0
+            with open(self.path, "r") as f:
+                for line in f:
+                    records += 1
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash; skip it
+                        continue
+                    if isinstance(entry, dict) and "id" in entry:
+                        entries[entry["id"]] = entry
+            # Anything still open was playing when we last stopped; the
+            # file's mtime is the best guess for when it ended.
+            stopped_at = os.path.getmtime(self.path)
+            for entry_id in sorted(entries)[-self.capacity:]:
+                entry = entries[entry_id]
+                if entry.get("endedAt") is None:
+                    entry["endedAt"] = stopped_at
+                self._entries.append(entry)
+            if entries:
+                self._next_id = max(entries) + 1
+            self._records_written = records
+            print(f"Loaded {len(self._entries)} history entries from {self.path}")
+        except Exception as e:
+            print(f"Warning: Could not load play history: {e}")
+
+    def _append(self, entry):
+        """Append one record to the history file, compacting when it grows."""
+        if not self.path:
+            return
+        try:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._records_written += 1
+            if self._records_written >= 2 * self.capacity:
+                self._compact()
+        except Exception as e:
+            print(f"Warning: Could not write play history: {e}")
+
+    def _compact(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for entry in self._entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, self.path)
+        self._records_written = len(self._entries)
+
+    # --- Updates ---
+
+    @staticmethod
+    def _identity(snapshot):
+        return (snapshot.get("title"), snapshot.get("artist"), snapshot.get("album"))
+
+    def on_track_change(self, topics, snapshot):
+        """TrackState listener: close the playing entry and open a new one."""
+        with self._lock:
+            now = time.time()
+            playing = bool(snapshot.get("playing") and snapshot.get("title"))
+            identity = self._identity(snapshot) if playing else None
+
+            current = self._current
+            if current is not None and (not playing or self._identity(current) != identity):
+                current["endedAt"] = now
+                self._current = None
+                self._append(current)
+
+            if not playing or self._current is not None:
+                return
+
+            last = self._entries[-1] if self._entries else None
+            if (last is not None and self._identity(last) == identity
+                    and now - last["endedAt"] < RESUME_WINDOW):
+                # Paused and resumed: keep it as one play
+                last["endedAt"] = None
+                self._current = last
+            else:
+                title, artist, album = identity
+                self._current = {
+                    "id": self._next_id,
+                    "title": title,
+                    "artist": artist,
+                    "album": album,
+                    "artworkKey": match_key(artist, title),
+                    "startedAt": now,
+                    "endedAt": None,
+                }
+                self._next_id += 1
+                self._entries.append(self._current)
+            self._append(self._current)
+
+    # --- Queries ---
+
+    def page(self, limit=DEFAULT_HISTORY_PAGE_SIZE, before=None):
+        """Return a page of entries, newest first.
+
+        before is the id to continue from (the "next" value of the previous
+        page). The currently playing track is included with endedAt null.
+        """
+        limit = max(1, min(int(limit), self.capacity))
+        with self._lock:
+            entries = [dict(e) for e in reversed(self._entries)
+                       if before is None or e["id"] < before]
+        items = entries[:limit]
+        next_before = items[-1]["id"] if len(entries) > limit else None
+        return {"items": items, "next": next_before}
+
+    def close(self):
+        """Record the playing entry's end time (called on shutdown)."""
+        with self._lock:
+            if self._current is not None:
+                self._current["endedAt"] = time.time()
+                self._append(self._current)
+                self._current = None
@@ -0,0 +1,209 @@
+# jamdeck/server/itunes.py
+import json
+import time
+import heapq
+import threading
+import subprocess
+from urllib.parse import quote_plus
+
+ITUNES_SEARCH_URL = "https://itunes.apple.com/search"
+
+# Apple documents roughly 20 Search API calls per minute per IP
+DEFAULT_RATE = 20 / 60.0   # tokens per second
+DEFAULT_BURST = 5          # tokens the bucket can hold
+# Backoff after a 403/429, doubled on each repeat, reset by a success
+THROTTLE_BACKOFF = 30.0    # seconds
+THROTTLE_BACKOFF_MAX = 600.0
+# How long a caller waits for its result by default
+DEFAULT_WAIT = 5.0         # seconds
+
+PRIORITY_CURRENT = 0       # artwork for the track playing right now
+PRIORITY_PREFETCH = 10     # prefetch / enrichment that can wait
+
+class ITunesUnavailable(Exception):
+    """The search couldn't be made (throttled, timed out or network error).
+
+    Distinct from "no results" so callers don't cache it as a miss.
+    """
+
+class TokenBucket:
+    """Classic token bucket; not thread-safe on its own."""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self):
+        """Take a token if one is available. Returns seconds to wait otherwise (0 = taken)."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def drain(self):
+        self._refill()
+        self.tokens = 0
+
+class _SearchRequest:
+    def __init__(self, key, url, priority):
+        self.key = key
+        self.url = url
+        self.priority = priority
+        self.waiters = 0
+        self.cancelled = False
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class ITunesScheduler:
+    """Single place every iTunes Search API call goes through.
+
+    - A token bucket spaces calls to stay under Apple's rate limit.
+    - Pending searches are run highest priority first, so the current
+      track's artwork isn't stuck behind prefetch work.
+    - Identical searches already queued or in flight are shared.
+    - A 403/429 answer pauses all searches with exponential backoff.
+
+    Calls run on one worker thread, which also keeps them sequential.
+    """
+
+    def __init__(self, base_url=ITUNES_SEARCH_URL, rate=DEFAULT_RATE, burst=DEFAULT_BURST, fetch=None):
+        self.base_url = base_url
+        self.bucket = TokenBucket(rate, burst)
+        # fetch(url) -> (status, body); replaceable for testing
+        self.fetch = fetch or self._curl_fetch
+        self._cond = threading.Condition()
+        self._queue = []      # heap of (priority, seq, request)
+        self._pending = {}    # key -> request, queued or in flight
+        self._seq = 0
+        self._backoff = THROTTLE_BACKOFF
+        self.paused_until = 0
+        self.stats = {"requests": 0, "deduplicated": 0, "throttled": 0, "cancelled": 0}
+        self._thread = None
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="jamdeck-itunes", daemon=True)
+            self._thread.start()
+
+    def search(self, term, entity="song", limit=1, priority=PRIORITY_CURRENT, wait=DEFAULT_WAIT):
+        """Run a search and return the parsed JSON.
+
+        Raises ITunesUnavailable if no answer arrives within wait seconds
+        (for example while backing off after being throttled).
+        """
+        query = f"term={quote_plus(term)}&media=music&entity={entity}&limit={limit}"
+        url = f"{self.base_url}?{query}"
+
+        with self._cond:
+            self._ensure_worker()
+            if self.paused_until - time.monotonic() >= wait:
+                # Backing off after being throttled; don't wait for nothing
+                raise ITunesUnavailable("iTunes search is paused after being throttled")
+            request = self._pending.get(url)
+            if request is not None:
+                self.stats["deduplicated"] += 1
+                if priority < request.priority:
+                    # Re-queue at the higher priority; the old heap entry is skipped
+                    request.priority = priority
+                    self._push(request)
+            else:
+                request = _SearchRequest(url, url, priority)
+                self._pending[url] = request
+                self._push(request)
+            request.waiters += 1
+
+        finished = request.done.wait(wait)
+
+        with self._cond:
+            request.waiters -= 1
+            if not finished:
+                if request.waiters == 0 and not request.done.is_set():
+                    # Nobody wants it any more; don't spend a token on it
+                    request.cancelled = True
+                    self._pending.pop(request.key, None)
+                    self.stats["cancelled"] += 1
+                raise ITunesUnavailable(f"iTunes search for '{term}' timed out")
+
+        if request.error:
+            raise ITunesUnavailable(request.error)
+        return request.result
+
+    def _push(self, request):
+        self._seq += 1
+        heapq.heappush(self._queue, (request.priority, self._seq, request))
+        self._cond.notify()
+
+    def _next_request(self):
+        """Block until a request may run, then return it."""
+        with self._cond:
+            while True:
+                while self._queue:
+                    priority, _, request = self._queue[0]
+                    if request.cancelled or request.done.is_set() or priority != request.priority:
+                        heapq.heappop(self._queue)
+                        continue
+                    break
+                if not self._queue:
+                    self._cond.wait()
+                    continue
+
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0:
+                    wait = self.bucket.try_take()
+                if wait <= 0:
+                    heapq.heappop(self._queue)
+                    return request
+                # A higher-priority arrival wakes us to re-check the head
+                self._cond.wait(wait)
+
+    def _run(self):
+        while True:
+            request = self._next_request()
+            try:
+                status, body = self.fetch(request.url)
+            except Exception as e:
+                status, body = None, str(e)
+
+            with self._cond:
+                self.stats["requests"] += 1
+                if status in (403, 429):
+                    self.stats["throttled"] += 1
+                    self.paused_until = time.monotonic() + self._backoff
+                    self.bucket.drain()
+                    print(f"iTunes search throttled ({status}), pausing for {self._backoff:.0f}s")
+                    self._backoff = min(self._backoff * 2, THROTTLE_BACKOFF_MAX)
+                    # Try again after the pause if anyone is still waiting
+                    self._push(request)
+                    continue
+
+                if status == 200:
+                    self._backoff = THROTTLE_BACKOFF
+                    try:
+                        request.result = json.loads(body)
+                    except ValueError:
+                        request.error = "Invalid JSON from iTunes search"
+                else:
+                    request.error = f"iTunes search failed ({status or body})"
+                self._pending.pop(request.key, None)
+                request.done.set()
+
+    @staticmethod
+    def _curl_fetch(url):
+        """GET url with curl (avoids SSL issues in py2app bundles)."""
+        result = subprocess.run(
+            ['curl', '-s', '--max-time', '3', '-w', '\n%{http_code}', url],
+            capture_output=True, text=True, timeout=5
+        )
+        if result.returncode != 0:
+            raise OSError(f"curl exited with {result.returncode}")
+        body, _, status = result.stdout.rpartition('\n')
+        return int(status), body
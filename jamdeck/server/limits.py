@@ -0,0 +1,104 @@
+# jamdeck/server/limits.py
+import math
+import threading
+from collections import OrderedDict
+
+from jamdeck.server.itunes import TokenBucket
+
+# Per-client request rate. An overlay polls every 3 seconds and loads a
+# handful of files per page load, so this only bites runaway clients.
+DEFAULT_CLIENT_RATE = 10.0   # requests per second
+DEFAULT_CLIENT_BURST = 30
+# Requests handled at once before new ones are shed (long polls excluded)
+DEFAULT_MAX_CONCURRENT = 32
+# Clients tracked at once; the least recently seen are forgotten first
+MAX_TRACKED_CLIENTS = 1024
+# Retry-After sent when shedding load
+OVERLOADED_RETRY_AFTER = 1  # seconds
+# Share of the machine's allowance one overlay page on it may use
+PAGE_SHARE = 0.5
+LOOPBACK_ADDRESSES = ("127.0.0.1", "::1", "::ffff:127.0.0.1")
+
+class RequestLimiter:
+    """Per-client token buckets plus a global limit on in-flight requests.
+
+    Every address gets one bucket, and that is the limit always enforced.
+    Every OBS browser source on the streaming machine shares the loopback
+    address, so requests from there are also charged to a bucket per
+    page (by Referer, which includes the ?scene=) holding PAGE_SHARE of
+    the allowance: one runaway scene can't use up what the others need.
+    The Referer is only ever an extra limit, so sending a different one
+    gets a client nothing.
+
+    admit() is called for every request before it is handled and returns
+    None, or (status, retry_after) for a request to reject: 429 when the
+    client is over its rate, 503 when the server already has
+    max_concurrent requests in flight. Admitted requests must be
+    released() when done.
+    """
+
+    def __init__(self, rate=DEFAULT_CLIENT_RATE, burst=DEFAULT_CLIENT_BURST, max_concurrent=DEFAULT_MAX_CONCURRENT):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self.in_flight = 0
+        self.stats = {"admitted": 0, "rate_limited": 0, "overloaded": 0}
+        self.configure(rate, burst, max_concurrent)
+
+    def configure(self, rate, burst, max_concurrent):
+        """Apply new limits. Raises ValueError unless all are positive."""
+        rate, burst, max_concurrent = float(rate), int(burst), int(max_concurrent)
+        if rate <= 0 or burst < 1 or max_concurrent < 1:
+            raise ValueError("client_rate, client_burst and max_concurrent_requests must be positive")
+        with self._lock:
+            self.rate = rate
+            self.burst = burst
+            self.max_concurrent = max_concurrent
+            self._buckets.clear()
+
+    def _bucket(self, key, rate, burst):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, burst)
+            self._buckets[key] = bucket
+            if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def admit(self, address, referer=None):
+        with self._lock:
+            buckets = [self._bucket(address, self.rate, self.burst)]
+            if referer and address in LOOPBACK_ADDRESSES:
+                buckets.append(self._bucket((address, referer), self.rate * PAGE_SHARE,
+                                            max(1, int(self.burst * PAGE_SHARE))))
+
+            taken = []
+            for bucket in buckets:
+                wait = bucket.try_take()
+                if wait > 0:
+                    self._refund(taken)
+                    self.stats["rate_limited"] += 1
+                    return 429, max(1, math.ceil(wait))
+                taken.append(bucket)
+            if self.in_flight >= self.max_concurrent:
+                # Give the tokens back; this request wasn't the client's fault
+                self._refund(taken)
+                self.stats["overloaded"] += 1
+                return 503, OVERLOADED_RETRY_AFTER
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            return None
+
+    @staticmethod
+    def _refund(buckets):
+        for bucket in buckets:
+            bucket.tokens = min(bucket.capacity, bucket.tokens + 1)
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, in_flight=self.in_flight, clients=len(self._buckets))
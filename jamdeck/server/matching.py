@@ -0,0 +1,134 @@
+# jamdeck/server/matching.py
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+# Bracketed or dash-suffixed tags that name a version of a song rather than
+# the song itself: "(Remastered 2011)", "[Live]", "- feat. X", "- Radio Edit"
+VERSION_WORDS = (
+    r"feat\.?|ft\.?|featuring|with|remaster(?:ed)?|live|version|edit|mono|stereo|"
+    r"deluxe|bonus|demo|acoustic|explicit|clean|single|anniversary|expanded|mix"
+)
+BRACKET_TAG_RE = re.compile(r"\s*[(\[][^()\[\]]*\b(?:" + VERSION_WORDS + r")\b[^()\[\]]*[)\]]", re.I)
+DASH_TAG_RE = re.compile(r"\s+-\s+[^-]*\b(?:" + VERSION_WORDS + r")\b.*$", re.I)
+FEAT_RE = re.compile(r"\s+(?:feat\.?|ft\.?|featuring)\s+.*$", re.I)
+# Separators between a primary artist and the rest of the credit. They
+# also occur inside real names ("AC/DC", "Simon & Garfunkel", "Lil Nas X"),
+# so splitting on them is only ever tried as an alternative when scoring.
+ARTIST_SPLIT_RE = re.compile(r"\s*(?:,|&|\band\b|\bx\b|\bvs\.?\b|/)\s*", re.I)
+
+# Weights for scoring candidates; renormalized when album is unknown
+TITLE_WEIGHT = 0.5
+ARTIST_WEIGHT = 0.35
+ALBUM_WEIGHT = 0.15
+# Candidates scoring below this are treated as no match
+MIN_MATCH_SCORE = 0.6
+# Artist similarity reached only through a primary-artist reduction counts
+# for a little less than a match on the full credit
+PRIMARY_ARTIST_FACTOR = 0.9
+
+def _fold(text):
+    """Lowercase, drop accents, censoring and punctuation, collapse spaces."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = text.casefold().replace("&", " and ")
+    # "F**k" -> "fk": censoring stars never appear in catalogue titles
+    text = text.replace("*", "")
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+def normalize_title(title):
+    """'Song (Remastered 2011)' / 'Song - feat. X' / 'Song' -> 'song'."""
+    title = title or ""
+    stripped = BRACKET_TAG_RE.sub("", title)
+    stripped = DASH_TAG_RE.sub("", stripped)
+    stripped = FEAT_RE.sub("", stripped)
+    # Don't strip a title down to nothing (e.g. a song called "Live")
+    return _fold(stripped) or _fold(title)
+
+def normalize_artist(artist):
+    """Fold an artist credit and drop featured artists.
+
+    'A feat. B' -> 'a', 'Simon & Garfunkel' -> 'simon and garfunkel'.
+    The rest of the credit is kept: used for search terms and cache keys.
+    """
+    artist = artist or ""
+    return _fold(FEAT_RE.sub("", artist)) or _fold(artist)
+
+def primary_artist(artist):
+    """Guess the first artist of a shared credit: 'A & B' / 'A, B' / 'A x B' -> 'a'.
+
+    Wrong for names containing a separator, so only used as a scoring
+    alternative, never as a key.
+    """
+    artist = FEAT_RE.sub("", artist or "")
+    return _fold(ARTIST_SPLIT_RE.split(artist, maxsplit=1)[0]) or normalize_artist(artist)
+
+def artist_similarity(artist, candidate_artist):
+    """0..1 similarity of two artist credits.
+
+    Compares the full credits, and also each against the other's primary
+    artist, so 'A & B' still matches a catalogue entry credited to 'A'.
+    """
+    full, candidate_full = normalize_artist(artist), normalize_artist(candidate_artist)
+    best = similarity(full, candidate_full)
+    if best < 1.0:
+        alternative = max(similarity(primary_artist(artist), candidate_full),
+                          similarity(full, primary_artist(candidate_artist)))
+        best = max(best, PRIMARY_ARTIST_FACTOR * alternative)
+    return best
+
+def normalize_album(album):
+    album = BRACKET_TAG_RE.sub("", album or "")
+    album = DASH_TAG_RE.sub("", album)
+    return _fold(album)
+
+def match_key(artist, title):
+    """Cache key shared by every version of the same song."""
+    return f"{normalize_artist(artist)} - {normalize_title(title)}"
+
+def album_key(artist, album):
+    """Key shared by every edition of the same album."""
+    return f"{normalize_artist(artist)} - {normalize_album(album)}"
+
+def similarity(a, b):
+    """0..1 similarity of two already normalized strings."""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    # Containment covers "song" vs "song part 1" style differences
+    if a in b or b in a:
+        return 0.9 * min(len(a), len(b)) / max(len(a), len(b)) + 0.1
+    return SequenceMatcher(None, a, b).ratio()
+
+def score_candidate(candidate, artist, title=None, album=None):
+    """Score an iTunes search result against what Music reported.
+
+    title may be None for album-level lookups.
+    """
+    parts = [(ARTIST_WEIGHT, artist_similarity(artist, candidate.get("artistName")))]
+    if title:
+        parts.append((TITLE_WEIGHT, similarity(normalize_title(title),
+                                               normalize_title(candidate.get("trackName")))))
+    if album:
+        parts.append((ALBUM_WEIGHT, similarity(normalize_album(album),
+                                               normalize_album(candidate.get("collectionName")))))
+    total_weight = sum(weight for weight, _ in parts)
+    return sum(weight * score for weight, score in parts) / total_weight
+
+def best_match(results, artist, title=None, album=None, min_score=MIN_MATCH_SCORE):
+    """Return (candidate, score) for the best-scoring result with artwork.
+
+    Returns (None, best_score) when nothing clears min_score.
+    """
+    best, best_score = None, 0.0
+    for candidate in results or []:
+        if not candidate.get("artworkUrl100"):
+            continue
+        score = score_candidate(candidate, artist, title, album)
+        if score > best_score:
+            best, best_score = candidate, score
+    if best_score < min_score:
+        return None, best_score
+    return best, best_score
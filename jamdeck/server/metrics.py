@@ -0,0 +1,74 @@
+# jamdeck/server/metrics.py
+import time
+import threading
+
+def route_label(path):
+    """Collapse a request path into a low-cardinality route name.
+
+    '/assets/fonts/Retro-Gaming.ttf' -> '/assets/fonts', '/nowplaying' -> '/nowplaying',
+    '/s/alice/nowplaying' -> '/s/nowplaying', '/ingest/alice/artwork' -> '/ingest/artwork'.
+    """
+    if path.startswith(('/s/', '/ingest/')):
+        # Drop the session name
+        parts = path.split('/')
+        return '/'.join(parts[:2] + parts[3:4])
+    if path.startswith('/assets/'):
+        parts = path.split('/')
+        return '/'.join(parts[:3])
+    if path == '/' or path.endswith(('.html', '.css', '.js')):
+        return '/static'
+    return path
+
+class ServerMetrics:
+    """Thread-safe request counters, gauges and per-route latency totals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.routes = {}
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        """Record the current value of something (e.g. a breaker state)."""
+        with self._lock:
+            self.gauges[name] = value
+
+    def record_request(self, route, status, duration):
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+                self.routes[route] = stats
+            duration_ms = duration * 1000
+            stats["count"] += 1
+            if status is not None and status >= 400:
+                stats["errors"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            self.counters["requests"] = self.counters.get("requests", 0) + 1
+
+    def snapshot(self):
+        """Return a JSON-serializable copy of all metrics."""
+        with self._lock:
+            routes = {}
+            for route, stats in self.routes.items():
+                routes[route] = dict(stats)
+                routes[route]["avg_ms"] = round(stats["total_ms"] / stats["count"], 3) if stats["count"] else 0.0
+                routes[route]["total_ms"] = round(stats["total_ms"], 3)
+                routes[route]["max_ms"] = round(stats["max_ms"], 3)
+            return {
+                "uptime": round(time.time() - self.started_at, 3),
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "routes": routes,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.routes.clear()
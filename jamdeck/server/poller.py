@@ -0,0 +1,55 @@
+# jamdeck/server/poller.py
+import threading
+
+# Matches the overlay's refresh interval in overlay.js
+DEFAULT_POLL_INTERVAL = 3.0  # seconds
+# Time a query may take on top of the interval before the state counts as old
+QUERY_ALLOWANCE = 1.0  # seconds
+
+class TrackPoller:
+    """Query the provider on a fixed interval from a background thread.
+
+    Overlays only trigger queries while they are open; the poller keeps the
+    shared TrackState current so push consumers hear about changes even
+    when no browser source is polling /nowplaying.
+    """
+
+    def __init__(self, provider, interval=DEFAULT_POLL_INTERVAL, profiler=None):
+        self.provider = provider
+        self.interval = interval
+        # Optional Profiler; queries are included in its captures
+        self.profiler = profiler
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def max_age(self):
+        """How old TrackState gets between queries while the poller keeps up.
+
+        /nowplaying answers from TrackState while it is younger than this,
+        instead of running a query of its own.
+        """
+        return self.interval + QUERY_ALLOWANCE
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="jamdeck-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                if self.profiler is not None:
+                    with self.profiler.capture():
+                        self.provider.get_apple_music_track()
+                else:
+                    self.provider.get_apple_music_track()
+            except Exception as e:
+                print(f"Track poller error: {e}")
+            self._stop_event.wait(self.interval)
@@ -0,0 +1,184 @@
+# jamdeck/server/profiling.py
+import os
+import io
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from jamdeck.server.defaults import PROFILE_DIR, DEFAULT_PROFILE_DURATION
+
+# Lines written to the human-readable reports
+REPORT_LIMIT = 40
+
+class Profiler:
+    """On-demand capture of CPU, memory and per-route timing data.
+
+    While a capture is running, work wrapped in capture() (HTTP requests
+    and poller queries) is profiled with cProfile and merged into one set
+    of call stats, tracemalloc tracks allocations against a baseline
+    snapshot, and every request's route and duration is traced. Stopping
+    writes timestamped files to output_dir.
+
+    cProfile hooks a single thread, so each wrapped call gets its own
+    profile; the merged stats cover everything served during the window.
+    """
+
+    def __init__(self, output_dir=PROFILE_DIR):
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self.active = False
+        self.started_at = None
+        self.duration = 0
+        self.last_files = []
+        self._stats = None
+        self._baseline = None
+        self._route_traces = []
+        self._skipped = 0
+        self._timer = None
+        self._started_tracemalloc = False
+
+    def start(self, duration=DEFAULT_PROFILE_DURATION):
+        """Begin a capture. It stops by itself after duration seconds (if > 0)."""
+        # Profiling modules are imported on first use; most runs never profile
+        import tracemalloc
+        duration = float(duration)
+        with self._lock:
+            if self.active:
+                return self._status_locked()
+            self.active = True
+            self.started_at = time.time()
+            self.duration = duration
+            self._stats = None
+            self._route_traces = []
+            self._skipped = 0
+            self._started_tracemalloc = not tracemalloc.is_tracing()
+            if self._started_tracemalloc:
+                tracemalloc.start(10)
+            self._baseline = tracemalloc.take_snapshot()
+            if duration > 0:
+                self._timer = threading.Timer(duration, self.stop)
+                self._timer.daemon = True
+                self._timer.start()
+            print(f"Profiling started ({'until stopped' if duration <= 0 else f'{duration:g}s'})")
+            return self._status_locked()
+
+    def stop(self):
+        """End the capture and write the reports. Returns the status dict."""
+        import tracemalloc
+        with self._lock:
+            if not self.active:
+                return self._status_locked()
+            self.active = False
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            stats, self._stats = self._stats, None
+            traces, self._route_traces = self._route_traces, []
+            snapshot = tracemalloc.take_snapshot()
+            baseline, self._baseline = self._baseline, None
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            started_at = self.started_at
+
+        try:
+            self.last_files = self._write_reports(started_at, stats, traces, snapshot, baseline)
+            print(f"Profiling stopped, wrote {', '.join(self.last_files)}")
+        except Exception as e:
+            print(f"Error writing profile reports: {e}")
+        return self.status()
+
+    def toggle(self, duration=DEFAULT_PROFILE_DURATION):
+        return self.stop() if self.active else self.start(duration)
+
+    def status(self):
+        with self._lock:
+            return self._status_locked()
+
+    def _status_locked(self):
+        elapsed = time.time() - self.started_at if self.active else 0
+        return {
+            "active": self.active,
+            "elapsed": round(elapsed, 3),
+            "duration": self.duration,
+            "requests": len(self._route_traces),
+            "skipped": self._skipped,
+            "output_dir": self.output_dir,
+            "last_files": self.last_files,
+        }
+
+    @contextmanager
+    def capture(self):
+        """Profile the wrapped block if a capture is running."""
+        if not self.active:
+            yield
+            return
+
+        import pstats
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows only one active profiler at a time, so
+            # overlapping requests are left out of the call stats
+            with self._lock:
+                self._skipped += 1
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                if self.active:
+                    if self._stats is None:
+                        self._stats = pstats.Stats(profile)
+                    else:
+                        self._stats.add(profile)
+
+    def record_request(self, route, path, status, duration):
+        """Add one request to the per-route timing trace."""
+        if not self.active:
+            return
+        with self._lock:
+            if self.active:
+                self._route_traces.append({
+                    "ts": round(time.time(), 3),
+                    "route": route,
+                    "path": path,
+                    "status": status,
+                    "ms": round(duration * 1000, 3),
+                })
+
+    def _write_reports(self, started_at, stats, traces, snapshot, baseline):
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, "jamdeck-" + time.strftime("%Y%m%d-%H%M%S", time.localtime(started_at)))
+        files = []
+
+        if stats is not None:
+            stats.dump_stats(prefix + ".pstats")
+            files.append(prefix + ".pstats")
+            out = io.StringIO()
+            stats.stream = out
+            stats.sort_stats("cumulative").print_stats(REPORT_LIMIT)
+            with open(prefix + "-cpu.txt", "w") as f:
+                f.write(out.getvalue())
+            files.append(prefix + "-cpu.txt")
+
+        with open(prefix + "-memory.txt", "w") as f:
+            f.write("Top allocations at end of capture:\n")
+            for stat in snapshot.statistics("lineno")[:REPORT_LIMIT]:
+                f.write(f"{stat}\n")
+            if baseline is not None:
+                f.write("\nGrowth since capture started:\n")
+                for stat in snapshot.compare_to(baseline, "lineno")[:REPORT_LIMIT]:
+                    f.write(f"{stat}\n")
+        files.append(prefix + "-memory.txt")
+
+        with open(prefix + "-routes.jsonl", "w") as f:
+            for trace in traces:
+                f.write(json.dumps(trace) + "\n")
+        files.append(prefix + "-routes.jsonl")
+        return files
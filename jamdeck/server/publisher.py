@@ -0,0 +1,59 @@
+# jamdeck/server/publisher.py
+import json
+import time
+import threading
+
+from jamdeck.server.state import TOPIC_TRACK, TOPIC_ARTWORK, TOPIC_STATE
+
+# Local-only by default; pass a tcp://127.0.0.1:<port> endpoint for tools
+# that can't use IPC sockets.
+DEFAULT_PUB_ENDPOINT = "ipc:///tmp/jamdeck-track.ipc"
+
+# Fields sent for each topic, keeping messages small
+TOPIC_FIELDS = {
+    TOPIC_TRACK: ("playing", "title", "artist", "album"),
+    TOPIC_ARTWORK: ("artworkPath",),
+    TOPIC_STATE: ("playing", "error"),
+}
+
+class TrackPublisher:
+    """Publish TrackState changes on a ZMQ PUB socket.
+
+    Each change is sent as a two-frame message: the topic name and a compact
+    JSON payload. Subscribers filter by topic prefix (b"track", b"artwork",
+    b"state"), or subscribe to b"" to receive everything.
+    """
+
+    def __init__(self, context, endpoint=DEFAULT_PUB_ENDPOINT):
+        import zmq
+
+        self.endpoint = endpoint
+        self.socket = context.socket(zmq.PUB)
+        # Don't block context.term() on undelivered messages at shutdown
+        self.socket.setsockopt(zmq.LINGER, 0)
+        # Slow subscribers drop old messages rather than growing memory
+        self.socket.setsockopt(zmq.SNDHWM, 100)
+        self.socket.bind(endpoint)
+        # ZMQ sockets are not thread-safe and changes can come from any
+        # request thread, so sends are serialized.
+        self._lock = threading.Lock()
+        self.seq = 0
+
+    def publish(self, topics, snapshot):
+        """TrackState listener: send one message per changed topic."""
+        with self._lock:
+            if self.socket is None:
+                return
+            self.seq += 1
+            for topic in topics:
+                payload = {k: snapshot.get(k) for k in TOPIC_FIELDS.get(topic, ())}
+                payload["seq"] = self.seq
+                payload["ts"] = round(time.time(), 3)
+                message = json.dumps(payload, separators=(",", ":"))
+                self.socket.send_multipart([topic.encode(), message.encode()])
+
+    def close(self):
+        with self._lock:
+            if self.socket is not None:
+                self.socket.close()
+                self.socket = None
@@ -0,0 +1,158 @@
+# jamdeck/server/relay.py
+import os
+import json
+import time
+import threading
+import subprocess
+from urllib.parse import urljoin, urlparse, parse_qs
+
+# Where the relay keeps its copy of the upstream artwork
+RELAY_ARTWORK_PATH = "/tmp/jamdeck_relay_cover.jpg"
+# How long each long-poll request asks the upstream to hold on
+RELAY_WAIT = 15  # seconds
+# Poll interval for upstreams too old to long-poll
+RELAY_POLL_INTERVAL = 3.0  # seconds
+# Reconnect backoff after errors, doubled up to the maximum
+RELAY_RETRY = 1.0
+RELAY_RETRY_MAX = 30.0
+# Consecutive failures before the overlay is told the upstream is gone
+RELAY_OFFLINE_AFTER = 3
+
+class RelayProvider:
+    """Mirror another Jam Deck server's now-playing state.
+
+    Stands in for AppleMusicProvider on a second machine (e.g. the
+    streaming PC in a two-PC setup). One background connection follows
+    the upstream's /nowplaying, long-polling with ?since=<version> so a
+    change arrives as soon as it happens; upstreams that don't support
+    that are polled instead. Artwork is downloaded once per change into
+    a local file. Every overlay request on this machine is then answered
+    from local state, and the upstream only ever sees the relay.
+
+    upstream_url is the upstream server's base URL, e.g.
+    'http://music-mac.local:8080', or a remote session on it,
+    'http://host:8080/s/alice'.
+    """
+
+    def __init__(self, upstream_url, track_state, artwork_path=RELAY_ARTWORK_PATH):
+        self.upstream_url = upstream_url.rstrip("/")
+        self.track_state = track_state
+        self.artwork_path = artwork_path
+        self.stats = {"updates": 0, "artwork_fetches": 0, "artwork_errors": 0, "errors": 0,
+                      "connected": False}
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._upstream_artwork = None   # upstream artworkPath mirrored locally
+
+    def get_apple_music_track(self, received_at=None, deadline=None):
+        """Same contract as AppleMusicProvider: the /nowplaying JSON string.
+
+        Always answered from local state, so the arguments don't matter.
+        """
+        snapshot, _ = self.track_state.get()
+        if snapshot is None:
+            return json.dumps({"playing": False, "error": "Waiting for upstream"})
+        return json.dumps(snapshot)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="jamdeck-relay", daemon=True)
+        self._thread.start()
+        print(f"Relaying now playing from {self.upstream_url}")
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread = None
+
+    @staticmethod
+    def _curl(url, max_time, output="-"):
+        """GET url with curl; returns (status, body bytes)."""
+        result = subprocess.run(
+            ['curl', '-s', '--max-time', str(max_time), '-w', '%{http_code}', '-o', output, url],
+            capture_output=True, timeout=max_time + 5
+        )
+        if result.returncode != 0:
+            raise OSError(f"curl exited with {result.returncode}")
+        if output == "-":
+            return int(result.stdout[-3:]), result.stdout[:-3]
+        return int(result.stdout), b""
+
+    def _mirror_artwork(self, data):
+        """Copy the upstream artwork locally and point artworkPath at it.
+
+        A failed fetch only costs the cover: artworkPath is dropped and the
+        track still updates. The upstream itself counts as reachable.
+        """
+        upstream_path = data.get("artworkPath")
+        if not upstream_path:
+            self._upstream_artwork = None
+            return
+        if upstream_path != self._upstream_artwork:
+            url = urljoin(self.upstream_url + "/", upstream_path)
+            tmp_path = self.artwork_path + ".tmp"
+            try:
+                status, _ = self._curl(url, RELAY_WAIT, output=tmp_path)
+                if status != 200:
+                    raise OSError(f"HTTP {status}")
+                os.replace(tmp_path, self.artwork_path)
+            except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+                self.stats["artwork_errors"] += 1
+                print(f"Relay: could not fetch artwork {url}: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                data.pop("artworkPath")
+                return
+            self._upstream_artwork = upstream_path
+            self.stats["artwork_fetches"] += 1
+        # Keep the upstream's content key so overlays reload only on change
+        key = parse_qs(urlparse(upstream_path).query).get("t", [None])[0]
+        data["artworkPath"] = f"/artwork?t={key or int(os.path.getmtime(self.artwork_path))}"
+
+    def _run(self):
+        version = -1          # -1 makes the first long poll answer at once
+        long_poll = True
+        retry = RELAY_RETRY
+        failures = 0
+        while not self._stop_event.is_set():
+            url = f"{self.upstream_url}/nowplaying"
+            if long_poll:
+                url += f"?since={version}&wait={RELAY_WAIT}"
+            try:
+                status, body = self._curl(url, RELAY_WAIT + 5)
+                if status != 200:
+                    raise OSError(f"HTTP {status}")
+                data = json.loads(body)
+                upstream_version = data.pop("version", None)
+                if upstream_version is None:
+                    if long_poll:
+                        print("Upstream doesn't support long polling; polling instead")
+                    long_poll = False
+                self._mirror_artwork(data)
+            except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+                # Only /nowplaying failures get here; artwork errors don't
+                # make the upstream unreachable
+                failures += 1
+                self.stats["errors"] += 1
+                self.stats["connected"] = False
+                print(f"Relay error ({failures}): {e}")
+                if failures == RELAY_OFFLINE_AFTER:
+                    self.track_state.update({"playing": False, "error": "Upstream unreachable"})
+                # Ask for the full state again once back
+                version = -1
+                self._stop_event.wait(retry)
+                retry = min(retry * 2, RELAY_RETRY_MAX)
+                continue
+
+            failures = 0
+            retry = RELAY_RETRY
+            self.stats["connected"] = True
+            if upstream_version is not None:
+                version = upstream_version
+            if self.track_state.update(data):
+                self.stats["updates"] += 1
+            if not long_poll:
+                self._stop_event.wait(RELAY_POLL_INTERVAL)
@@ -0,0 +1,328 @@
+# jamdeck/server/resolver.py
+import os
+import time
+import queue
+import string
+import hashlib
+import threading
+import subprocess
+from collections import deque
+from urllib.parse import quote_plus
+
+from jamdeck.server.matching import match_key
+from jamdeck.server.artwork_index import ArtworkIndex, ARTWORK_INDEX_FILE
+
+ARTWORK_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".jamdeck_artwork_cache")
+ARTWORK_CACHE_MAX_FILES = 500
+
+# Latency budgets per tier (seconds). A tier still running after its
+# budget is abandoned; one running past its p90 gets the next tier
+# started alongside it (a hedged request).
+LOCAL_BUDGET = 0.1
+CACHE_BUDGET = 0.1
+ITUNES_BUDGET = 5.0
+HTTP_BUDGET = 3.0
+# Samples needed before a tier's p90 is trusted over its budget
+MIN_LATENCY_SAMPLES = 5
+
+class ArtworkUnavailable(Exception):
+    """No tier found artwork, and at least one couldn't give an answer."""
+
+class LatencyTracker:
+    """Recent latencies of one tier, for its p90."""
+
+    def __init__(self, size=50):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p90(self):
+        with self._lock:
+            if len(self._samples) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[int(0.9 * (len(ordered) - 1))]
+
+class ArtworkTier:
+    """One artwork source.
+
+    lookup() returns image bytes, None when the source has no artwork for
+    the track, or raises when it couldn't answer (so the miss isn't
+    remembered).
+    """
+    name = "tier"
+    budget = 1.0
+    # Whether artwork found here should be copied to the persistent cache
+    cacheable = True
+
+    def lookup(self, artist, title, album):
+        raise NotImplementedError
+
+class LocalFolderTier(ArtworkTier):
+    """Covers kept on disk, found through an ArtworkIndex of the folder."""
+    name = "local"
+    budget = LOCAL_BUDGET
+    cacheable = False
+
+    def __init__(self, folder, index_path=ARTWORK_INDEX_FILE):
+        self.index = ArtworkIndex(folder, path=index_path)
+        # Pick up changes made while the server was stopped
+        self.index.refresh_in_background()
+
+    def lookup(self, artist, title, album):
+        path = self.index.lookup(artist, album)
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            # Removed since the last scan
+            return None
+
+class PersistentCacheTier(ArtworkTier):
+    """Artwork found by network tiers, kept across restarts."""
+    name = "cache"
+    budget = CACHE_BUDGET
+    cacheable = False
+
+    def __init__(self, cache_dir=ARTWORK_CACHE_DIR, max_files=ARTWORK_CACHE_MAX_FILES):
+        self.cache_dir = cache_dir
+        self.max_files = max_files
+        self._stores = 0
+
+    def _path(self, artist, title):
+        digest = hashlib.sha1(match_key(artist, title).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".img")
+
+    def lookup(self, artist, title, album):
+        try:
+            with open(self._path(artist, title), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def store(self, artist, title, data):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(artist, title)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._stores += 1
+            if self._stores % 50 == 0:
+                self._trim()
+        except OSError as e:
+            print(f"Artwork cache: could not store: {e}")
+
+    def _trim(self):
+        """Drop the oldest files once the cache holds more than max_files."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_files)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _curl_bytes(url, budget):
+    """GET url and return the body, None on 404-style misses. Raises on errors."""
+    # --globoff: braces and brackets in template URLs are literal, not curl globs
+    result = subprocess.run(
+        ['curl', '-s', '-L', '--globoff', '--max-time', str(budget), '-w', '%{http_code}', '-o', '-', url],
+        capture_output=True, timeout=budget + 2
+    )
+    if result.returncode != 0:
+        raise OSError(f"curl exited with {result.returncode}")
+    body, status = result.stdout[:-3], result.stdout[-3:]
+    if status == b"200" and body:
+        return body
+    if status in (b"404", b"410"):
+        return None
+    raise OSError(f"HTTP {status.decode(errors='replace')}")
+
+class ITunesTier(ArtworkTier):
+    """The iTunes Search API, via ArtworkManager's scored lookups."""
+    name = "itunes"
+    budget = ITUNES_BUDGET
+
+    def __init__(self, artwork_manager, download=_curl_bytes):
+        self.artwork_manager = artwork_manager
+        # download(url, budget) -> bytes or None, like _curl_bytes
+        self.download = download
+
+    def lookup(self, artist, title, album):
+        art_url = self.artwork_manager.find_itunes_artwork_url(artist, title, album)
+        if not art_url:
+            return None
+        # Upscale from 100x100 to 600x600
+        return self.download(art_url.replace("100x100bb", "600x600bb"), self.budget)
+
+class HttpTemplateTier(ArtworkTier):
+    """A secondary HTTP source that returns the image itself.
+
+    url_template may use {artist}, {album} and {title}, e.g. a Cover Art
+    Archive-compatible proxy: 'http://localhost:5000/cover?artist={artist}&album={album}'.
+    Literal braces are written doubled ('{{' and '}}'). Any other
+    placeholder raises ValueError.
+    """
+    name = "http"
+    budget = HTTP_BUDGET
+    FIELDS = ("artist", "album", "title")
+
+    def __init__(self, url_template, download=_curl_bytes):
+        self.validate_template(url_template)
+        self.url_template = url_template
+        self.download = download
+
+    @classmethod
+    def validate_template(cls, url_template):
+        """Raise ValueError unless url_template formats with just our fields."""
+        if not isinstance(url_template, str):
+            raise ValueError("URL template must be a string")
+        try:
+            fields = [field for _, field, _, _ in string.Formatter().parse(url_template) if field is not None]
+        except ValueError as e:
+            raise ValueError(f"Invalid URL template {url_template!r}: {e}") from None
+        for field in fields:
+            if field not in cls.FIELDS:
+                raise ValueError(f"Invalid URL template {url_template!r}: unknown placeholder {{{field}}} "
+                                 f"(use {{artist}}, {{album}} or {{title}}, and {{{{ }}}} for literal braces)")
+        try:
+            # Catches what parse() doesn't look into, like fields nested in a format spec
+            url_template.format(**{field: "" for field in cls.FIELDS})
+        except (KeyError, IndexError, AttributeError, ValueError) as e:
+            raise ValueError(f"Invalid URL template {url_template!r}: {e!r}") from None
+
+    def lookup(self, artist, title, album):
+        url = self.url_template.format(
+            artist=quote_plus(artist or ""),
+            album=quote_plus(album or ""),
+            title=quote_plus(title or ""),
+        )
+        return self.download(url, self.budget)
+
+class ArtworkResolver:
+    """Try artwork tiers in order, hedging slow ones.
+
+    Each tier starts when the previous one answers "not found", or early
+    once the previous one has run longer than its recent p90 (or its
+    budget, before there is enough history). The first artwork found by
+    any running tier wins. Artwork from network tiers is copied to the
+    persistent cache, including results that arrive after the resolver
+    has moved on.
+
+    time_scale is how many seconds of tier time pass per wall-clock
+    second: budgets and latencies are in tier time. A trace replayed at
+    10x speed uses 10; 0 replays with no timing, so nothing is hedged or
+    abandoned.
+    """
+
+    def __init__(self, tiers, cache_tier=None, time_scale=1.0):
+        self.time_scale = time_scale
+        self.tiers = tiers
+        self.cache_tier = cache_tier
+        self.latency = {tier.name: LatencyTracker() for tier in tiers}
+        self.stats = {"resolved": 0, "misses": 0, "hedged": 0, "abandoned": 0}
+        self.hits_by_tier = {tier.name: 0 for tier in tiers}
+
+    def _hedge_delay(self, tier):
+        p90 = self.latency[tier.name].p90()
+        return tier.budget if p90 is None else min(tier.budget, p90)
+
+    def _wall(self, seconds):
+        """Wall-clock seconds for seconds of tier time; None means never."""
+        return seconds / self.time_scale if self.time_scale else None
+
+    def _run_tier(self, index, artist, title, album, results):
+        tier = self.tiers[index]
+        started = time.monotonic()
+        data, error = None, None
+        try:
+            data = tier.lookup(artist, title, album)
+        except Exception as e:
+            error = e
+        self.latency[tier.name].record((time.monotonic() - started) * self.time_scale)
+        if data and tier.cacheable and self.cache_tier is not None:
+            self.cache_tier.store(artist, title, data)
+        results.put((index, data, error))
+
+    def resolve(self, artist, title, album):
+        """Return (image bytes, tier name), or (None, None) if no tier has any.
+
+        Raises ArtworkUnavailable if nothing was found but some tier
+        failed or ran out of time.
+        """
+        if not self.tiers:
+            return None, None
+
+        results = queue.Queue()
+        started = []     # (index, start time) in start order
+        pending = set()
+        next_index = 0
+        unavailable = False
+
+        def start_next():
+            nonlocal next_index
+            index = next_index
+            next_index += 1
+            started.append((index, time.monotonic()))
+            pending.add(index)
+            threading.Thread(target=self._run_tier, args=(index, artist, title, album, results),
+                             name=f"jamdeck-artwork-{self.tiers[index].name}", daemon=True).start()
+
+        start_next()
+        while pending:
+            now = time.monotonic()
+            last_index, last_started = started[-1]
+            hedge_at = deadlines = None
+            if self.time_scale:
+                hedge_at = last_started + self._wall(self._hedge_delay(self.tiers[last_index]))
+                deadlines = [t0 + self._wall(self.tiers[i].budget) for i, t0 in started if i in pending]
+                if next_index < len(self.tiers):
+                    deadlines.append(hedge_at)
+
+            try:
+                index, data, error = results.get(timeout=max(0, min(deadlines) - now) if deadlines else None)
+            except queue.Empty:
+                now = time.monotonic()
+                for i, t0 in started:
+                    if i in pending and now >= t0 + self._wall(self.tiers[i].budget):
+                        pending.discard(i)
+                        unavailable = True
+                        self.stats["abandoned"] += 1
+                if next_index < len(self.tiers) and (now >= hedge_at or not pending):
+                    if pending:
+                        self.stats["hedged"] += 1
+                    start_next()
+                continue
+
+            if index not in pending:
+                # Late answer from an abandoned tier; already cached above
+                continue
+            pending.discard(index)
+            if data:
+                tier_name = self.tiers[index].name
+                self.stats["resolved"] += 1
+                self.hits_by_tier[tier_name] += 1
+                return data, tier_name
+            if error is not None:
+                print(f"Artwork tier '{self.tiers[index].name}' failed: {error}")
+                unavailable = True
+            if next_index < len(self.tiers):
+                start_next()
+
+        if unavailable:
+            raise ArtworkUnavailable("No artwork found and some sources didn't answer")
+        self.stats["misses"] += 1
+        return None, None
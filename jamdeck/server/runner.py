@@ -1,26 +1,506 @@
 # jamdeck/server/runner.py
 import os
 import sys
+import time
 import socket
 import signal
 import atexit
-import zmq
-from http.server import HTTPServer
+import threading
+from http.server import ThreadingHTTPServer
 
-from jamdeck import get_resources_dir
+from jamdeck import VERSION, get_resources_dir
 from jamdeck.server.artwork import ArtworkManager
 from jamdeck.server.apple_music import AppleMusicProvider
 from jamdeck.server.handler import MusicHandler
+from jamdeck.server.state import TrackState
+from jamdeck.server.poller import TrackPoller
+from jamdeck.server.history import PlayHistory
+from jamdeck.server.sessions import SessionRegistry
+from jamdeck.server.limits import RequestLimiter
+from jamdeck.server.snapshot import StateSnapshot
+from jamdeck.server.webhooks import WebhookDispatcher
+from jamdeck.server.profiling import Profiler
+from jamdeck.server.bundle import OverlayBundle
+from jamdeck.server.static_files import StaticFileIndex
+from jamdeck.server.metrics import ServerMetrics
+from jamdeck.server.settings import load_server_settings, redact_settings, DEFAULT_SERVER_SETTINGS
+from jamdeck.server.publisher import DEFAULT_PUB_ENDPOINT
+from jamdeck.server.control import DEFAULT_CONTROL_ENDPOINT
 
 # Set starting port for the server
 START_PORT = 8080
 MAX_PORT_ATTEMPTS = 10 # Limit how many ports we try
 
+class JamDeckHTTPServer(ThreadingHTTPServer):
+    # socketserver's default listen backlog of 5 resets connections when
+    # many remote agents or overlays connect at once
+    request_queue_size = 128
+
 # Initialize ZMQ context as None
 zmq_context = None
+# The ServerRunner currently serving, closed by cleanup()
+active_runner = None
 
-def cleanup():
+def get_zmq_context():
+    """Create the shared ZMQ context on first use.
+
+    pyzmq is imported lazily so servers that never need it don't pay for
+    loading libzmq at startup.
+    """
     global zmq_context
+    if zmq_context is None:
+        import zmq
+        zmq_context = zmq.Context()
+        print("ZMQ context initialized")
+    return zmq_context
+
+def warm_up(apple_music_provider):
+    """Run the first AppleScript query in the background.
+
+    The first osascript call is the slow one (script compilation, the
+    automation permission prompt, artwork lookups), so we do it off the
+    serving path and let requests be answered as soon as the socket is bound.
+    """
+    def run():
+        try:
+            print("\nWarming up AppleScript...")
+            test_result = apple_music_provider.get_apple_music_track()
+            print(f"Warm-up result: {test_result}")
+        except Exception as e:
+            print(f"Warm-up error: {e}")
+        finally:
+            MusicHandler.warmed_up = True
+
+    threading.Thread(target=run, name="jamdeck-warmup", daemon=True).start()
+
+class ServerRunner:
+    """Owns the HTTP server and its supporting components.
+
+    Keeping them together lets the control channel reconfigure a running
+    server in place (rebinding the port, reloading settings, clearing
+    caches) without restarting the interpreter or losing warm caches.
+    """
+
+    def __init__(self, pub_endpoint=DEFAULT_PUB_ENDPOINT, control_endpoint=DEFAULT_CONTROL_ENDPOINT, relay_url=None,
+                 trace_path=None):
+        self.pub_endpoint = pub_endpoint
+        self.control_endpoint = control_endpoint
+        self.settings = load_server_settings()
+        # Mirror another Jam Deck server instead of querying Music here
+        self.relay_url = relay_url or self.settings["relay_upstream"]
+
+        # Initialize artwork and apple music components
+        self.track_state = TrackState()
+        self.metrics = ServerMetrics()
+        self.profiler = Profiler()
+        # Records raw provider output and iTunes answers for replay ('' = default path)
+        self.tracer = None
+        # Relay and trace modules are imported only when used, to keep startup short
+        if trace_path is not None and not self.relay_url:
+            from jamdeck.server.trace import TraceRecorder
+            self.tracer = TraceRecorder(trace_path or None)
+        if self.relay_url:
+            from jamdeck.server.relay import RelayProvider, RELAY_ARTWORK_PATH
+            # Artwork arrives from the upstream; the manager just names the file
+            self.artwork_manager = ArtworkManager(artwork_path=RELAY_ARTWORK_PATH)
+            self.apple_music_provider = RelayProvider(self.relay_url, self.track_state,
+                                                      artwork_path=self.artwork_manager.artwork_path)
+        else:
+            traced = {}
+            if self.tracer:
+                from jamdeck.server.itunes import ITunesScheduler
+                from jamdeck.server.resolver import _curl_bytes
+                traced = {
+                    "itunes_scheduler": ITunesScheduler(fetch=self.tracer.traced_fetch(ITunesScheduler._curl_fetch)),
+                    "download": self.tracer.traced_download(_curl_bytes),
+                }
+            self.artwork_manager = ArtworkManager(
+                local_folder=self.settings["artwork_folder"],
+                secondary_url=self.settings["artwork_secondary_url"],
+                **traced
+            )
+            self.apple_music_provider = AppleMusicProvider(self.artwork_manager, track_state=self.track_state,
+                                                           metrics=self.metrics, tracer=self.tracer)
+        # Show the last known track (marked stale) until the first query answers
+        self.state_snapshot = StateSnapshot(self.track_state, self.artwork_manager)
+        self.state_snapshot.restore()
+        self.track_state.add_listener(self.state_snapshot.on_track_change)
+        self.play_history = PlayHistory(capacity=self.settings["history_capacity"])
+        self.track_state.add_listener(self.play_history.on_track_change)
+        self.webhooks = WebhookDispatcher(self.settings["webhooks"])
+        self.track_state.add_listener(self.webhooks.on_track_change)
+        self.session_registry = None
+        self._configure_sessions()
+        self.request_limiter = RequestLimiter()
+        self._configure_limits()
+
+        self.httpd = None
+        self.actual_port = -1
+        self.track_publisher = None
+        self.track_poller = None
+        self.control_server = None
+        # (httpd, port) waiting to replace the serving socket, set by rebind()
+        self._pending_bind = None
+        self._lock = threading.Lock()
+        # Set once serve() is running, so embedding callers can wait on it
+        self.ready_event = threading.Event()
+        self._stop_requested = False
+
+        # Configure the handler class with the providers
+        MusicHandler.artwork_manager = self.artwork_manager
+        MusicHandler.apple_music_provider = self.apple_music_provider
+        MusicHandler.track_state = self.track_state
+        MusicHandler.track_poller = None
+        MusicHandler.play_history = self.play_history
+        MusicHandler.metrics = self.metrics
+        MusicHandler.profiler = self.profiler
+        MusicHandler.inline_css = bool(self.settings["inline_css"])
+        MusicHandler.serve_bundle = bool(self.settings["serve_bundle"])
+        MusicHandler.root_dir = get_resources_dir()
+        self.static_files = StaticFileIndex(MusicHandler.root_dir)
+        self.static_files.build()
+        MusicHandler.static_files = self.static_files
+        self.overlay_bundle = OverlayBundle(MusicHandler.root_dir)
+        self.overlay_bundle.build()
+        MusicHandler.overlay_bundle = self.overlay_bundle
+        MusicHandler.started_at = time.time()
+        MusicHandler.warmed_up = False
+
+    def bind(self, preferred_port=None):
+        """Bind the HTTP server, preferring preferred_port.
+
+        Returns True on success. Falls back to scanning from START_PORT.
+        """
+        httpd = None
+        actual_port = -1
+        port_found = False
+
+        # 1. Try the preferred port first if provided
+        if preferred_port:
+            print(f"Attempting to use preferred port: {preferred_port}")
+            try:
+                server_address = ('', preferred_port)
+                httpd = JamDeckHTTPServer(server_address, MusicHandler)
+                actual_port = preferred_port
+                port_found = True
+
+                # IMPORTANT: Print the port for the parent process BEFORE other messages
+                print(f"JAMDECK_PORT={actual_port}")
+                sys.stdout.flush()
+                print(f"Successfully bound to preferred port {actual_port}")
+
+            except socket.error as e:
+                if e.errno == socket.errno.EADDRINUSE:
+                    print(f"Preferred port {preferred_port} already in use. Falling back to automatic detection.")
+                else:
+                    print(f"Error trying preferred port {preferred_port}: {e}")
+            except Exception as e:
+                print(f"Server setup error on preferred port {preferred_port}: {e}")
+
+        # 2. If preferred port failed or wasn't provided, try automatic detection
+        if not port_found:
+            print("Attempting automatic port detection...")
+            for i in range(MAX_PORT_ATTEMPTS):
+                port_to_try = START_PORT + i
+                # Skip the preferred port if it was already tried and failed
+                if preferred_port and port_to_try == preferred_port:
+                    continue
+
+                try:
+                    server_address = ('', port_to_try)
+                    httpd = JamDeckHTTPServer(server_address, MusicHandler)
+                    actual_port = port_to_try
+
+                    # IMPORTANT: Print the port for the parent process BEFORE other messages
+                    print(f"JAMDECK_PORT={actual_port}")
+                    sys.stdout.flush() # Ensure it's sent immediately
+
+                    print(f"Starting music server on port {actual_port}...")
+                    print(f"Open http://localhost:{actual_port}/ in your browser or OBS")
+                    print(f"Press Ctrl+C to stop the server")
+                    port_found = True
+                    break
+
+                except socket.error as e:
+                    if e.errno == socket.errno.EADDRINUSE:
+                        print(f"Port {port_to_try} is busy, trying next...")
+                        continue
+                    else:
+                        print(f"Server error on port {port_to_try}: {e}")
+                        return False
+                except Exception as e:
+                    print(f"Server setup error on port {port_to_try}: {e}")
+                    return False
+
+        # Check if a port was successfully found either way
+        if not port_found or httpd is None:
+            error_message = f"Could not bind to the preferred port ({preferred_port}) " if preferred_port else ""
+            error_message += f"or find an available port in the range {START_PORT}-{START_PORT + MAX_PORT_ATTEMPTS - 1}."
+            print(error_message)
+            return False
+
+        self.httpd = httpd
+        self.actual_port = actual_port
+        return True
+
+    def start_poller(self):
+        """Keep TrackState (and with it the play history) current in the background."""
+        if self.relay_url:
+            # The relay follows the upstream on its own thread
+            self.apple_music_provider.start()
+            return
+        self.track_poller = TrackPoller(self.apple_music_provider, self.settings["poll_interval"],
+                                        profiler=self.profiler)
+        self.track_poller.start()
+        MusicHandler.track_poller = self.track_poller
+
+    def start_track_feed(self):
+        """Publish TrackState changes over ZMQ.
+
+        Failures are logged and ignored: the HTTP overlay works without the feed.
+        """
+        try:
+            from jamdeck.server.publisher import TrackPublisher
+            self.track_publisher = TrackPublisher(get_zmq_context(), self.pub_endpoint)
+        except Exception as e:
+            print(f"Track feed disabled, could not bind {self.pub_endpoint}: {e}")
+            return
+
+        self.track_state.add_listener(self.track_publisher.publish)
+        print(f"JAMDECK_PUB={self.pub_endpoint}")
+        print(f"Publishing track changes on {self.pub_endpoint}")
+
+    def start_control(self):
+        """Expose the control channel. Failures are logged and ignored."""
+        try:
+            from jamdeck.server.control import ControlServer
+            self.control_server = ControlServer(get_zmq_context(), self.control_endpoint)
+            self.control_server.register("status", self.status)
+            self.control_server.register("metrics", self.metrics.snapshot)
+            self.control_server.register("rebind", self.rebind)
+            self.control_server.register("reload_config", self.reload_config)
+            self.control_server.register("clear_caches", self.clear_caches)
+            self.control_server.register("profile_start", self.profiler.start)
+            self.control_server.register("profile_stop", self.profiler.stop)
+            self.control_server.register("profile_status", self.profiler.status)
+            self.control_server.start()
+        except Exception as e:
+            print(f"Control channel disabled, could not bind {self.control_endpoint}: {e}")
+            self.control_server = None
+            return
+
+        print(f"JAMDECK_CONTROL={self.control_endpoint}")
+
+    # --- Control methods ---
+
+    def status(self):
+        snapshot, version = self.track_state.get()
+        return {
+            "version": VERSION,
+            "pid": os.getpid(),
+            "port": self.actual_port,
+            "uptime": round(time.time() - MusicHandler.started_at, 3),
+            "warm": MusicHandler.warmed_up,
+            "pub_endpoint": self.pub_endpoint if self.track_publisher else None,
+            "track": snapshot,
+            "track_version": version,
+            "breaker": self.apple_music_provider.breaker.snapshot() if not self.relay_url else None,
+            "relay": dict(self.apple_music_provider.stats, upstream=self.relay_url) if self.relay_url else None,
+            "itunes": dict(self.artwork_manager.itunes_scheduler.stats),
+            "artwork_lookups": self.artwork_manager.lookup_snapshot(),
+            "artwork_resolver": dict(self.artwork_manager.resolver.stats,
+                                     by_tier=dict(self.artwork_manager.resolver.hits_by_tier)),
+            "webhooks": self.webhooks.snapshot(),
+            "sessions": self.session_registry.snapshot() if self.session_registry else None,
+            "limits": self.request_limiter.snapshot(),
+            "artwork_index": dict(self.artwork_manager.local_index.stats) if self.artwork_manager.local_index else None,
+        }
+
+    def rebind(self, port):
+        """Move the HTTP server to a new port without restarting.
+
+        The new socket is bound first, so if the port is taken the current
+        server keeps running and the error is reported to the caller.
+        """
+        port = int(port)
+        if not (1024 <= port <= 65535):
+            raise ValueError("Port must be between 1024 and 65535.")
+        if port == self.actual_port:
+            return {"port": port}
+
+        new_httpd = JamDeckHTTPServer(('', port), MusicHandler)
+        with self._lock:
+            if self._stop_requested:
+                new_httpd.server_close()
+                raise RuntimeError("Server is shutting down")
+            self._pending_bind = (new_httpd, port)
+            old_httpd = self.httpd
+        # serve() picks up the pending server once serve_forever returns
+        old_httpd.shutdown()
+        return {"port": port}
+
+    def reload_config(self):
+        self.settings = load_server_settings()
+        if self.track_poller:
+            self.track_poller.interval = self.settings["poll_interval"]
+        MusicHandler.inline_css = bool(self.settings["inline_css"])
+        MusicHandler.serve_bundle = bool(self.settings["serve_bundle"])
+        self._configure_sessions()
+        self._configure_limits()
+        self.webhooks.configure(self.settings["webhooks"])
+        if not self.relay_url:
+            self.artwork_manager.configure(self.settings["artwork_folder"], self.settings["artwork_secondary_url"])
+        # Pick up edited and added overlay files too
+        self.static_files.build()
+        self.overlay_bundle.build()
+        # Never log or hand out the ingest token or webhook secrets
+        settings = redact_settings(self.settings)
+        print(f"Reloaded server settings: {settings}")
+        return settings
+
+    def _configure_sessions(self):
+        """Enable remote ingestion when an ingest token is configured."""
+        token = self.settings["ingest_token"]
+        if not token:
+            self.session_registry = None
+        elif self.session_registry is None:
+            self.session_registry = SessionRegistry(token, self.settings["max_sessions"],
+                                                    self.settings["session_idle_timeout"])
+        else:
+            # Keep live sessions across a settings reload
+            self.session_registry.token = token
+            self.session_registry.max_sessions = self.settings["max_sessions"]
+            self.session_registry.idle_timeout = self.settings["session_idle_timeout"]
+        MusicHandler.session_registry = self.session_registry
+
+    def _configure_limits(self):
+        """Apply the per-client rate, concurrency and deadline settings.
+
+        Invalid values are reported and replaced by the defaults rather
+        than left to fail inside a request.
+        """
+        try:
+            self.request_limiter.configure(self.settings["client_rate"], self.settings["client_burst"],
+                                           self.settings["max_concurrent_requests"])
+        except (TypeError, ValueError) as e:
+            print(f"Warning: Invalid request limits ({e}). Using defaults.")
+            self.request_limiter.configure(DEFAULT_SERVER_SETTINGS["client_rate"],
+                                           DEFAULT_SERVER_SETTINGS["client_burst"],
+                                           DEFAULT_SERVER_SETTINGS["max_concurrent_requests"])
+        MusicHandler.request_limiter = self.request_limiter
+
+        deadline = self.settings["request_deadline"]
+        if deadline is not None and (not isinstance(deadline, (int, float)) or deadline < 0):
+            print(f"Warning: Invalid request_deadline {deadline!r}. Using the default.")
+            deadline = DEFAULT_SERVER_SETTINGS["request_deadline"]
+        # 0 or None: polls wait for the provider as long as it takes
+        MusicHandler.request_deadline = deadline or None
+
+    def clear_caches(self):
+        self.artwork_manager.clear_caches()
+        print("Cleared artwork caches")
+        return {"cleared": True}
+
+    # --- Lifecycle ---
+
+    def serve(self):
+        """Serve until shut down, switching sockets when rebind() asks to."""
+        while True:
+            self.httpd.serve_forever()
+            with self._lock:
+                pending = self._pending_bind
+                self._pending_bind = None
+            if pending is None:
+                break
+
+            self.httpd.server_close()
+            self.httpd, self.actual_port = pending
+            # IMPORTANT: Tell the parent process about the new port
+            print(f"JAMDECK_PORT={self.actual_port}")
+            print(f"JAMDECK_READY={self.actual_port}")
+            sys.stdout.flush()
+            print(f"Rebound server to port {self.actual_port}")
+
+    def stop(self):
+        """Stop serving from another thread.
+
+        run() returns once the serve loop exits; the caller then calls close().
+        """
+        with self._lock:
+            self._stop_requested = True
+            pending = self._pending_bind
+            self._pending_bind = None
+            httpd = self.httpd
+        if pending:
+            pending[0].server_close()
+        # shutdown() waits for serve_forever, so only call it once serving
+        if httpd and self.ready_event.is_set():
+            httpd.shutdown()
+
+    def close(self):
+        if self.profiler.active:
+            self.profiler.stop()
+        if self.control_server:
+            self.control_server.stop()
+            self.control_server = None
+        if self.track_poller:
+            MusicHandler.track_poller = None
+            self.track_poller.stop()
+            self.track_poller = None
+        if self.relay_url:
+            self.apple_music_provider.stop()
+        self.state_snapshot.close()
+        self.webhooks.close()
+        if self.tracer:
+            self.tracer.close()
+        if self.track_publisher:
+            self.track_publisher.close()
+            self.track_publisher = None
+        self.play_history.close()
+        if self.httpd:
+            self.httpd.server_close()
+            self.httpd = None
+
+    def run(self, preferred_port=None, profile_duration=None):
+        if not self.bind(preferred_port):
+            return
+
+        if profile_duration is not None:
+            self.profiler.start(profile_duration)
+
+        # The listening socket is already bound, so connections queue up from
+        # here on; warm up the provider without delaying the first response.
+        warm_up(self.apple_music_provider)
+        self.start_poller()
+        self.state_snapshot.start()
+
+        with self._lock:
+            if self._stop_requested:
+                return
+            self.ready_event.set()
+
+        # IMPORTANT: Tell the parent process we are serving
+        print(f"JAMDECK_READY={self.actual_port}")
+        sys.stdout.flush()
+        print("\nServer ready!")
+
+        # Optional push feed of track changes for other local tools. Both
+        # import pyzmq and bind sockets, so they start after the ready line;
+        # overlay requests queue on the bound socket meanwhile.
+        if self.pub_endpoint:
+            self.start_track_feed()
+        if self.control_endpoint:
+            self.start_control()
+        sys.stdout.flush()
+
+        # Start server
+        self.serve()
+
+def cleanup():
+    global zmq_context, active_runner
+    if active_runner:
+        active_runner.close()
+        active_runner = None
     if zmq_context:
         print("Closing ZMQ context...")
         try:
@@ -39,120 +519,38 @@ def signal_handler(sig, frame):
     cleanup()
     sys.exit(0)
 
-# Register signal handlers
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
+def profile_signal_handler(sig, frame):
+    """Toggle a profiling capture (SIGUSR1)."""
+    if active_runner:
+        # Stopping writes files, which doesn't belong in a signal handler
+        threading.Thread(target=active_runner.profiler.toggle, daemon=True).start()
 
-def run_server(preferred_port=None):
-    global zmq_context
-    httpd = None
-    actual_port = -1
-    port_found = False
-
-    # Initialize artwork and apple music components
-    artwork_manager = ArtworkManager()
-    apple_music_provider = AppleMusicProvider(artwork_manager)
-    
-    # Configure the handler class with the providers
-    MusicHandler.artwork_manager = artwork_manager
-    MusicHandler.apple_music_provider = apple_music_provider
-    MusicHandler.root_dir = get_resources_dir()
-
-    # 1. Try the preferred port first if provided
-    if preferred_port:
-        print(f"Attempting to use preferred port: {preferred_port}")
-        try:
-            # Initialize ZMQ context if needed
-            if zmq_context is None:
-                zmq_context = zmq.Context()
-                print("ZMQ context initialized")
-
-            server_address = ('', preferred_port)
-            httpd = HTTPServer(server_address, MusicHandler)
-            actual_port = preferred_port
-            port_found = True
-
-            # IMPORTANT: Print the port for the parent process BEFORE other messages
-            print(f"JAMDECK_PORT={actual_port}")
-            sys.stdout.flush()
-            print(f"Successfully bound to preferred port {actual_port}")
+def install_signal_handlers():
+    """Exit cleanly on SIGINT/SIGTERM and toggle profiling on SIGUSR1.
 
-        except socket.error as e:
-            if e.errno == socket.errno.EADDRINUSE:
-                print(f"Preferred port {preferred_port} already in use. Falling back to automatic detection.")
-            else:
-                print(f"Error trying preferred port {preferred_port}: {e}")
-        except Exception as e:
-            print(f"Server setup error on preferred port {preferred_port}: {e}")
-
-    # 2. If preferred port failed or wasn't provided, try automatic detection
-    if not port_found:
-        print("Attempting automatic port detection...")
-        for i in range(MAX_PORT_ATTEMPTS):
-            port_to_try = START_PORT + i
-            # Skip the preferred port if it was already tried and failed
-            if preferred_port and port_to_try == preferred_port:
-                continue
+    Only for the standalone server process: signal handlers can only be set
+    from the main thread, and an embedding app must not have the server
+    call sys.exit() on its behalf.
+    """
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, profile_signal_handler)
 
-            try:
-                # Initialize ZMQ context if needed
-                if zmq_context is None:
-                    zmq_context = zmq.Context()
-                    print("ZMQ context initialized")
-
-                server_address = ('', port_to_try)
-                httpd = HTTPServer(server_address, MusicHandler)
-                actual_port = port_to_try
-
-                # IMPORTANT: Print the port for the parent process BEFORE other messages
-                print(f"JAMDECK_PORT={actual_port}")
-                sys.stdout.flush() # Ensure it's sent immediately
-                
-                print(f"Starting music server on port {actual_port}...")
-                print(f"Open http://localhost:{actual_port}/ in your browser or OBS")
-                print(f"Press Ctrl+C to stop the server")
-                port_found = True
-                break
-                
-            except socket.error as e:
-                if e.errno == socket.errno.EADDRINUSE:
-                    print(f"Port {port_to_try} is busy, trying next...")
-                    continue
-                else:
-                    print(f"Server error on port {port_to_try}: {e}")
-                    cleanup()
-                    return
-            except Exception as e:
-                print(f"Server setup error on port {port_to_try}: {e}")
-                cleanup()
-                return
-
-    # Check if a port was successfully found either way
-    if not port_found or httpd is None:
-        error_message = f"Could not bind to the preferred port ({preferred_port}) " if preferred_port else ""
-        error_message += f"or find an available port in the range {START_PORT}-{START_PORT + MAX_PORT_ATTEMPTS - 1}."
-        print(error_message)
-        cleanup()
-        return
+def run_server(preferred_port=None, pub_endpoint=DEFAULT_PUB_ENDPOINT, control_endpoint=DEFAULT_CONTROL_ENDPOINT,
+               profile_duration=None, relay_url=None, trace_path=None):
+    global active_runner
+    active_runner = ServerRunner(pub_endpoint=pub_endpoint, control_endpoint=control_endpoint, relay_url=relay_url,
+                                 trace_path=trace_path)
 
     try:
-        # Test the AppleScript once before starting the server
-        print("\nTesting AppleScript...")
-        test_result = apple_music_provider.get_apple_music_track()
-        print(f"Test result: {test_result}")
-        print("\nServer ready!")
-
-        # Start server
-        httpd.serve_forever()
-        
+        active_runner.run(preferred_port, profile_duration=profile_duration)
     except KeyboardInterrupt:
         print("\nShutting down server...")
-        if httpd:
-            httpd.server_close()
         cleanup()
         print("Server stopped")
     except Exception as e:
         print(f"Server runtime error: {e}")
-        if httpd:
-            httpd.server_close()
+        cleanup()
+    else:
         cleanup()
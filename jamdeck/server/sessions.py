@@ -0,0 +1,183 @@
+# jamdeck/server/sessions.py
+import re
+import hmac
+import hashlib
+import time
+import threading
+
+from jamdeck.server.state import TrackState, TOPIC_TRACK
+
+# Session names appear in URLs: /ingest/<session>, /s/<session>/nowplaying
+SESSION_NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+DEFAULT_MAX_SESSIONS = 500
+# Sessions that haven't pushed anything for this long are dropped
+DEFAULT_SESSION_IDLE_TIMEOUT = 600  # seconds
+# Idle sessions are swept at most this often
+SWEEP_INTERVAL = 10  # seconds
+
+# Per-session memory bounds
+INGEST_FIELDS = ("playing", "title", "artist", "album", "error")
+MAX_FIELD_LENGTH = 512
+MAX_INGEST_BODY = 8 * 1024
+MAX_ARTWORK_BYTES = 1024 * 1024
+ARTWORK_TYPES = ("image/jpeg", "image/png")
+
+# Longest a /s/<session>/nowplaying?since= request is held open
+MAX_WAIT = 20  # seconds
+
+class SessionError(Exception):
+    """An ingest request was rejected; carries the HTTP status to answer with."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class Session:
+    """One remote Music instance: its TrackState and latest artwork."""
+
+    def __init__(self, name):
+        self.name = name
+        self.track_state = TrackState()
+        self.artwork = None         # (bytes, content type)
+        self.last_seen = time.monotonic()
+        self.expired = False
+        # Serializes read-modify-write of the snapshot between requests
+        self.lock = threading.Lock()
+
+    def wait_for_change(self, since, timeout):
+        """Block until the snapshot version passes since, or timeout.
+
+        Returns (snapshot, version); snapshot is None once the session expires.
+        """
+        snapshot, version = self.track_state.wait_for_change(since, timeout)
+        if self.expired:
+            return None, version
+        return snapshot, version
+
+    def expire(self):
+        self.expired = True
+        self.artwork = None
+        # Answer anyone long-polling this session
+        self.track_state.close()
+
+class SessionRegistry:
+    """Now-playing state pushed by remote agents, one Session per name.
+
+    Agents POST track JSON to /ingest/<session> (and artwork to
+    /ingest/<session>/artwork) with a shared bearer token; overlays read
+    /s/<session>/nowplaying. Each session keeps only its latest snapshot,
+    with whitelisted, length-capped fields and at most one artwork image,
+    so memory per session is bounded. Sessions idle for longer than
+    idle_timeout are dropped, and at most max_sessions exist at once.
+    """
+
+    def __init__(self, token, max_sessions=DEFAULT_MAX_SESSIONS, idle_timeout=DEFAULT_SESSION_IDLE_TIMEOUT):
+        self.token = token
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._swept_at = time.monotonic()
+        self.stats = {"created": 0, "expired": 0, "updates": 0, "rejected": 0}
+
+    def authorized(self, authorization):
+        """Check an Authorization header against the shared token."""
+        if not self.token or not authorization:
+            return False
+        scheme, _, value = authorization.partition(" ")
+        if scheme.lower() != "bearer":
+            return False
+        return hmac.compare_digest(value.strip().encode(), str(self.token).encode())
+
+    def get(self, name):
+        """Return the live Session called name, or None."""
+        self._sweep()
+        with self._lock:
+            return self._sessions.get(name)
+
+    def _session_for_ingest(self, name):
+        if not SESSION_NAME_RE.match(name or ""):
+            raise SessionError(400, "Session names are 1-64 letters, digits, '-' or '_'")
+        self._sweep()
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is None:
+                if len(self._sessions) >= self.max_sessions:
+                    self.stats["rejected"] += 1
+                    raise SessionError(503, "Too many sessions")
+                session = Session(name)
+                self._sessions[name] = session
+                self.stats["created"] += 1
+            session.last_seen = time.monotonic()
+            self.stats["updates"] += 1
+            return session
+
+    def ingest(self, name, payload):
+        """Record a track update pushed for session name. Returns the new version."""
+        if not isinstance(payload, dict):
+            raise SessionError(400, "Expected a JSON object")
+        session = self._session_for_ingest(name)
+
+        data = {}
+        for field in INGEST_FIELDS:
+            value = payload.get(field)
+            if isinstance(value, str):
+                value = value[:MAX_FIELD_LENGTH]
+            elif field == "playing":
+                value = bool(value)
+            elif value is not None:
+                value = str(value)[:MAX_FIELD_LENGTH]
+            if value is not None:
+                data[field] = value
+        data.setdefault("playing", False)
+
+        with session.lock:
+            previous, _ = session.track_state.get()
+            if TOPIC_TRACK in TrackState.changed_topics(previous, data):
+                # A new song; the previous cover no longer applies
+                session.artwork = None
+            elif session.artwork is not None:
+                data["artworkPath"] = previous.get("artworkPath")
+            session.track_state.update(data)
+            return session.track_state.get()[1]
+
+    def set_artwork(self, name, body, content_type):
+        """Store the cover for the session's current track. Returns the new version."""
+        content_type = (content_type or "").split(";")[0].strip().lower()
+        if content_type not in ARTWORK_TYPES:
+            raise SessionError(415, "Artwork must be image/jpeg or image/png")
+        if not body:
+            raise SessionError(400, "Empty artwork")
+        session = self._session_for_ingest(name)
+
+        with session.lock:
+            snapshot, _ = session.track_state.get()
+            session.artwork = (body, content_type)
+            data = dict(snapshot or {"playing": False})
+            # Keyed on the content, so the URL never points at a different
+            # cover, even after the session expires or the server restarts
+            digest = hashlib.sha256(body).hexdigest()[:12]
+            data["artworkPath"] = f"/s/{name}/artwork?t={digest}"
+            session.track_state.update(data)
+            return session.track_state.get()[1]
+
+    def _sweep(self):
+        """Drop sessions that have been idle for longer than idle_timeout."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._swept_at < SWEEP_INTERVAL:
+                return
+            self._swept_at = now
+            expired = [name for name, session in self._sessions.items()
+                       if now - session.last_seen > self.idle_timeout]
+            sessions = [self._sessions.pop(name) for name in expired]
+            self.stats["expired"] += len(sessions)
+        for session in sessions:
+            session.expire()
+        if sessions:
+            print(f"Expired {len(sessions)} idle session(s)")
+
+    def snapshot(self):
+        """Summary for the status endpoint."""
+        with self._lock:
+            return dict(self.stats, active=len(self._sessions))
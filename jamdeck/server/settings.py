@@ -0,0 +1,98 @@
+# jamdeck/server/settings.py
+import os
+import json
+import hashlib
+from urllib.parse import urlsplit
+
+# Shared with the menu bar app (jamdeck.menubar.config); server options live
+# under the "server" key so the two sides don't step on each other.
+CONFIG_FILE = os.path.join(os.path.expanduser("~"), ".jamdeck_config.json")
+
+DEFAULT_SERVER_SETTINGS = {
+    "poll_interval": 3.0,  # seconds between background track queries
+    "history_capacity": 200,  # recently played entries kept for /history
+    "inline_css": False,  # inline overlay.css into overlay.html
+    "serve_bundle": False,  # serve the single-file overlay bundle for '/'
+    "artwork_folder": None,  # folder tree of album covers, indexed on startup
+    "artwork_secondary_url": None,  # URL template tried after iTunes
+    "ingest_token": None,  # shared token enabling /ingest/<session>; off if unset
+    "max_sessions": 500,  # remote sessions kept at once
+    "session_idle_timeout": 600,  # seconds before a silent session is dropped
+    "webhooks": [],  # URLs (or {"url", "topics", "secret"}) to POST track changes to
+    "client_rate": 10.0,  # requests per second allowed per client (overlay page)
+    "client_burst": 30,  # requests a client may make at once before being limited
+    "max_concurrent_requests": 32,  # requests handled at once before shedding load
+    "request_deadline": 2.0,  # seconds a /nowplaying poll waits for the provider
+    "relay_upstream": None,  # base URL of a Jam Deck server to mirror instead of Music
+}
+
+# Shown in place of secrets when settings are logged or returned to callers
+REDACTED = "<redacted>"
+# Settings holding URLs that may carry a token in the path or query
+URL_SETTINGS = ("artwork_secondary_url", "relay_upstream")
+
+def redact_url(url):
+    """Reduce url to its scheme, host and port for logs and status output.
+
+    Webhook URLs often carry their token in the path (Discord and Slack
+    ones do), so any path or query is replaced by a short hash. The same
+    URL always gets the same label, without the label giving it away.
+    """
+    url = str(url)
+    try:
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+        if parts.port:
+            host += f":{parts.port}"
+    except ValueError:
+        host = ""
+    digest = hashlib.sha256(url.encode()).hexdigest()[:8]
+    if not host:
+        return f"<{digest}>"
+    origin = f"{parts.scheme}://{host}"
+    if parts.path.strip("/") or parts.query or parts.fragment:
+        return f"{origin}/<{digest}>"
+    return origin
+
+def _redact_webhook(entry):
+    if isinstance(entry, dict):
+        entry = dict(entry)
+        if "url" in entry:
+            entry["url"] = redact_url(entry["url"])
+        if entry.get("secret"):
+            entry["secret"] = REDACTED
+        return entry
+    return redact_url(entry)
+
+def redact_settings(settings):
+    """A copy of settings that is safe to print or send back to a caller.
+
+    The ingest token and webhook secrets are replaced by REDACTED, and
+    URLs that could carry a token are shortened with redact_url().
+    """
+    redacted = dict(settings)
+    if redacted.get("ingest_token"):
+        redacted["ingest_token"] = REDACTED
+    for key in URL_SETTINGS:
+        if redacted.get(key):
+            redacted[key] = redact_url(redacted[key])
+    webhooks = redacted.get("webhooks")
+    if isinstance(webhooks, list):
+        redacted["webhooks"] = [_redact_webhook(entry) for entry in webhooks]
+    elif webhooks:
+        redacted["webhooks"] = REDACTED
+    return redacted
+
+def load_server_settings(config_file=CONFIG_FILE):
+    """Load the server section of the config file merged over the defaults."""
+    settings = dict(DEFAULT_SERVER_SETTINGS)
+    try:
+        if os.path.exists(config_file):
+            with open(config_file, "r") as f:
+                config = json.load(f)
+            server_config = config.get("server", {})
+            if isinstance(server_config, dict):
+                settings.update(server_config)
+    except Exception as e:
+        print(f"Warning: Could not load server settings: {e}. Using defaults.")
+    return settings
@@ -0,0 +1,151 @@
+# jamdeck/server/snapshot.py
+import os
+import json
+import time
+import shutil
+import threading
+
+STATE_FILE = os.path.join(os.path.expanduser("~"), ".jamdeck_state.json")
+# Copy of the artwork file, which lives in /tmp and may not survive a reboot
+STATE_ARTWORK_FILE = os.path.join(os.path.expanduser("~"), ".jamdeck_state_cover.jpg")
+# How often a changed state is written while running
+SNAPSHOT_INTERVAL = 30  # seconds
+# Older track snapshots aren't shown on start, only the caches are restored
+RESTORE_MAX_AGE = 3600  # seconds
+
+class StateSnapshot:
+    """Save the server's warm state to disk and restore it on start.
+
+    Covers the last TrackState snapshot, the artwork file and
+    ArtworkManager's lookup caches. It is saved every SNAPSHOT_INTERVAL
+    seconds when something changed, and on shutdown. On start the track
+    is restored marked "stale": true, so /nowplaying can answer right
+    away with the last known state while the first real query runs.
+    That query always notifies TrackState listeners, even when the same
+    track is still playing, so history, webhooks and the feed pick up
+    where they left off.
+    """
+
+    def __init__(self, track_state, artwork_manager, path=STATE_FILE, artwork_copy=STATE_ARTWORK_FILE,
+                 interval=SNAPSHOT_INTERVAL):
+        self.track_state = track_state
+        self.artwork_manager = artwork_manager
+        self.path = path
+        self.artwork_copy = artwork_copy
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_caches = None   # cache sizes at the last save
+        # When the restored track was really current, so re-saving it
+        # before the first fresh query doesn't make it look new
+        self._restored_track_at = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def on_track_change(self, topics, snapshot):
+        """TrackState listener: remember that there is something to save."""
+        self._dirty = True
+
+    # --- Restore ---
+
+    def restore(self):
+        """Load the last saved state. Returns True if a track was restored."""
+        try:
+            if not os.path.exists(self.path):
+                return False
+            with open(self.path, "r") as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load saved state: {e}")
+            return False
+
+        artwork_path = self.artwork_manager.artwork_path
+        if not os.path.exists(artwork_path) and os.path.exists(self.artwork_copy):
+            try:
+                # copy2 keeps the mtime, which the artworkPath cache key is based on
+                shutil.copy2(self.artwork_copy, artwork_path)
+            except OSError as e:
+                print(f"Warning: Could not restore artwork: {e}")
+        self.artwork_manager.restore_state(state.get("artwork") or {})
+        self._saved_caches = self._cache_sizes()
+
+        track = state.get("track")
+        track_at = state.get("trackAt", 0)
+        age = time.time() - track_at
+        if not isinstance(track, dict) or age > RESTORE_MAX_AGE:
+            return False
+        track = dict(track, stale=True)
+        if track.get("artworkPath") and not os.path.exists(artwork_path):
+            track.pop("artworkPath")
+        self._restored_track_at = track_at
+        self.track_state.update(track)
+        print(f"Restored last track from {age:.0f}s ago: {track.get('artist')} - {track.get('title')}")
+        return True
+
+    # --- Save ---
+
+    def _cache_sizes(self):
+        manager = self.artwork_manager
+        return len(manager.itunes_artwork_cache), len(manager.artwork_misses), manager.last_artwork_track
+
+    def save(self, force=False):
+        """Write the state if it changed since the last save (or always, with force)."""
+        with self._lock:
+            caches = self._cache_sizes()
+            if not (force or self._dirty or caches != self._saved_caches):
+                return False
+            self._dirty = False
+            snapshot, _ = self.track_state.get()
+            now = time.time()
+            state = {
+                "savedAt": now,
+                "track": snapshot,
+                "trackAt": self._restored_track_at if snapshot and snapshot.get("stale") else now,
+                "artwork": self.artwork_manager.export_state(),
+            }
+            try:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(state, f, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+                self._copy_artwork()
+            except OSError as e:
+                print(f"Warning: Could not save state: {e}")
+                return False
+            self._saved_caches = caches
+            return True
+
+    def _copy_artwork(self):
+        """Keep the artwork copy in step with the artwork file."""
+        artwork_path = self.artwork_manager.artwork_path
+        try:
+            mtime = os.path.getmtime(artwork_path)
+        except OSError:
+            return
+        try:
+            if os.path.getmtime(self.artwork_copy) == mtime:
+                return
+        except OSError:
+            pass
+        tmp_path = self.artwork_copy + ".tmp"
+        shutil.copy2(artwork_path, tmp_path)
+        os.replace(tmp_path, self.artwork_copy)
+
+    # --- Background saving ---
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="jamdeck-snapshot", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.save()
+
+    def close(self):
+        """Stop saving in the background and write the final state."""
+        self._stop_event.set()
+        self._thread = None
+        self.save(force=True)
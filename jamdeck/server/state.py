@@ -0,0 +1,113 @@
+# jamdeck/server/state.py
+import time
+import threading
+
+# Topics a TrackState change can touch
+TOPIC_TRACK = "track"      # title / artist / album changed
+TOPIC_ARTWORK = "artwork"  # artworkPath changed
+TOPIC_STATE = "state"      # playing flag or error changed
+TOPICS = (TOPIC_TRACK, TOPIC_ARTWORK, TOPIC_STATE)
+
+class TrackState:
+    """The latest now-playing snapshot, shared by everything that consumes it.
+
+    The provider calls update() with every query result. Listeners are only
+    notified when something actually changed, with the list of topics that
+    changed, so consumers can react to song changes without diffing
+    snapshots themselves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Signalled on every change, for wait_for_change()
+        self._changed = threading.Condition(self._lock)
+        self._closed = False
+        self._listeners = []
+        self.snapshot = None   # dict in the same shape as the /nowplaying JSON
+        self.updated_at = None
+        self.version = 0       # bumped on every change
+
+    def add_listener(self, callback):
+        """Register callback(topics, snapshot) to be called on changes."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def get(self):
+        """Return (snapshot, version) as a consistent pair."""
+        with self._lock:
+            return self.snapshot, self.version
+
+    def fresh(self, max_age):
+        """Return the snapshot if a query updated it in the last max_age
+        seconds, else None. Snapshots restored from disk never count.
+        """
+        with self._lock:
+            snapshot = self.snapshot
+            if (snapshot is None or snapshot.get("stale") or self.updated_at is None
+                    or time.time() - self.updated_at > max_age):
+                return None
+            return snapshot
+
+    def wait_for_change(self, since, timeout):
+        """Block until the version differs from since, or timeout.
+
+        Returns (snapshot, version) like get(). Used for long-polling
+        readers; close() releases them early.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != since or self._closed, timeout)
+            return self.snapshot, self.version
+
+    def close(self):
+        """Release every wait_for_change() caller now and from now on."""
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+    @staticmethod
+    def changed_topics(previous, current):
+        """Work out which topics differ between two snapshots.
+
+        A snapshot restored from disk ("stale": true) is not a baseline:
+        the first fresh one counts as a change on every topic, even for
+        the same track, so listeners that started after the restore hear
+        about it.
+        """
+        if previous is None or (previous.get("stale") and not current.get("stale")):
+            return list(TOPICS)
+
+        topics = []
+        if any(previous.get(k) != current.get(k) for k in ("title", "artist", "album")):
+            topics.append(TOPIC_TRACK)
+        if previous.get("artworkPath") != current.get("artworkPath"):
+            topics.append(TOPIC_ARTWORK)
+        if any(previous.get(k) != current.get(k) for k in ("playing", "error")):
+            topics.append(TOPIC_STATE)
+        return topics
+
+    def update(self, data):
+        """Record a new snapshot and notify listeners if it changed.
+
+        Returns the list of changed topics (empty if nothing changed).
+        """
+        with self._lock:
+            topics = self.changed_topics(self.snapshot, data)
+            self.snapshot = data
+            self.updated_at = time.time()
+            if not topics:
+                return topics
+            self.version += 1
+            self._changed.notify_all()
+            listeners = list(self._listeners)
+
+        for callback in listeners:
+            try:
+                callback(topics, data)
+            except Exception as e:
+                print(f"TrackState listener error: {e}")
+        return topics
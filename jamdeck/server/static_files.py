@@ -0,0 +1,94 @@
+# jamdeck/server/static_files.py
+import os
+
+# Overlay pages, stylesheets and scripts served from the resources directory
+TEXT_TYPES = {
+    '.html': 'text/html',
+    '.css': 'text/css',
+    '.js': 'text/javascript',
+}
+FONT_TYPES = {
+    '.ttf': 'font/ttf',
+    '.otf': 'font/otf',
+    '.woff': 'font/woff',
+    '.woff2': 'font/woff2',
+}
+IMAGE_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.svg': 'image/svg+xml',
+}
+
+# Cache policies. Overlay files are revalidated on every load so edits show
+# up at once; fonts and images rarely change.
+TEXT_CACHE_CONTROL = 'no-cache, must-revalidate'
+ASSET_CACHE_CONTROL = 'max-age=86400'  # 24 hours
+
+class StaticFile:
+    """A servable file: where it is, its MIME type and its cache policy."""
+
+    __slots__ = ('path', 'content_type', 'cache_control', 'kind')
+
+    def __init__(self, path, content_type, cache_control, kind):
+        self.path = path
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.kind = kind    # 'text', 'font' or 'image'
+
+class StaticFileIndex:
+    """Map every URL the server may serve from disk to a resolved file.
+
+    Built once at startup (and on reload_config) by listing the overlay
+    files in the resources directory and the files in assets/fonts and
+    assets/images. Each path is resolved with realpath while building,
+    and anything that resolves outside its directory is left out, so at
+    request time path traversal protection is just a dictionary miss.
+
+    Files added later are picked up by the next build(); edits to indexed
+    files are served straight away since they are opened per request.
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.files = {}
+
+    def build(self):
+        files = {}
+        real_root = os.path.realpath(self.root_dir)
+        self._add_dir(files, real_root, '/', TEXT_TYPES, TEXT_CACHE_CONTROL, 'text')
+        self._add_dir(files, os.path.join(real_root, 'assets', 'fonts'), '/assets/fonts/',
+                      FONT_TYPES, ASSET_CACHE_CONTROL, 'font')
+        self._add_dir(files, os.path.join(real_root, 'assets', 'images'), '/assets/images/',
+                      IMAGE_TYPES, ASSET_CACHE_CONTROL, 'image')
+        if '/overlay.html' in files:
+            files['/'] = files['/overlay.html']
+        self.files = files
+        return len(files)
+
+    @staticmethod
+    def _add_dir(files, directory, url_prefix, types, cache_control, kind):
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return
+        real_dir = os.path.realpath(directory)
+        for name in names:
+            content_type = types.get(os.path.splitext(name)[1].lower())
+            if content_type is None:
+                continue
+            path = os.path.realpath(os.path.join(directory, name))
+            # Skip subdirectories and symlinks leading out of the directory
+            if os.path.dirname(path) != real_dir or not os.path.isfile(path):
+                continue
+            files[url_prefix + name] = StaticFile(path, content_type, cache_control, kind)
+
+    def lookup(self, url_path):
+        """The StaticFile for url_path, or None if it isn't servable."""
+        entry = self.files.get(url_path)
+        if entry is None and url_path.endswith(('.html', '.css', '.js')):
+            # Overlay files were always served by name from any directory
+            # (e.g. '/scenes/overlay.js'); keep that working
+            entry = self.files.get('/' + url_path.rsplit('/', 1)[-1])
+        return entry
@@ -0,0 +1,286 @@
+# jamdeck/server/trace.py
+"""Record the provider's raw inputs and replay them deterministically.
+
+A trace is a gzipped JSON-lines file. Each line is one event with its
+offset in seconds from the start of the recording:
+
+    {"t": 12.031, "kind": "query"}
+    {"t": 12.032, "kind": "running", "running": true}
+    {"t": 12.033, "kind": "applescript", "duration": 0.41, "stdout": "true|||...", ...}
+    {"t": 12.450, "kind": "itunes", "url": "...", "status": 200, "body": "...", "duration": 0.2}
+    {"t": 12.660, "kind": "download", "url": "...", "size": 48213, "duration": 0.1}
+    {"t": 12.661, "kind": "artwork_mtime", "mtime": 1760870000}
+
+Replaying feeds the recorded AppleScript output back through
+AppleMusicProvider's parsing, and the recorded iTunes answers through
+ArtworkManager, with the recorded latencies (optionally sped up), so
+timing-dependent bugs can be reproduced and benchmarked without a Mac.
+The breaker and artwork retry pauses follow the recording's clock,
+resolver budgets are scaled by the replay speed, and artworkPath keys
+come from the recording, so replays of a trace give the same results:
+
+    python -m jamdeck.server.trace /tmp/jamdeck-traces/trace-....jsonl.gz --speed 10
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import threading
+import subprocess
+from collections import defaultdict, deque
+
+from jamdeck.server.apple_music import AppleMusicProvider
+from jamdeck.server.breaker import CircuitBreaker
+from jamdeck.server.artwork import ArtworkManager
+from jamdeck.server.itunes import ITunesScheduler, DEFAULT_RATE
+from jamdeck.server.defaults import TRACE_DIR
+
+class TraceRecorder:
+    """Append provider events to a trace file; safe to call from any thread."""
+
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            path = os.path.join(TRACE_DIR, time.strftime("trace-%Y%m%d-%H%M%S.jsonl.gz"))
+        self.path = path
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.events = 0
+        print(f"Recording provider trace to {path}")
+
+    def record(self, kind, **fields):
+        event = {"t": round(time.monotonic() - self._started, 4), "kind": kind}
+        event.update(fields)
+        if "duration" in event:
+            event["duration"] = round(event["duration"], 4)
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+                self.events += 1
+
+    def traced_fetch(self, fetch):
+        """Wrap an ITunesScheduler fetch(url) so its answers are recorded."""
+        def traced(url):
+            started = time.monotonic()
+            try:
+                status, body = fetch(url)
+            except Exception as e:
+                self.record("itunes", url=url, duration=time.monotonic() - started, error=str(e))
+                raise
+            self.record("itunes", url=url, duration=time.monotonic() - started, status=status, body=body)
+            return status, body
+        return traced
+
+    def traced_download(self, download):
+        """Wrap an artwork download(url, budget); only the image size is kept."""
+        def traced(url, budget):
+            started = time.monotonic()
+            try:
+                data = download(url, budget)
+            except Exception as e:
+                self.record("download", url=url, duration=time.monotonic() - started, error=str(e))
+                raise
+            self.record("download", url=url, duration=time.monotonic() - started,
+                        size=len(data) if data else None)
+            return data
+        return traced
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                print(f"Provider trace closed: {self.events} events in {self.path}")
+
+def load_trace(path):
+    """Read a trace file into a list of events."""
+    events = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                # A torn last line if the recording process was killed
+                continue
+    return events
+
+class TraceReplay:
+    """Serve recorded answers back, in recorded order, at the recorded pace.
+
+    AppleScript runs and Music running checks are consumed in order. iTunes
+    answers and downloads are matched by URL (in order per URL), since
+    hedged lookups may ask in a different order than when recorded.
+    """
+
+    def __init__(self, events, speed=1.0):
+        self.speed = speed
+        self.queries = [e["t"] for e in events if e["kind"] == "query"]
+        self._running = deque(e for e in events if e["kind"] == "running")
+        self._scripts = deque(e for e in events if e["kind"] == "applescript")
+        self._mtimes = deque(e["mtime"] for e in events if e["kind"] == "artwork_mtime")
+        self._by_url = defaultdict(deque)
+        for e in events:
+            if e["kind"] in ("itunes", "download"):
+                self._by_url[(e["kind"], e["url"])].append(e)
+        self._lock = threading.Lock()
+        self.missing = 0    # lookups the trace had no answer for
+        # Replayed clock: the current query's recorded offset plus the
+        # recorded duration of its AppleScript run, whatever the speed
+        self._clock = 0.0
+
+    def start_query(self, offset):
+        with self._lock:
+            self._clock = offset
+
+    def now(self):
+        """Seconds on the recording's clock; a clock() for breaker and artwork pauses."""
+        with self._lock:
+            return self._clock
+
+    def _sleep(self, event):
+        if self.speed > 0:
+            time.sleep(event.get("duration", 0) / self.speed)
+
+    def _next_for_url(self, kind, url):
+        with self._lock:
+            answers = self._by_url.get((kind, url))
+            if not answers:
+                self.missing += 1
+                return None
+            # Reuse the last answer if asked more often than recorded
+            return answers.popleft() if len(answers) > 1 else answers[0]
+
+    def is_running(self):
+        with self._lock:
+            event = self._running.popleft() if self._running else None
+        return bool(event and event["running"])
+
+    def run_applescript(self, artwork_path):
+        with self._lock:
+            event = self._scripts.popleft() if self._scripts else None
+        if event is None:
+            return "", "trace exhausted"
+        self._sleep(event)
+        with self._lock:
+            self._clock += event.get("duration", 0)
+        if event.get("timeout"):
+            raise subprocess.TimeoutExpired("osascript", 5)
+        if event.get("artwork_size"):
+            # Stand in for the artwork the script wrote
+            with open(artwork_path, "wb") as f:
+                f.write(b"\0" * event["artwork_size"])
+        return event.get("stdout", ""), event.get("stderr", "")
+
+    def artwork_mtime(self):
+        """The recorded mtime of the next artworkPath (0 if not recorded)."""
+        with self._lock:
+            if self._mtimes:
+                return self._mtimes.popleft()
+            self.missing += 1
+            return 0
+
+    def fetch(self, url):
+        event = self._next_for_url("itunes", url)
+        if event is None:
+            raise OSError("not in trace")
+        self._sleep(event)
+        if "error" in event:
+            raise OSError(event["error"])
+        return event["status"], event["body"]
+
+    def download(self, url, budget):
+        event = self._next_for_url("download", url)
+        if event is None:
+            raise OSError("not in trace")
+        self._sleep(event)
+        if "error" in event:
+            raise OSError(event["error"])
+        return b"\0" * event["size"] if event.get("size") else None
+
+class ReplayProvider(AppleMusicProvider):
+    """AppleMusicProvider answering from a TraceReplay instead of osascript."""
+
+    def __init__(self, replay, artwork_manager, artwork_path, **kwargs):
+        kwargs.setdefault("breaker", CircuitBreaker(clock=replay.now))
+        super().__init__(artwork_manager, artwork_path=artwork_path, is_running=replay.is_running, **kwargs)
+        self.replay = replay
+
+    def _run_applescript(self, script):
+        return self.replay.run_applescript(self.artwork_path)
+
+    def _artwork_timestamp(self):
+        # The file was just written by the replay; use the recorded mtime
+        if not os.path.exists(self.artwork_path):
+            raise FileNotFoundError(self.artwork_path)
+        return self.replay.artwork_mtime()
+
+def replay_trace(path, speed=1.0, on_result=None):
+    """Replay a trace through a fresh provider and artwork manager.
+
+    Queries are issued at their recorded offsets divided by speed
+    (speed 0 runs them back to back with no simulated latency).
+    Returns a list of (offset, result dict, seconds the query took).
+    """
+    replay = TraceReplay(load_trace(path), speed)
+    work_dir = tempfile.mkdtemp(prefix="jamdeck-replay-")
+    try:
+        artwork_path = os.path.join(work_dir, "cover.jpg")
+        # Token refill keeps pace with the replay clock
+        rate = DEFAULT_RATE * speed if speed > 0 else 1e6
+        scheduler = ITunesScheduler(rate=rate, fetch=replay.fetch)
+        artwork_manager = ArtworkManager(artwork_path=artwork_path, itunes_scheduler=scheduler,
+                                         cache_dir=os.path.join(work_dir, "cache"), download=replay.download,
+                                         clock=replay.now, time_scale=speed)
+        provider = ReplayProvider(replay, artwork_manager, artwork_path)
+
+        results = []
+        started = time.monotonic()
+        first = replay.queries[0] if replay.queries else 0
+        for offset in replay.queries:
+            if speed > 0:
+                delay = (offset - first) / speed - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            replay.start_query(offset - first)
+            query_started = time.monotonic()
+            data = json.loads(provider.get_apple_music_track())
+            result = (round(offset - first, 3), data, time.monotonic() - query_started)
+            results.append(result)
+            if on_result is not None:
+                on_result(*result)
+        if replay.missing:
+            print(f"Warning: {replay.missing} lookups had no recorded answer", file=sys.stderr)
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a Jam Deck provider trace")
+    parser.add_argument("trace", help="Trace file recorded with music_server.py --trace")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Replay speed multiplier (default: 1 = real time, 0 = as fast as possible)")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout
+
+    def emit(offset, data, took):
+        out.write(json.dumps({"t": offset, "took_ms": round(took * 1000, 1), "result": data}) + "\n")
+
+    # The provider logs to stdout; keep stdout for one JSON line per query
+    started = time.monotonic()
+    with contextlib.redirect_stdout(sys.stderr):
+        results = replay_trace(args.trace, args.speed, on_result=emit)
+    took = sorted(r[2] for r in results)
+    if took:
+        print(f"{len(took)} queries in {time.monotonic() - started:.2f}s; "
+              f"p50 {took[len(took) // 2] * 1000:.1f}ms, max {took[-1] * 1000:.1f}ms", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
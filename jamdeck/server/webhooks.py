@@ -0,0 +1,185 @@
+# jamdeck/server/webhooks.py
+import hmac
+import json
+import time
+import hashlib
+import threading
+import subprocess
+
+from jamdeck.server.state import TOPICS, TOPIC_TRACK
+from jamdeck.server.settings import redact_url
+
+# Per-delivery timeout
+WEBHOOK_TIMEOUT = 5  # seconds
+# Retry backoff for failed deliveries, doubled up to the maximum
+WEBHOOK_RETRY = 1.0
+WEBHOOK_RETRY_MAX = 60.0
+# Attempts per event before it is dropped
+WEBHOOK_MAX_ATTEMPTS = 5
+# Snapshot fields included in each event
+EVENT_FIELDS = ("playing", "title", "artist", "album", "artworkPath", "error")
+
+class WebhookEndpoint:
+    """One webhook receiver, with its own delivery thread.
+
+    Holds at most one pending event: a newer event replaces one that
+    hasn't been sent yet (it is "coalesced"), so a slow or failing
+    receiver gets the latest state when it catches up instead of a
+    backlog. Failed deliveries are retried with exponential backoff;
+    a newer event waiting by then is sent instead of the retry.
+    """
+
+    def __init__(self, url, topics=None, secret=None, timeout=WEBHOOK_TIMEOUT, send=None, retry=WEBHOOK_RETRY):
+        self.url = url
+        # For logs and status; the URL itself may contain a token
+        self.label = redact_url(url)
+        self.topics = set(topics or TOPICS)
+        # Signs each body with HMAC-SHA256 (X-JamDeck-Signature) when set
+        self.secret = secret
+        self.timeout = timeout
+        # send(url, body, headers) -> HTTP status; replaceable for testing
+        self.send = send or self._curl_send
+        # First retry delay, doubled up to WEBHOOK_RETRY_MAX
+        self.retry = retry
+        self.stats = {"delivered": 0, "failed": 0, "retries": 0, "coalesced": 0, "dropped": 0}
+        self._cond = threading.Condition()
+        self._pending = None
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="jamdeck-webhook", daemon=True)
+        self._thread.start()
+
+    def offer(self, event):
+        """Queue event for delivery without blocking."""
+        with self._cond:
+            if self._pending is not None:
+                self.stats["coalesced"] += 1
+            self._pending = event
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _take(self):
+        """Wait for the next event; None once stopped."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending is not None or self._stopped)
+            if self._stopped:
+                return None
+            event, self._pending = self._pending, None
+            return event
+
+    def _run(self):
+        event = self._take()
+        attempts = 0
+        retry = self.retry
+        while event is not None:
+            attempts += 1
+            status = self._deliver(event)
+            if status is not None and 200 <= status < 300:
+                self.stats["delivered"] += 1
+            elif attempts < WEBHOOK_MAX_ATTEMPTS and (status is None or status >= 500 or status in (408, 429)):
+                self.stats["retries"] += 1
+                with self._cond:
+                    self._cond.wait_for(lambda: self._stopped, retry)
+                    if self._stopped:
+                        return
+                    if self._pending is not None:
+                        # Something newer arrived meanwhile; send that instead
+                        self.stats["coalesced"] += 1
+                        event, self._pending = self._pending, None
+                        attempts = 0
+                retry = min(retry * 2, WEBHOOK_RETRY_MAX)
+                continue
+            else:
+                # A 4xx other than 408/429 won't get better by retrying
+                self.stats["dropped"] += 1
+                print(f"Webhook {self.label}: gave up on event {event['seq']} (status {status})")
+            event = self._take()
+            attempts = 0
+            retry = self.retry
+
+    def _deliver(self, event):
+        """POST one event; returns the HTTP status, or None on network errors."""
+        body = json.dumps(event, separators=(",", ":")).encode()
+        headers = {"Content-Type": "application/json", "X-JamDeck-Event": event["event"]}
+        if self.secret:
+            digest = hmac.new(str(self.secret).encode(), body, hashlib.sha256).hexdigest()
+            headers["X-JamDeck-Signature"] = f"sha256={digest}"
+        try:
+            status = self.send(self.url, body, headers)
+        except Exception as e:
+            print(f"Webhook {self.label}: {e}")
+            status = None
+        if status is None or not 200 <= status < 300:
+            self.stats["failed"] += 1
+        return status
+
+    def _curl_send(self, url, body, headers):
+        """POST body with curl (consistent with the rest of the server's network calls)."""
+        command = ['curl', '-s', '--globoff', '-o', '/dev/null', '-w', '%{http_code}', '--max-time', str(self.timeout),
+                   '-X', 'POST', '--data-binary', '@-']
+        for name, value in headers.items():
+            command += ['-H', f'{name}: {value}']
+        result = subprocess.run(command + [url], input=body, capture_output=True, timeout=self.timeout + 2)
+        if result.returncode != 0:
+            raise OSError(f"curl exited with {result.returncode}")
+        return int(result.stdout)
+
+class WebhookDispatcher:
+    """Send TrackState changes to configured webhook endpoints.
+
+    Registered as a TrackState listener. on_track_change() only hands the
+    event to each endpoint's delivery thread, so a slow receiver never
+    holds up the poller or a request thread. Endpoints are configured by
+    the "webhooks" server setting: a list of URLs, or of objects with
+    "url" and optional "topics" (track, artwork, state) and "secret".
+    """
+
+    def __init__(self, config=None):
+        self._lock = threading.Lock()
+        self.endpoints = []
+        self.seq = 0
+        self.configure(config or [])
+
+    def configure(self, config):
+        """Replace the endpoints with those in config."""
+        endpoints = []
+        for entry in config:
+            if isinstance(entry, str):
+                entry = {"url": entry}
+            if not isinstance(entry, dict) or not entry.get("url"):
+                print(f"Ignoring invalid webhook entry: {entry!r}")
+                continue
+            endpoints.append(WebhookEndpoint(entry["url"], topics=entry.get("topics"), secret=entry.get("secret")))
+        with self._lock:
+            old, self.endpoints = self.endpoints, endpoints
+        for endpoint in old:
+            endpoint.stop()
+
+    def on_track_change(self, topics, snapshot):
+        """TrackState listener: queue an event for every interested endpoint."""
+        with self._lock:
+            endpoints = self.endpoints
+            if not endpoints:
+                return
+            self.seq += 1
+            event = {
+                "event": "track.changed" if TOPIC_TRACK in topics else "track.updated",
+                "topics": list(topics),
+                "seq": self.seq,
+                "ts": round(time.time(), 3),
+                "track": {k: snapshot.get(k) for k in EVENT_FIELDS},
+            }
+        for endpoint in endpoints:
+            if endpoint.topics.intersection(topics):
+                endpoint.offer(event)
+
+    def snapshot(self):
+        """Per-endpoint delivery counters, for the status endpoint."""
+        with self._lock:
+            return {endpoint.label: dict(endpoint.stats) for endpoint in self.endpoints}
+
+    def close(self):
+        self.configure([])
@@ -8,15 +8,41 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from jamdeck import VERSION
-from jamdeck.server.runner import run_server
+from jamdeck.server.runner import run_server, install_signal_handlers
+from jamdeck.server.publisher import DEFAULT_PUB_ENDPOINT
+from jamdeck.server.control import DEFAULT_CONTROL_ENDPOINT
+from jamdeck.server.defaults import DEFAULT_PROFILE_DURATION, PROFILE_DIR, TRACE_DIR
 
 if __name__ == '__main__':
     # --- Argument Parsing ---
     parser = argparse.ArgumentParser(description="Jam Deck Music Server")
     parser.add_argument('--port', type=int, help='Preferred port number to start the server on.')
+    parser.add_argument('--pub-endpoint', default=DEFAULT_PUB_ENDPOINT,
+                        help=f'ZMQ endpoint for the track-change feed (default: {DEFAULT_PUB_ENDPOINT}).')
+    parser.add_argument('--no-pub', action='store_true', help='Disable the ZMQ track-change feed.')
+    parser.add_argument('--control-endpoint', default=DEFAULT_CONTROL_ENDPOINT,
+                        help=f'ZMQ endpoint for the local control channel (default: {DEFAULT_CONTROL_ENDPOINT}).')
+    parser.add_argument('--no-control', action='store_true', help='Disable the local control channel.')
+    parser.add_argument('--profile', type=float, nargs='?', const=DEFAULT_PROFILE_DURATION, metavar='SECONDS',
+                        help=f'Profile the server for SECONDS after startup (default: {DEFAULT_PROFILE_DURATION}, '
+                             f'0 = until stopped) and write reports to {PROFILE_DIR}.')
+    parser.add_argument('--relay', metavar='URL',
+                        help='Mirror another Jam Deck server (e.g. http://music-mac.local:8080) instead of '
+                             'reading Apple Music on this machine.')
+    parser.add_argument('--trace', nargs='?', const='', metavar='FILE',
+                        help=f'Record raw Apple Music output and iTunes answers to FILE (default: a new file '
+                             f'in {TRACE_DIR}) for replay with "python -m jamdeck.server.trace".')
     args = parser.parse_args()
 
     # Force output buffering off for better debugging
     sys.stdout.reconfigure(line_buffering=True)
     print(f"Jam Deck v{VERSION} - Music Now Playing Server")
-    run_server(preferred_port=args.port)
+    install_signal_handlers()
+    run_server(
+        preferred_port=args.port,
+        pub_endpoint=None if args.no_pub else args.pub_endpoint,
+        control_endpoint=None if args.no_control else args.control_endpoint,
+        profile_duration=args.profile,
+        relay_url=args.relay,
+        trace_path=args.trace,
+    )
@@ -0,0 +1,135 @@
+// Service worker for the Jam Deck overlay.
+//
+// OBS reloads browser sources on every scene switch and studio-mode
+// transition. This worker answers the overlay's static files and artwork
+// from cache so those reloads don't all hit the local server:
+//   - Pages are fetched from the network first (they embed the current
+//     track), falling back to the cached copy if the server is busy/down.
+//   - CSS, JS, fonts and images are served from cache and revalidated in
+//     the background (stale-while-revalidate).
+//   - Artwork URLs are keyed by content (?t=<mtime>), so a cached copy never
+//     goes stale; the newest ARTWORK_CACHE_MAX are kept, least recently
+//     used first out.
+//   - Live data (/nowplaying, /history, /healthz, /debug/*, and remote
+//     sessions' /s/<session>/nowplaying) always goes to the network.
+
+// Bump to drop every cached static file after an incompatible change
+const CACHE_VERSION = 'v1';
+const STATIC_CACHE = `jamdeck-static-${CACHE_VERSION}`;
+const ARTWORK_CACHE = `jamdeck-artwork-${CACHE_VERSION}`;
+const ARTWORK_CACHE_MAX = 20;
+
+const NETWORK_ONLY_PATHS = ['/nowplaying', '/history', '/healthz'];
+
+self.addEventListener('install', () => {
+    // Take over from an older worker without waiting for every tab to close
+    self.skipWaiting();
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(
+                names
+                    .filter(name => name.startsWith('jamdeck-') && name !== STATIC_CACHE && name !== ARTWORK_CACHE)
+                    .map(name => caches.delete(name))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin ||
+        NETWORK_ONLY_PATHS.includes(url.pathname) ||
+        url.pathname.startsWith('/debug/') ||
+        url.pathname === '/overlay-sw.js') {
+        return;
+    }
+
+    if (url.pathname.startsWith('/s/')) {
+        // Remote session artwork is content-keyed like /artwork; the rest is live
+        if (url.pathname.endsWith('/artwork') && url.searchParams.has('t')) {
+            event.respondWith(artworkFromCache(request));
+        }
+    } else if (url.pathname === '/artwork') {
+        // Without a content key the URL can't be cached safely
+        if (url.searchParams.has('t')) {
+            event.respondWith(artworkFromCache(request));
+        }
+    } else if (request.mode === 'navigate') {
+        event.respondWith(networkFirst(request));
+    } else {
+        event.respondWith(staleWhileRevalidate(event, request));
+    }
+});
+
+function cacheResponse(cacheName, request, response) {
+    // Only keep complete, successful responses (no 206 partials)
+    if (response && response.status === 200) {
+        const copy = response.clone();
+        return caches.open(cacheName).then(cache => cache.put(request, copy)).then(() => response);
+    }
+    return Promise.resolve(response);
+}
+
+function networkFirst(request) {
+    return fetch(request)
+        .then(response => cacheResponse(STATIC_CACHE, request, response))
+        .catch(error => caches.match(request).then(cached => {
+            if (cached) {
+                return cached;
+            }
+            throw error;
+        }));
+}
+
+function staleWhileRevalidate(event, request) {
+    return caches.open(STATIC_CACHE).then(cache => cache.match(request).then(cached => {
+        const refresh = fetch(request)
+            .then(response => cacheResponse(STATIC_CACHE, request, response));
+
+        if (cached) {
+            // Answer now, update the cache for the next load
+            event.waitUntil(refresh.catch(() => {}));
+            return cached;
+        }
+        return refresh;
+    }));
+}
+
+function artworkFromCache(request) {
+    return caches.open(ARTWORK_CACHE).then(cache => cache.match(request).then(cached => {
+        if (cached) {
+            // Re-insert so the cache's key order tracks recency
+            return cache.delete(request)
+                .then(() => cache.put(request, cached.clone()))
+                .then(() => cached);
+        }
+        return fetch(request).then(response => {
+            if (!response || response.status !== 200) {
+                return response;
+            }
+            const copy = response.clone();
+            return cache.put(request, copy)
+                .then(() => trimCache(cache, ARTWORK_CACHE_MAX))
+                .then(() => response);
+        });
+    }));
+}
+
+function trimCache(cache, maxEntries) {
+    // keys() is in insertion order, so the front is least recently used
+    return cache.keys().then(keys => {
+        const excess = keys.length - maxEntries;
+        if (excess <= 0) {
+            return;
+        }
+        return Promise.all(keys.slice(0, excess).map(key => cache.delete(key)));
+    });
+}
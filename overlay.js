@@ -4,13 +4,15 @@
         // How often to check for updates (in milliseconds)
         const refreshInterval = 3000;
         
-        // API endpoint
-        const apiEndpoint = '/nowplaying';
+        // API endpoint (set once the URL parameters are read)
+        let apiEndpoint = '/nowplaying';
         
         // Keep track of previous state
         let previousState = null;
         let containerVisible = true;
         let errorCount = 0;
+        // Don't poll before this time (ms) after the server asked us to back off
+        let retryAfterUntil = 0;
         
         // Parse URL parameters
         function getUrlParams() {
@@ -30,12 +32,21 @@
                 params.scene = scene;
             }
             
+            // Get remote session parameter (track pushed to /ingest/<session>)
+            const session = urlParamsObj.get('session');
+            if (session) {
+                params.session = session;
+            }
+            
             return params;
         }
         
         // Get URL parameters
         const urlParams = getUrlParams();
         const currentScene = urlParams.scene || 'default';
+        if (urlParams.session) {
+            apiEndpoint = `/s/${encodeURIComponent(urlParams.session)}/nowplaying`;
+        }
         
         // Get scene-specific setting from localStorage with fallback
         function getSceneStorage(key, defaultValue) {
@@ -380,8 +391,122 @@
         }
 
         
+        // Render a /nowplaying result (or the snapshot embedded in the page)
+        function renderNowPlaying(data) {
+            // Only update the UI if the data has changed
+            if (JSON.stringify(data) !== JSON.stringify(previousState)) {
+                const container = document.getElementById('musicContainer');
+                
+                if (data.playing) {
+                    // Show container if hidden
+                    if (!containerVisible) {
+                        container.classList.remove('hidden');
+                        containerVisible = true;
+                    }
+                    
+                    // Animate if song changed
+                    if (!previousState || previousState.title !== data.title) {
+                        container.style.animation = 'none';
+                        container.offsetHeight; // Trigger reflow
+                        container.style.animation = 'fadeIn 0.5s ease-in-out';
+                    }
+                    
+                    const songTitleEl = document.getElementById('songTitle');
+                    const songArtistEl = document.getElementById('songArtist');
+                    
+                    const titleText = data.title;
+                    const artistAlbumText = data.artist + (data.album ? ` • ${data.album}` : '');
+                    
+                    songTitleEl.classList.remove('not-playing');
+                    
+                    // Update text using Marquee Controllers ONLY if text changed
+                    if (!previousState || titleText !== previousState.title) {
+                        if (debugMode) console.log(`[Main] Title changed: "${previousState?.title}" -> "${titleText}"`);
+                        songTitleMarquee.updateText(titleText);
+                    }
+                    
+                    const prevArtistAlbumText = (previousState?.artist || '') + (previousState?.album ? ` • ${previousState.album}` : '');
+                    if (!previousState || artistAlbumText !== prevArtistAlbumText) {
+                        if (debugMode) console.log(`[Main] Artist/Album changed: "${prevArtistAlbumText}" -> "${artistAlbumText}"`);
+                        songArtistMarquee.updateText(artistAlbumText);
+                    }
+                    
+                    // Update artwork
+                    const artworkContainer = document.getElementById('artworkContainer');
+                    const songChanged = !previousState || previousState.title !== data.title;
+                    
+                    if (data.artworkPath) {
+                        // Update artwork if the path changed OR if the song changed.
+                        // Checking song title as well guards against cases where a
+                        // queued track's art temporarily lands on disk with the same
+                        // mtime-based URL, which would otherwise get stuck showing
+                        // the wrong album art for the current track.
+                        if (songChanged || previousState.artworkPath !== data.artworkPath) {
+                            // Preload the new image first
+                            const newImg = new Image();
+                            newImg.onload = function() {
+                                artworkContainer.innerHTML = `<img src="${data.artworkPath}" alt="Album art">`;
+                                artworkContainer.className = 'album-art';
+                            };
+                            // Force a cache-busting reload when the song changes so the
+                            // browser doesn't serve a cached copy of the old artwork.
+                            newImg.src = songChanged
+                                ? data.artworkPath + '&song=' + encodeURIComponent(data.title)
+                                : data.artworkPath;
+                        }
+                    } else {
+                        // No artwork, show music note
+                        artworkContainer.innerHTML = '♪';
+                        artworkContainer.className = 'note-icon';
+                    }
+                    
+                    
+                } else {
+                    // Stop marquees and clear text if not playing or error
+                    songTitleMarquee.clear(); // Clear text and stop animation
+                    songArtistMarquee.clear(); // Clear text and stop animation
+
+                    // Check the specific error message
+                    if (data.error === "Music app not running") {
+                        // If Music app isn't running, hide the container completely
+                        if (containerVisible) {
+                            container.classList.add('hidden');
+                            containerVisible = false;
+                            if (debugMode) console.log("[Main] Music app not running, hiding container.");
+                        }
+                        // Ensure text is cleared (already done by .clear() above)
+                    } else if (data.error) {
+                        // For other errors, show "Music information unavailable"
+                        if (!containerVisible) { // Ensure container is visible for error message
+                            container.classList.remove('hidden');
+                            containerVisible = true;
+                        }
+                        songTitleMarquee.updateText("Music information unavailable"); 
+                        document.getElementById('songTitle').classList.add('not-playing');
+                        // Artist marquee already cleared by .clear() above
+                        
+                        if (debugMode) {
+                            showDebugError(`Server reports issue: ${data.error}`);
+                        }
+                    } else {
+                        // If simply not playing (no error), hide the container
+                        if (containerVisible) {
+                            container.classList.add('hidden');
+                            containerVisible = false;
+                            if (debugMode) console.log("[Main] Music not playing (no error), hiding container.");
+                        }
+                    }
+                }
+                
+                previousState = data;
+            }
+        }
+
         // Function to fetch and display song info
         function updateNowPlaying() {
+            if (Date.now() < retryAfterUntil) {
+                return;
+            }
             fetch(apiEndpoint + '?t=' + new Date().getTime(), {
                 method: 'GET',
                 headers: {
@@ -389,12 +514,23 @@
                 }
             })
             .then(response => {
+                const retryAfter = response.headers.get('Retry-After');
+                if ((response.status === 429 || response.status === 503) && retryAfter) {
+                    // Rate limited or busy: keep showing the last state and
+                    // poll again once the server says to
+                    retryAfterUntil = Date.now() + (parseInt(retryAfter, 10) || 1) * 1000;
+                    if (debugMode) console.log(`[Main] Server busy (${response.status}), retrying in ${retryAfter}s`);
+                    return null;
+                }
                 if (!response.ok) {
                     throw new Error(`Server returned ${response.status} ${response.statusText}`);
                 }
                 return response.text();
             })
             .then(text => {
+                if (text === null) {
+                    return;
+                }
                 // Make sure we have some content
                 if (!text || text.trim() === '') {
                     throw new Error('Empty response from server');
@@ -416,113 +552,7 @@
                         console.log("[Debug] Previous state:", JSON.stringify(previousState));
                     }
                     
-                    // Only update the UI if the data has changed
-                    if (JSON.stringify(data) !== JSON.stringify(previousState)) {
-                        const container = document.getElementById('musicContainer');
-                        
-                        if (data.playing) {
-                            // Show container if hidden
-                            if (!containerVisible) {
-                                container.classList.remove('hidden');
-                                containerVisible = true;
-                            }
-                            
-                            // Animate if song changed
-                            if (!previousState || previousState.title !== data.title) {
-                                container.style.animation = 'none';
-                                container.offsetHeight; // Trigger reflow
-                                container.style.animation = 'fadeIn 0.5s ease-in-out';
-                            }
-                            
-                            const songTitleEl = document.getElementById('songTitle');
-                            const songArtistEl = document.getElementById('songArtist');
-                            
-                            const titleText = data.title;
-                            const artistAlbumText = data.artist + (data.album ? ` • ${data.album}` : '');
-                            
-                            songTitleEl.classList.remove('not-playing');
-                            
-                            // Update text using Marquee Controllers ONLY if text changed
-                            if (!previousState || titleText !== previousState.title) {
-                                if (debugMode) console.log(`[Main] Title changed: "${previousState?.title}" -> "${titleText}"`);
-                                songTitleMarquee.updateText(titleText);
-                            }
-                            
-                            const prevArtistAlbumText = (previousState?.artist || '') + (previousState?.album ? ` • ${previousState.album}` : '');
-                            if (!previousState || artistAlbumText !== prevArtistAlbumText) {
-                                if (debugMode) console.log(`[Main] Artist/Album changed: "${prevArtistAlbumText}" -> "${artistAlbumText}"`);
-                                songArtistMarquee.updateText(artistAlbumText);
-                            }
-                            
-                            // Update artwork
-                            const artworkContainer = document.getElementById('artworkContainer');
-                            const songChanged = !previousState || previousState.title !== data.title;
-                            
-                            if (data.artworkPath) {
-                                // Update artwork if the path changed OR if the song changed.
-                                // Checking song title as well guards against cases where a
-                                // queued track's art temporarily lands on disk with the same
-                                // mtime-based URL, which would otherwise get stuck showing
-                                // the wrong album art for the current track.
-                                if (songChanged || previousState.artworkPath !== data.artworkPath) {
-                                    // Preload the new image first
-                                    const newImg = new Image();
-                                    newImg.onload = function() {
-                                        artworkContainer.innerHTML = `<img src="${data.artworkPath}" alt="Album art">`;
-                                        artworkContainer.className = 'album-art';
-                                    };
-                                    // Force a cache-busting reload when the song changes so the
-                                    // browser doesn't serve a cached copy of the old artwork.
-                                    newImg.src = songChanged
-                                        ? data.artworkPath + '&song=' + encodeURIComponent(data.title)
-                                        : data.artworkPath;
-                                }
-                            } else {
-                                // No artwork, show music note
-                                artworkContainer.innerHTML = '♪';
-                                artworkContainer.className = 'note-icon';
-                            }
-                            
-                            
-                        } else {
-                            // Stop marquees and clear text if not playing or error
-                            songTitleMarquee.clear(); // Clear text and stop animation
-                            songArtistMarquee.clear(); // Clear text and stop animation
-
-                            // Check the specific error message
-                            if (data.error === "Music app not running") {
-                                // If Music app isn't running, hide the container completely
-                                if (containerVisible) {
-                                    container.classList.add('hidden');
-                                    containerVisible = false;
-                                    if (debugMode) console.log("[Main] Music app not running, hiding container.");
-                                }
-                                // Ensure text is cleared (already done by .clear() above)
-                            } else if (data.error) {
-                                // For other errors, show "Music information unavailable"
-                                if (!containerVisible) { // Ensure container is visible for error message
-                                    container.classList.remove('hidden');
-                                    containerVisible = true;
-                                }
-                                songTitleMarquee.updateText("Music information unavailable"); 
-                                document.getElementById('songTitle').classList.add('not-playing');
-                                // Artist marquee already cleared by .clear() above
-                                
-                                if (debugMode) {
-                                    showDebugError(`Server reports issue: ${data.error}`);
-                                }
-                            } else {
-                                // If simply not playing (no error), hide the container
-                                if (containerVisible) {
-                                    container.classList.add('hidden');
-                                    containerVisible = false;
-                                    if (debugMode) console.log("[Main] Music not playing (no error), hiding container.");
-                                }
-                            }
-                        }
-                        
-                        previousState = data;
-                    }
+                    renderNowPlaying(data);
                     
                     // Hide any error messages
                     if (!debugMode) {
@@ -554,6 +584,24 @@
             console.log(`Width for this scene: ${savedWidth}`);
         }
         
+        // Paint the track the server embedded in the page, if any, so the
+        // first frame doesn't wait for a /nowplaying round trip
+        const initialStateEl = document.getElementById('initialState');
+        if (initialStateEl) {
+            try {
+                renderNowPlaying(JSON.parse(initialStateEl.textContent));
+            } catch (e) {
+                showDebugError('Invalid embedded track state', e);
+            }
+        }
+        
+        // Cache static files and artwork across browser source reloads
+        if ('serviceWorker' in navigator) {
+            navigator.serviceWorker.register('/overlay-sw.js').catch(error => {
+                showDebugError('Service worker registration failed', error);
+            });
+        }
+        
         // Update immediately and then at regular intervals
         updateNowPlaying();
         setInterval(updateNowPlaying, refreshInterval);
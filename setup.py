@@ -14,7 +14,7 @@ if os.path.exists(libffi_source) and not os.path.exists(libffi_dest):
 APP = ['app.py']
 DATA_FILES = [
     # Keep HTML, JS, and CSS at the top level for consistent path resolution
-    ('', ['overlay.html', 'overlay.js', 'overlay.css', 'music_server.py']),
+    ('', ['overlay.html', 'overlay.js', 'overlay.css', 'overlay-sw.js', 'music_server.py']),
     # Image assets - specify all directly to ensure they're included
     ('assets/images', ['assets/images/jamdeck.icns', 'assets/images/jamdeck-template.png']),
     # Font files with specific handling
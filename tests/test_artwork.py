@@ -0,0 +1,117 @@
+# tests/test_artwork.py
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+from jamdeck.server.artwork import ArtworkManager
+from jamdeck.server.itunes import ITunesScheduler, ITunesUnavailable
+
+class FallbackArtworkTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.fetches = []
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def manager(self, fetch):
+        def counted(url):
+            self.fetches.append(url)
+            return fetch(url)
+        return ArtworkManager(
+            artwork_path=os.path.join(self.work_dir, "cover.jpg"),
+            itunes_scheduler=ITunesScheduler(fetch=counted),
+            cache_dir=os.path.join(self.work_dir, "cache"),
+        )
+
+    def test_offline_lookups_are_skipped_for_a_while(self):
+        def offline(url):
+            raise OSError("network down")
+        manager = self.manager(offline)
+
+        self.assertFalse(manager.fetch_fallback_artwork("Artist", "Song", "Album"))
+        fetched = len(self.fetches)
+        started = time.monotonic()
+        for _ in range(10):
+            self.assertFalse(manager.fetch_fallback_artwork("Artist", "Song", "Album"))
+        # No waiting on the rate limiter, and no further searches
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(len(self.fetches), fetched)
+        self.assertEqual(manager.lookup_stats["unavailable"], 1)
+        # Not remembered as a real miss
+        self.assertNotIn("artist - song", manager.artwork_misses)
+
+    def test_unavailable_song_is_retried_after_the_pause(self):
+        def offline(url):
+            raise OSError("network down")
+        manager = self.manager(offline)
+        manager.fetch_fallback_artwork("Artist", "Song", "Album")
+        fetched = len(self.fetches)
+
+        # Pretend the retry time has passed
+        for key in manager.artwork_unavailable:
+            manager.artwork_unavailable[key] = 0
+        manager.fetch_fallback_artwork("Artist", "Song", "Album")
+        self.assertGreater(len(self.fetches), fetched)
+
+    def test_no_results_is_cached_as_a_miss(self):
+        manager = self.manager(lambda url: (200, json.dumps({"results": []})))
+        self.assertFalse(manager.fetch_fallback_artwork("Artist", "Song", "Album"))
+        fetched = len(self.fetches)
+        self.assertFalse(manager.fetch_fallback_artwork("Artist", "Song", "Album"))
+        self.assertEqual(len(self.fetches), fetched)
+        self.assertEqual(manager.lookup_stats["unavailable"], 0)
+        self.assertEqual(len(manager.artwork_misses), 1)
+
+class StubSearch:
+    """Stands in for ITunesScheduler: every song is found, slowly."""
+
+    def __init__(self):
+        self.searches = 0
+
+    def search(self, term, entity="song", limit=1):
+        self.searches += 1
+        time.sleep(0.001)
+        artist, _, title = term.partition(" song ")
+        return {"results": [{"artistName": "Artist", "trackName": f"Song {title}",
+                             "collectionName": "Album", "artworkUrl100": f"https://art.example/{title}.jpg"}]}
+
+class ConcurrentLookupTest(unittest.TestCase):
+    def test_stats_and_cache_stay_consistent(self):
+        work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.addCleanup(shutil.rmtree, work_dir, True)
+        manager = ArtworkManager(artwork_path=os.path.join(work_dir, "cover.jpg"), itunes_scheduler=StubSearch(),
+                                 cache_dir=os.path.join(work_dir, "cache"))
+        threads_count, per_thread, songs = 8, 50, 10
+
+        def look_up():
+            for i in range(per_thread):
+                self.assertIsNotNone(manager.find_itunes_artwork_url("Artist", f"Song {i % songs}", "Album"))
+
+        threads = [threading.Thread(target=look_up) for _ in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = manager.lookup_snapshot()
+        self.assertEqual(stats["lookups"], threads_count * per_thread)
+        self.assertEqual(stats["cache_hits"] + stats["matched"] + stats["misses"], stats["lookups"])
+        self.assertEqual(stats["misses"], 0)
+        self.assertEqual(len(manager.export_state()["itunes"]), songs)
+
+class ITunesSchedulerTest(unittest.TestCase):
+    def test_search_fails_fast_while_paused(self):
+        scheduler = ITunesScheduler(fetch=lambda url: (429, ""))
+        scheduler.paused_until = time.monotonic() + 60
+        started = time.monotonic()
+        with self.assertRaises(ITunesUnavailable):
+            scheduler.search("artist song", wait=5)
+        self.assertLess(time.monotonic() - started, 0.5)
+
+if __name__ == "__main__":
+    unittest.main()
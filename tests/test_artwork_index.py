@@ -0,0 +1,109 @@
+# tests/test_artwork_index.py
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+from jamdeck.server.artwork_index import ArtworkIndex
+
+class ArtworkIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.root = os.path.join(self.work_dir, "covers")
+        self.index_path = os.path.join(self.work_dir, "index.json")
+        os.makedirs(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def add_cover(self, rel):
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"cover")
+        return path
+
+    def index(self, refresh_interval=60):
+        return ArtworkIndex(self.root, self.index_path, refresh_interval)
+
+    def test_both_layouts(self):
+        folder = self.add_cover("Artist One - First Album/cover.jpg")
+        nested = self.add_cover("Artist Two/Second Album/Folder.PNG")
+        loose = self.add_cover("Artist Three - Third Album.jpg")
+        various = self.add_cover("Various Artists - Hits/front.jpg")
+        self.add_cover("Band A - Greatest Hits.jpg")
+        self.add_cover("Band B - Greatest Hits.jpg")
+        index = self.index()
+        index.refresh()
+
+        self.assertEqual(index.lookup("Artist One", "First Album"), folder)
+        self.assertEqual(index.lookup("Artist Two", "Second Album"), nested)
+        self.assertEqual(index.lookup("Artist Three", "Third Album"), loose)
+        # By album alone for compilations, unless the name is ambiguous
+        self.assertEqual(index.lookup("Some Singer", "Hits"), various)
+        self.assertIsNone(index.lookup("Band C", "Greatest Hits"))
+        self.assertIsNone(index.lookup("Artist One", None))
+
+    def test_rescan_only_lists_changed_folders(self):
+        self.add_cover("Artist/First Album/cover.jpg")
+        self.add_cover("Artist/Second Album/cover.jpg")
+        index = self.index()
+        self.assertEqual(index.refresh(), 4)   # root, Artist and both albums
+        self.assertEqual(index.refresh(), 0)
+
+        added = self.add_cover("Artist/Second Album/front.png")
+        os.remove(os.path.join(self.root, "Artist/Second Album/cover.jpg"))
+        # Make sure the mtime differs even on coarse-grained filesystems
+        album_dir = os.path.dirname(added)
+        os.utime(album_dir, (time.time(), os.stat(album_dir).st_mtime + 10))
+        self.assertEqual(index.refresh(), 1)
+        self.assertEqual(index.lookup("Artist", "Second Album"), added)
+
+        # The saved index carries the mtimes over to the next start
+        reloaded = self.index()
+        self.assertEqual(reloaded.lookup("Artist", "Second Album"), added)
+        self.assertEqual(reloaded.refresh(), 0)
+
+    def test_lookup_never_waits_for_a_scan(self):
+        known = self.add_cover("Artist - Known Album.jpg")
+        index = self.index(refresh_interval=0)
+        index.refresh()
+        added = self.add_cover("Artist - New Album.jpg")
+
+        # Hold up the next scan until the lookups below are done
+        release = threading.Event()
+        scan_dir = index._scan_dir
+
+        def slow_scan_dir(rel):
+            release.wait(5)
+            return scan_dir(rel)
+
+        index._scan_dir = slow_scan_dir
+        self.assertTrue(index.refresh_in_background())
+        self.assertFalse(index.refresh_in_background())
+
+        started = time.monotonic()
+        self.assertEqual(index.lookup("Artist", "Known Album"), known)
+        self.assertIsNone(index.lookup("Artist", "New Album"))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+        release.set()
+        with index._refresh_lock:
+            pass
+        self.assertEqual(index.lookup("Artist", "New Album"), added)
+
+    def test_stale_miss_starts_a_background_rescan(self):
+        index = self.index(refresh_interval=0)
+        index.refresh()
+        added = self.add_cover("Artist - New Album.jpg")
+
+        self.assertIsNone(index.lookup("Artist", "New Album"))
+        deadline = time.monotonic() + 5
+        while index.lookup("Artist", "New Album") is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(index.lookup("Artist", "New Album"), added)
+
+if __name__ == "__main__":
+    unittest.main()
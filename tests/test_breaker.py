@@ -0,0 +1,143 @@
+# tests/test_breaker.py
+import json
+import unittest
+import subprocess
+
+from jamdeck.server.apple_music import AppleMusicProvider, APPLESCRIPT_TIMEOUT_ERROR
+from jamdeck.server.breaker import CircuitBreaker, BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+class FakeMusic:
+    """Music.app as seen by the provider: running or not, hung or not."""
+
+    def __init__(self):
+        self.running = True
+        self.hung = False
+        self.scripts = 0
+
+    def is_running(self):
+        return self.running
+
+    def run_applescript(self):
+        self.scripts += 1
+        if self.hung:
+            raise subprocess.TimeoutExpired("osascript", 5)
+        return "false|||Not playing\n", ""
+
+class FakeProvider(AppleMusicProvider):
+    def __init__(self, music, breaker):
+        super().__init__(artwork_manager=None, breaker=breaker, is_running=music.is_running)
+        self.music = music
+
+    def _run_applescript(self, script):
+        return self.music.run_applescript()
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, base_delay=5, max_delay=20, clock=self.clock)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, BREAKER_CLOSED)
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, BREAKER_CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, BREAKER_OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_failed_probes_back_off_up_to_the_maximum(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        for delay in (5, 10, 20, 20):
+            self.clock.advance(delay - 0.1)
+            self.assertFalse(self.breaker.allow())
+            self.clock.advance(0.1)
+            self.assertTrue(self.breaker.allow())
+            self.assertEqual(self.breaker.state, BREAKER_HALF_OPEN)
+            # Only one probe at a time
+            self.assertFalse(self.breaker.allow())
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.snapshot()["retry_in"], 20)
+
+    def test_successful_probe_closes_and_resets_the_delay(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.advance(5)
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, BREAKER_CLOSED)
+        self.assertEqual(self.breaker.delay, 5)
+
+class ProviderBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.music = FakeMusic()
+        self.breaker = CircuitBreaker(failure_threshold=2, base_delay=5, max_delay=60, clock=self.clock)
+        self.provider = FakeProvider(self.music, self.breaker)
+
+    def query(self):
+        return json.loads(self.provider.get_apple_music_track())
+
+    def test_hung_music_opens_the_breaker_then_probes_with_backoff(self):
+        self.music.hung = True
+        self.assertEqual(self.query()["error"], APPLESCRIPT_TIMEOUT_ERROR)
+        self.assertEqual(self.query()["error"], APPLESCRIPT_TIMEOUT_ERROR)
+        self.assertEqual(self.query()["breaker"], BREAKER_OPEN)
+
+        # While open, polls don't run osascript at all
+        scripts = self.music.scripts
+        for _ in range(3):
+            self.clock.advance(1)
+            self.assertEqual(self.query()["error"], "Music app not responding")
+        self.assertEqual(self.music.scripts, scripts)
+
+        # The probe after the backoff hangs too: open again, for twice as long
+        self.clock.advance(2)
+        self.assertEqual(self.query()["error"], APPLESCRIPT_TIMEOUT_ERROR)
+        self.assertEqual(self.breaker.state, BREAKER_OPEN)
+        self.clock.advance(9)
+        self.query()
+        self.assertEqual(self.music.scripts, scripts + 1)
+
+        # Music recovers: the next probe closes the breaker
+        self.music.hung = False
+        self.clock.advance(1)
+        data = self.query()
+        self.assertIsNone(data["error"])
+        self.assertEqual(data["breaker"], BREAKER_CLOSED)
+        self.assertEqual(self.music.scripts, scripts + 2)
+
+    def test_absent_music_is_not_a_hang(self):
+        self.music.running = False
+        for _ in range(5):
+            data = self.query()
+            self.assertEqual(data["error"], "Music app not running")
+            self.assertEqual(data["breaker"], BREAKER_CLOSED)
+        self.assertEqual(self.music.scripts, 0)
+
+    def test_quitting_a_hung_music_closes_the_breaker(self):
+        self.music.hung = True
+        self.query()
+        self.query()
+        self.assertEqual(self.breaker.state, BREAKER_OPEN)
+        # Music is force-quit while the breaker is backing off
+        self.music.running = False
+        self.assertEqual(self.query()["error"], "Music app not responding")
+        self.clock.advance(5)
+        data = self.query()
+        self.assertEqual(data["error"], "Music app not running")
+        self.assertEqual(data["breaker"], BREAKER_CLOSED)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# tests/test_bundle.py
+import os
+import re
+import shutil
+import tempfile
+import threading
+import unittest
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+
+from jamdeck import get_resources_dir
+from jamdeck.server.bundle import (OverlayBundle, BUNDLE_SCRIPT_TAG, STYLESHEET_TAG, SCRIPT_TAG,
+                                   content_hash, minify_css, minify_js)
+from jamdeck.server.handler import MusicHandler
+from jamdeck.server.state import TrackState
+from jamdeck.server.static_files import StaticFileIndex
+
+HASHED_FONT_RE = re.compile(r"url\('(/assets/fonts/([^'?]+)\?v=([0-9a-f]+))'\)")
+
+class MinifyTest(unittest.TestCase):
+    def test_css(self):
+        css = "/* theme */\n.a  >  .b {\n    color : red;\n    margin: 0 auto;\n}\n\n.c:hover { top: 1px; }\n"
+        self.assertEqual(minify_css(css), ".a>.b{color :red;margin:0 auto}.c:hover{top:1px}")
+
+    def test_js(self):
+        js = "function f() {\n    // note\n\n    return 'http://x';  // keep\n}\n"
+        self.assertEqual(minify_js(js), "function f() {\nreturn 'http://x';  // keep\n}")
+
+class OverlayBundleTest(unittest.TestCase):
+    def setUp(self):
+        self.bundle = OverlayBundle(get_resources_dir())
+        self.assertTrue(self.bundle.build())
+        self.content = self.bundle.content.decode()
+
+    def test_stylesheet_and_script_are_inlined(self):
+        self.assertNotIn(STYLESHEET_TAG, self.content)
+        self.assertNotIn(SCRIPT_TAG, self.content)
+        self.assertEqual(self.content.count(BUNDLE_SCRIPT_TAG), 1)
+        self.assertLess(len(self.content), self.bundle.source_size)
+
+    def test_inlined_script_cannot_end_the_element(self):
+        work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.addCleanup(shutil.rmtree, work_dir, True)
+        sources = {
+            "overlay.html": f"<html><head>{STYLESHEET_TAG}</head><body>{SCRIPT_TAG}</body></html>",
+            "overlay.css": "body { color: red; }",
+            "overlay.js": "el.innerHTML = '<b>x</b></script>';",
+        }
+        for name, text in sources.items():
+            with open(os.path.join(work_dir, name), "w") as f:
+                f.write(text)
+        bundle = OverlayBundle(work_dir)
+        self.assertTrue(bundle.build())
+        self.assertEqual(bundle.content.decode(), (
+            "<html><head><style>body{color:red}</style></head><body>"
+            f"{BUNDLE_SCRIPT_TAG}\nel.innerHTML = '<b>x<\\/b><\\/script>';\n</script></body></html>"))
+
+    def test_font_urls_carry_their_content_hash(self):
+        fonts = HASHED_FONT_RE.findall(self.content)
+        self.assertTrue(fonts)
+        for _, name, version in fonts:
+            with open(os.path.join(get_resources_dir(), "assets", "fonts", name), "rb") as f:
+                self.assertEqual(version, content_hash(f.read()))
+
+    def test_missing_source_is_reported(self):
+        work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.addCleanup(shutil.rmtree, work_dir, True)
+        bundle = OverlayBundle(work_dir)
+        self.assertFalse(bundle.build())
+        self.assertIsNone(bundle.content)
+
+class BundleRouteTest(unittest.TestCase):
+    def setUp(self):
+        self.saved = {name: getattr(MusicHandler, name) for name in (
+            "track_state", "overlay_bundle", "serve_bundle", "root_dir", "static_files")}
+        MusicHandler.track_state = TrackState()
+        MusicHandler.track_state.update({"playing": True, "title": "Song", "artist": "Artist"})
+        MusicHandler.overlay_bundle = OverlayBundle(get_resources_dir())
+        MusicHandler.overlay_bundle.build()
+        MusicHandler.serve_bundle = False
+        MusicHandler.root_dir = get_resources_dir()
+        MusicHandler.static_files = StaticFileIndex(MusicHandler.root_dir)
+        MusicHandler.static_files.build()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), MusicHandler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for name, value in self.saved.items():
+            setattr(MusicHandler, name, value)
+
+    def get(self, path):
+        conn = HTTPConnection("127.0.0.1", self.httpd.server_address[1], timeout=5)
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            return response, response.read().decode("utf-8", "replace")
+        finally:
+            conn.close()
+
+    def test_bundle_is_served_with_the_first_paint_state(self):
+        response, page = self.get("/bundle")
+        self.assertEqual(response.status, 200)
+        self.assertIn(BUNDLE_SCRIPT_TAG, page)
+        self.assertLess(page.index('id="initialState"'), page.index(BUNDLE_SCRIPT_TAG))
+
+    def test_serve_bundle_setting(self):
+        self.assertIn(SCRIPT_TAG, self.get("/")[1])
+        MusicHandler.serve_bundle = True
+        for path in ("/", "/overlay.html"):
+            with self.subTest(path=path):
+                self.assertIn(BUNDLE_SCRIPT_TAG, self.get(path)[1])
+
+    def test_hashed_font_urls_are_immutable(self):
+        url = HASHED_FONT_RE.search(MusicHandler.overlay_bundle.content.decode()).group(1)
+        response, _ = self.get(url)
+        self.assertEqual(response.status, 200)
+        self.assertIn("immutable", response.getheader("Cache-Control"))
+        plain, _ = self.get(url.split("?")[0])
+        self.assertNotIn("immutable", plain.getheader("Cache-Control"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+# tests/test_control.py
+import os
+import sys
+import json
+import queue
+import socket
+import shutil
+import tempfile
+import subprocess
+import threading
+import unittest
+from http.client import HTTPConnection
+
+import zmq
+
+from jamdeck.server.control import ControlServer, ControlClient, ControlError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_TIMEOUT = 30
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(port, control_endpoint, env):
+    """Run music_server.py with only the control channel enabled."""
+    return subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "music_server.py"), "--port", str(port), "--no-pub",
+         "--control-endpoint", control_endpoint],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+class ControlServerTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.endpoint = f"ipc://{self.work_dir}/control.ipc"
+        self.context = zmq.Context()
+        self.server = ControlServer(self.context, self.endpoint)
+        self.server.register("add", lambda a, b: a + b)
+        self.server.register("fail", lambda: 1 / 0)
+        self.server.start()
+        self.client = ControlClient(self.endpoint, timeout=2.0)
+
+    def tearDown(self):
+        self.server.stop()
+        self.context.term()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_method_result(self):
+        self.assertEqual(self.client.call("add", a=2, b=3), 5)
+
+    def test_errors_are_reported_to_the_caller(self):
+        for method, params in (("missing", {}), ("fail", {}), ("add", {"c": 1})):
+            with self.subTest(method=method, params=params):
+                with self.assertRaises(ControlError):
+                    self.client.call(method, **params)
+        # The channel keeps answering after failed calls
+        self.assertEqual(self.client.call("add", a=1, b=1), 2)
+
+    def test_invalid_requests_are_answered(self):
+        self.assertEqual(self.server.dispatch(["add"]), {"error": "Request must be a JSON object"})
+        socket = self.context.socket(zmq.REQ)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.setsockopt(zmq.RCVTIMEO, 2000)
+        socket.connect(self.endpoint)
+        try:
+            socket.send(b"not json")
+            self.assertIn("Invalid JSON", json.loads(socket.recv())["error"])
+        finally:
+            socket.close()
+
+    def test_unreachable_server_times_out(self):
+        client = ControlClient(f"ipc://{self.work_dir}/nobody.ipc", timeout=0.2)
+        with self.assertRaises(ControlError):
+            client.call("status")
+
+class ServerControlTest(unittest.TestCase):
+    """The control methods of a running music_server.py."""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.endpoint = f"ipc://{self.work_dir}/control.ipc"
+        self.port = free_port()
+        # A temporary HOME keeps the server away from real config and state
+        env = dict(os.environ, HOME=self.work_dir)
+        self.process = start_server(self.port, self.endpoint, env)
+        self.lines = queue.Queue()
+        threading.Thread(target=self._read_output, daemon=True).start()
+        self.wait_for_line(f"JAMDECK_CONTROL={self.endpoint}")
+        self.client = ControlClient(self.endpoint, timeout=5.0)
+
+    def tearDown(self):
+        self.process.terminate()
+        self.process.wait(timeout=10)
+        self.process.stdout.close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _read_output(self):
+        for line in self.process.stdout:
+            self.lines.put(line.strip())
+
+    def wait_for_line(self, expected):
+        while True:
+            try:
+                line = self.lines.get(timeout=STARTUP_TIMEOUT)
+            except queue.Empty:
+                self.fail(f"server never printed {expected}")
+            if line == expected:
+                return
+
+    def healthz(self, port):
+        conn = HTTPConnection("127.0.0.1", port, timeout=5)
+        try:
+            conn.request("GET", "/healthz")
+            return conn.getresponse().status
+        finally:
+            conn.close()
+
+    def test_status(self):
+        status = self.client.call("status")
+        self.assertEqual(status["port"], self.port)
+        self.assertEqual(status["pid"], self.process.pid)
+
+    def test_rebind_moves_the_server_to_the_new_port(self):
+        new_port = free_port()
+        self.assertEqual(self.client.call("rebind", port=new_port), {"port": new_port})
+        self.wait_for_line(f"JAMDECK_READY={new_port}")
+        self.assertEqual(self.healthz(new_port), 200)
+        with self.assertRaises(ConnectionRefusedError):
+            self.healthz(self.port)
+        self.assertEqual(self.client.call("status")["port"], new_port)
+
+    def test_rebind_to_a_busy_port_keeps_serving(self):
+        with socket.socket() as busy:
+            busy.bind(("", 0))
+            busy.listen()
+            with self.assertRaises(ControlError):
+                self.client.call("rebind", port=busy.getsockname()[1])
+        self.assertEqual(self.healthz(self.port), 200)
+
+    def test_reload_config_reads_the_new_settings(self):
+        with open(os.path.join(self.work_dir, ".jamdeck_config.json"), "w") as f:
+            json.dump({"server": {"poll_interval": 7, "ingest_token": "secret-token"}}, f)
+        settings = self.client.call("reload_config")
+        self.assertEqual(settings["poll_interval"], 7)
+        self.assertNotIn("secret-token", json.dumps(settings))
+
+if __name__ == "__main__":
+    unittest.main()
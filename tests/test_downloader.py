@@ -0,0 +1,123 @@
+# tests/test_downloader.py
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from jamdeck.menubar.downloader import ChunkedDownloader, DownloadError, parse_sha256
+
+RELEASE = os.urandom(100 * 1024 + 123)
+RELEASE_SHA256 = hashlib.sha256(RELEASE).hexdigest()
+CHUNK_SIZE = 16 * 1024
+
+class ReleaseHandler(BaseHTTPRequestHandler):
+    """Serves RELEASE as a fake release DMG, with single byte ranges."""
+
+    # Set per test
+    honor_range = True
+    requested = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(RELEASE)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+
+    def do_GET(self):
+        match = re.fullmatch(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        type(self).requested.append(self.headers.get('Range'))
+        if match and self.honor_range:
+            start, end = int(match.group(1)), min(int(match.group(2)), len(RELEASE) - 1)
+            body = RELEASE[start:end + 1]
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(RELEASE)}')
+        else:
+            body = RELEASE
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class ChunkedDownloaderTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.dest = os.path.join(self.work_dir, "JamDeck.dmg")
+        ReleaseHandler.honor_range = True
+        ReleaseHandler.requested = []
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), ReleaseHandler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/JamDeck.dmg"
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def downloader(self, **kwargs):
+        kwargs.setdefault("expected_sha256", RELEASE_SHA256)
+        return ChunkedDownloader(self.url, self.dest, chunk_size=CHUNK_SIZE, max_retries=1, **kwargs)
+
+    def read_dest(self):
+        with open(self.dest, 'rb') as f:
+            return f.read()
+
+    def test_downloads_in_ranges(self):
+        progress = []
+        digest = self.downloader(progress_callback=lambda done, total: progress.append(done)).download()
+        self.assertEqual(digest, RELEASE_SHA256)
+        self.assertEqual(self.read_dest(), RELEASE)
+        self.assertFalse(os.path.exists(self.dest + ".part"))
+        self.assertEqual(ReleaseHandler.requested[:2], [f"bytes=0-{CHUNK_SIZE - 1}",
+                                                        f"bytes={CHUNK_SIZE}-{2 * CHUNK_SIZE - 1}"])
+        self.assertEqual(progress[0], 0)
+        self.assertEqual(progress[-1], len(RELEASE))
+
+    def test_resumes_from_a_partial_file(self):
+        partial = 40000
+        with open(self.dest + ".part", 'wb') as f:
+            f.write(RELEASE[:partial])
+        digest = self.downloader(total_size=len(RELEASE)).download()
+        self.assertEqual(digest, RELEASE_SHA256)
+        self.assertEqual(self.read_dest(), RELEASE)
+        self.assertEqual(ReleaseHandler.requested[0], f"bytes={partial}-{partial + CHUNK_SIZE - 1}")
+
+    def test_server_that_ignores_range(self):
+        ReleaseHandler.honor_range = False
+        with open(self.dest + ".part", 'wb') as f:
+            f.write(RELEASE[:1000])
+        self.assertEqual(self.downloader().download(), RELEASE_SHA256)
+        self.assertEqual(self.read_dest(), RELEASE)
+
+    def test_checksum_mismatch_discards_the_download(self):
+        with self.assertRaises(DownloadError):
+            self.downloader(expected_sha256="0" * 64).download()
+        self.assertFalse(os.path.exists(self.dest + ".part"))
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_corrupt_partial_file_fails_verification(self):
+        with open(self.dest + ".part", 'wb') as f:
+            f.write(b"\0" * 1000)
+        with self.assertRaises(DownloadError):
+            self.downloader().download()
+        self.assertFalse(os.path.exists(self.dest + ".part"))
+        # The next attempt starts over and succeeds
+        self.assertEqual(self.downloader().download(), RELEASE_SHA256)
+
+class ParseSha256Test(unittest.TestCase):
+    def test_formats(self):
+        digest = "ab" * 32
+        self.assertEqual(parse_sha256(f"sha256:{digest}"), digest)
+        self.assertEqual(parse_sha256(digest.upper()), digest)
+        sums = f"{'cd' * 32}  JamDeck-arm64.dmg\n{digest}  JamDeck.dmg\n"
+        self.assertEqual(parse_sha256(sums, "JamDeck.dmg"), digest)
+        self.assertIsNone(parse_sha256("no checksum here"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# tests/test_first_paint.py
+import re
+import json
+import threading
+import unittest
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+
+from jamdeck import get_resources_dir
+from jamdeck.server.handler import MusicHandler, OVERLAY_SCRIPT_TAG, OVERLAY_STYLESHEET_TAG
+from jamdeck.server.state import TrackState
+from jamdeck.server.sessions import SessionRegistry
+from jamdeck.server.static_files import StaticFileIndex
+
+INITIAL_STATE_RE = re.compile(r'<script id="initialState" type="application/json">(.*?)</script>', re.S)
+# A title that would end the script element if it were embedded as is
+TRACK = {"playing": True, "title": "</script><b>Song</b>", "artist": "Artist", "album": "Album"}
+
+class FirstPaintTest(unittest.TestCase):
+    """overlay.html is served with the current track embedded."""
+
+    def setUp(self):
+        self.track_state = TrackState()
+        self.saved = {name: getattr(MusicHandler, name) for name in (
+            "track_state", "session_registry", "inline_css", "root_dir", "static_files", "overlay_bundle")}
+        MusicHandler.track_state = self.track_state
+        MusicHandler.session_registry = None
+        MusicHandler.inline_css = False
+        MusicHandler.overlay_bundle = None
+        MusicHandler.root_dir = get_resources_dir()
+        MusicHandler.static_files = StaticFileIndex(MusicHandler.root_dir)
+        MusicHandler.static_files.build()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), MusicHandler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for name, value in self.saved.items():
+            setattr(MusicHandler, name, value)
+
+    def get_page(self, path="/"):
+        conn = HTTPConnection("127.0.0.1", self.httpd.server_address[1], timeout=5)
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            return response.read().decode()
+        finally:
+            conn.close()
+
+    def initial_state(self, page):
+        match = INITIAL_STATE_RE.search(page)
+        return json.loads(match.group(1)) if match else None
+
+    def test_current_track_is_embedded_before_the_script(self):
+        self.track_state.update(dict(TRACK))
+        page = self.get_page()
+        self.assertEqual(self.initial_state(page), TRACK)
+        self.assertLess(page.index('id="initialState"'), page.index(OVERLAY_SCRIPT_TAG.decode()))
+        # '<' is escaped, so the title can't close the element early
+        self.assertNotIn("</script><b>", page)
+
+    def test_no_state_before_the_first_query(self):
+        self.assertIsNone(self.initial_state(self.get_page()))
+
+    def test_session_overlay_embeds_the_session_track(self):
+        self.track_state.update(dict(TRACK))
+        MusicHandler.session_registry = SessionRegistry("token")
+        MusicHandler.session_registry.ingest("studio", {"playing": True, "title": "Remote Song"})
+        self.assertEqual(self.initial_state(self.get_page("/?session=studio"))["title"], "Remote Song")
+        self.assertIsNone(self.initial_state(self.get_page("/?session=unknown")))
+
+    def test_inline_css_setting_and_override(self):
+        stylesheet = OVERLAY_STYLESHEET_TAG.decode()
+        cases = (
+            (False, "/", False),
+            (False, "/?inline_css=1", True),
+            (True, "/", True),
+            (True, "/?inline_css=0", False),
+        )
+        for setting, path, inlined in cases:
+            with self.subTest(setting=setting, path=path):
+                MusicHandler.inline_css = setting
+                page = self.get_page(path)
+                self.assertEqual(stylesheet not in page, inlined)
+                self.assertEqual("<style>" in page, inlined)
+
+if __name__ == "__main__":
+    unittest.main()
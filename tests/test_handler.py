@@ -0,0 +1,97 @@
+# tests/test_handler.py
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import email.utils
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+
+from jamdeck.server.handler import MusicHandler
+from jamdeck.server.static_files import StaticFileIndex
+
+BODY = bytes(range(256)) * 4    # 1024 bytes
+MTIME = 1700000000
+
+class FileResponseTest(unittest.TestCase):
+    """Range, 206/416 and If-Modified-Since handling in _send_file."""
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        images = os.path.join(self.root_dir, "assets", "images")
+        os.makedirs(images)
+        path = os.path.join(images, "cover.png")
+        with open(path, "wb") as f:
+            f.write(BODY)
+        os.utime(path, (MTIME, MTIME))
+
+        self.saved = {name: getattr(MusicHandler, name) for name in ("root_dir", "static_files")}
+        MusicHandler.root_dir = self.root_dir
+        MusicHandler.static_files = StaticFileIndex(self.root_dir)
+        MusicHandler.static_files.build()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), MusicHandler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for name, value in self.saved.items():
+            setattr(MusicHandler, name, value)
+        shutil.rmtree(self.root_dir, ignore_errors=True)
+
+    def get(self, **headers):
+        conn = HTTPConnection("127.0.0.1", self.httpd.server_address[1], timeout=5)
+        try:
+            conn.request("GET", "/assets/images/cover.png", headers=headers)
+            response = conn.getresponse()
+            return response, response.read()
+        finally:
+            conn.close()
+
+    def test_open_ended_range_from_zero_is_the_whole_file(self):
+        response, body = self.get(Range="bytes=0-")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, BODY)
+        self.assertEqual(response.getheader("Content-Length"), str(len(BODY)))
+        self.assertEqual(response.getheader("Accept-Ranges"), "bytes")
+
+    def test_partial_range(self):
+        response, body = self.get(Range="bytes=100-199")
+        self.assertEqual(response.status, 206)
+        self.assertEqual(body, BODY[100:200])
+        self.assertEqual(response.getheader("Content-Range"), f"bytes 100-199/{len(BODY)}")
+
+    def test_suffix_range(self):
+        response, body = self.get(Range="bytes=-100")
+        self.assertEqual(response.status, 206)
+        self.assertEqual(body, BODY[-100:])
+        self.assertEqual(response.getheader("Content-Range"), f"bytes 924-1023/{len(BODY)}")
+
+    def test_range_past_the_end_is_unsatisfiable(self):
+        response, body = self.get(Range=f"bytes={len(BODY)}-")
+        self.assertEqual(response.status, 416)
+        self.assertEqual(body, b"")
+        self.assertEqual(response.getheader("Content-Range"), f"bytes */{len(BODY)}")
+
+    def test_multiple_ranges_fall_back_to_the_whole_file(self):
+        response, body = self.get(Range="bytes=0-9,20-29")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, BODY)
+        self.assertIsNone(response.getheader("Content-Range"))
+
+    def test_if_modified_since(self):
+        cases = (
+            ("fresh", MTIME, 304, b""),
+            ("later", MTIME + 3600, 304, b""),
+            ("stale", MTIME - 3600, 200, BODY),
+        )
+        for name, since, status, expected in cases:
+            with self.subTest(name):
+                response, body = self.get(**{"If-Modified-Since": email.utils.formatdate(since, usegmt=True)})
+                self.assertEqual(response.status, status)
+                self.assertEqual(body, expected)
+                self.assertEqual(response.getheader("Last-Modified"), email.utils.formatdate(MTIME, usegmt=True))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+# tests/test_limits.py
+import unittest
+
+from jamdeck.server.limits import RequestLimiter
+
+class RequestLimiterTest(unittest.TestCase):
+    def test_changing_referer_does_not_reset_the_limit(self):
+        limiter = RequestLimiter(rate=1, burst=3, max_concurrent=100)
+        for i in range(3):
+            self.assertIsNone(limiter.admit("10.0.0.5", f"http://x/?scene={i}"))
+        status, retry_after = limiter.admit("10.0.0.5", "http://x/?scene=new")
+        self.assertEqual(status, 429)
+        self.assertGreaterEqual(retry_after, 1)
+        # Another address has its own allowance
+        self.assertIsNone(limiter.admit("10.0.0.6"))
+
+    def test_loopback_page_gets_a_share_of_the_allowance(self):
+        limiter = RequestLimiter(rate=1, burst=10, max_concurrent=100)
+        admitted = sum(limiter.admit("127.0.0.1", "http://localhost/?scene=a") is None for _ in range(10))
+        self.assertEqual(admitted, 5)
+        # The other scenes still have the rest of the machine's allowance
+        for _ in range(5):
+            self.assertIsNone(limiter.admit("127.0.0.1", "http://localhost/?scene=b"))
+        self.assertEqual(limiter.admit("127.0.0.1", "http://localhost/?scene=c")[0], 429)
+
+    def test_overload_returns_503_and_refunds_tokens(self):
+        limiter = RequestLimiter(rate=1, burst=2, max_concurrent=1)
+        self.assertIsNone(limiter.admit("10.0.0.5"))
+        self.assertEqual(limiter.admit("10.0.0.5"), (503, 1))
+        limiter.release()
+        # The shed request didn't cost the client a token
+        self.assertIsNone(limiter.admit("10.0.0.5"))
+        self.assertEqual(limiter.snapshot()["overloaded"], 1)
+
+    def test_invalid_limits_are_rejected(self):
+        with self.assertRaises(ValueError):
+            RequestLimiter(rate=0)
+        limiter = RequestLimiter()
+        for args in ((0, 30, 32), (10, 0, 32), (10, 30, 0), ("fast", 30, 32)):
+            with self.assertRaises(ValueError):
+                limiter.configure(*args)
+
+if __name__ == "__main__":
+    unittest.main()
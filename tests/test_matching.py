@@ -0,0 +1,134 @@
+# tests/test_matching.py
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from urllib.parse import urlparse, parse_qs
+
+from jamdeck.server.artwork import ArtworkManager
+from jamdeck.server.itunes import ITunesScheduler
+from jamdeck.server.matching import (
+    normalize_artist, normalize_title, primary_artist, match_key, album_key, best_match,
+)
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "itunes_lookups.json")
+
+# Artists whose names contain a credit separator
+SEPARATOR_ARTISTS = {
+    "AC/DC": "ac dc",
+    "Lil Nas X": "lil nas x",
+    "Earth, Wind & Fire": "earth wind and fire",
+    "Simon & Garfunkel": "simon and garfunkel",
+    "Tyler, The Creator": "tyler the creator",
+}
+
+class NormalizeTest(unittest.TestCase):
+    def test_artist_names_are_kept_whole(self):
+        for artist, expected in SEPARATOR_ARTISTS.items():
+            self.assertEqual(normalize_artist(artist), expected)
+
+    def test_featured_artists_are_dropped(self):
+        self.assertEqual(normalize_artist("Beyoncé feat. JAY-Z"), "beyonce")
+        self.assertEqual(normalize_artist("Lil Nas X ft. Billy Ray Cyrus"), "lil nas x")
+
+    def test_keys_do_not_collide_with_primary_artist(self):
+        self.assertNotEqual(match_key("Simon & Garfunkel", "Song"), match_key("Simon", "Song"))
+        self.assertNotEqual(match_key("AC/DC", "Back"), match_key("AC", "Back"))
+        self.assertNotEqual(album_key("Earth, Wind & Fire", "Hex"), album_key("Earth", "Hex"))
+
+    def test_primary_artist(self):
+        self.assertEqual(primary_artist("Calvin Harris & Dua Lipa"), "calvin harris")
+        self.assertEqual(primary_artist("A, B and C"), "a")
+
+    def test_title_versions_share_a_key(self):
+        for title in ("Song (Remastered 2011)", "Song - feat. X", "Song [Live]", "Song - Radio Edit"):
+            self.assertEqual(normalize_title(title), "song")
+        self.assertEqual(normalize_title("F**k You"), "fk you")
+
+    def test_shared_credit_matches_primary_artist_entry(self):
+        candidate = {"artistName": "Calvin Harris", "trackName": "One Kiss", "artworkUrl100": "x"}
+        match, score = best_match([candidate], "Calvin Harris & Dua Lipa", "One Kiss")
+        self.assertIs(match, candidate)
+
+    def test_full_credit_beats_primary_artist_entry(self):
+        earth = {"artistName": "Earth", "trackName": "September", "artworkUrl100": "x"}
+        ewf = {"artistName": "Earth, Wind & Fire", "trackName": "September", "artworkUrl100": "y"}
+        self.assertIs(best_match([earth, ewf], "Earth, Wind & Fire", "September")[0], ewf)
+
+class FakeITunes:
+    """Answers searches from the fixture catalogue, roughly like iTunes.
+
+    Returns the entries matching at least half of the search words, best
+    first, so partial credits still find the song and similar entries
+    show up as competing candidates.
+    """
+
+    def __init__(self, catalogue):
+        self.catalogue = catalogue
+        self.searches = []
+
+    @staticmethod
+    def _words(text):
+        return set(normalize_artist(text).split())
+
+    def fetch(self, url):
+        query = parse_qs(urlparse(url).query)
+        self.searches.append(query["term"][0])
+        words = self._words(query["term"][0])
+        scored = []
+        for entry in self.catalogue:
+            text = " ".join((entry["artistName"], entry["trackName"], entry["collectionName"]))
+            found = len(words & self._words(text))
+            if words and found * 2 >= len(words):
+                scored.append((-found, len(scored), entry))
+        scored.sort()
+        limit = int(query["limit"][0])
+        results = [entry for _, _, entry in scored[:limit]]
+        return 200, json.dumps({"resultCount": len(results), "results": results})
+
+class LookupFixtureTest(unittest.TestCase):
+    """Hit rate and wasted searches over the fixture's plays."""
+
+    def setUp(self):
+        with open(FIXTURE) as f:
+            self.fixture = json.load(f)
+        self.work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.itunes = FakeITunes(self.fixture["catalogue"])
+        self.manager = ArtworkManager(
+            artwork_path=os.path.join(self.work_dir, "cover.jpg"),
+            itunes_scheduler=ITunesScheduler(rate=1000, burst=1000, fetch=self.itunes.fetch),
+            cache_dir=os.path.join(self.work_dir, "cache"),
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_hit_rate_and_wasted_searches(self):
+        plays = self.fixture["plays"]
+        hits = wrong = 0
+        for play in plays:
+            url = self.manager.find_itunes_artwork_url(play["artist"], play["title"], play["album"])
+            expected = play["expect"]
+            found = url.split("/")[3] if url else None
+            with self.subTest(play=play):
+                self.assertEqual(found, expected)
+            if expected and found == expected:
+                hits += 1
+            elif found != expected:
+                wrong += 1
+
+        expected_hits = sum(1 for play in plays if play["expect"])
+        self.assertEqual(hits / expected_hits, 1.0)
+        self.assertEqual(wrong, 0)
+        # One search per distinct song, plus the album search for the song
+        # iTunes doesn't have; other versions are answered from the cache
+        self.assertEqual(len(self.itunes.searches), self.fixture["expected_searches"])
+
+    def test_search_terms_use_the_full_credit(self):
+        for artist, folded in SEPARATOR_ARTISTS.items():
+            self.manager.find_itunes_artwork_url(artist, "Some Song", None)
+            self.assertEqual(self.itunes.searches[-1], f"{folded} some song")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# tests/test_nowplaying.py
+import json
+import time
+import threading
+import unittest
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+
+from jamdeck.server.handler import MusicHandler
+from jamdeck.server.poller import TrackPoller
+from jamdeck.server.state import TrackState
+
+TRACK = {"playing": True, "title": "Song", "artist": "Artist", "album": "Album"}
+
+class CountingProvider:
+    """Stands in for AppleMusicProvider: counts queries, updates TrackState."""
+
+    def __init__(self, track_state):
+        self.track_state = track_state
+        self.queries = 0
+
+    def get_apple_music_track(self, received_at=None, deadline=None):
+        self.queries += 1
+        data = dict(TRACK, query=self.queries)
+        self.track_state.update(data)
+        return json.dumps(data)
+
+class NowPlayingFromStateTest(unittest.TestCase):
+    def setUp(self):
+        self.track_state = TrackState()
+        self.provider = CountingProvider(self.track_state)
+        self.saved = {name: getattr(MusicHandler, name)
+                      for name in ("apple_music_provider", "track_state", "track_poller", "warmed_up")}
+        MusicHandler.apple_music_provider = self.provider
+        MusicHandler.track_state = self.track_state
+        MusicHandler.track_poller = None
+        MusicHandler.warmed_up = True
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), MusicHandler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for name, value in self.saved.items():
+            setattr(MusicHandler, name, value)
+
+    def get_nowplaying(self):
+        conn = HTTPConnection("127.0.0.1", self.httpd.server_address[1], timeout=5)
+        try:
+            conn.request("GET", "/nowplaying")
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            return json.loads(response.read())
+        finally:
+            conn.close()
+
+    def test_recent_poller_result_is_served_without_a_query(self):
+        MusicHandler.track_poller = TrackPoller(self.provider, interval=3.0)
+        self.provider.get_apple_music_track()   # the poller's last query
+        for _ in range(5):
+            self.assertEqual(self.get_nowplaying()["query"], 1)
+        self.assertEqual(self.provider.queries, 1)
+
+    def test_old_state_is_queried_again(self):
+        MusicHandler.track_poller = TrackPoller(self.provider, interval=3.0)
+        self.provider.get_apple_music_track()
+        # The poller has fallen behind (e.g. a hung query)
+        self.track_state.updated_at = time.time() - 60
+        self.assertEqual(self.get_nowplaying()["query"], 2)
+
+    def test_without_a_poller_every_request_queries(self):
+        self.provider.get_apple_music_track()
+        self.get_nowplaying()
+        self.get_nowplaying()
+        self.assertEqual(self.provider.queries, 3)
+
+    def test_restored_snapshot_is_not_fresh(self):
+        self.track_state.update(dict(TRACK, stale=True))
+        self.assertIsNone(self.track_state.fresh(60))
+
+if __name__ == "__main__":
+    unittest.main()
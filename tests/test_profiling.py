@@ -0,0 +1,105 @@
+# tests/test_profiling.py
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+
+from jamdeck.server.handler import MusicHandler
+from jamdeck.server.profiling import Profiler
+
+def busy_work():
+    return sum(i * i for i in range(20000))
+
+class ProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.profiler = Profiler(self.output_dir)
+
+    def tearDown(self):
+        if self.profiler.active:
+            self.profiler.stop()
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def report(self, files, suffix):
+        path = next(path for path in files if path.endswith(suffix))
+        with open(path) as f:
+            return f.read()
+
+    def test_capture_writes_reports(self):
+        self.assertTrue(self.profiler.start(0)["active"])
+        with self.profiler.capture():
+            busy_work()
+        self.profiler.record_request("/nowplaying", "/nowplaying", 200, 0.0123)
+
+        status = self.profiler.stop()
+        self.assertFalse(status["active"])
+        files = status["last_files"]
+        for suffix in (".pstats", "-cpu.txt", "-memory.txt", "-routes.jsonl"):
+            self.assertEqual(sum(path.endswith(suffix) for path in files), 1, suffix)
+        self.assertIn("busy_work", self.report(files, "-cpu.txt"))
+        self.assertIn("Growth since capture started", self.report(files, "-memory.txt"))
+        trace = json.loads(self.report(files, "-routes.jsonl"))
+        self.assertEqual((trace["route"], trace["status"], trace["ms"]), ("/nowplaying", 200, 12.3))
+
+    def test_nothing_is_recorded_without_a_capture(self):
+        with self.profiler.capture():
+            busy_work()
+        self.profiler.record_request("/nowplaying", "/nowplaying", 200, 0.01)
+        self.assertEqual(self.profiler.status()["requests"], 0)
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+    def test_capture_stops_after_its_duration(self):
+        self.profiler.start(0.1)
+        # The timer thread writes the reports after the capture ends
+        deadline = time.monotonic() + 5
+        while not self.profiler.last_files and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertFalse(self.profiler.active)
+        # Nothing was profiled, so only the memory and route reports
+        self.assertEqual(len(self.profiler.last_files), 2)
+
+class DebugProfileRouteTest(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.saved = MusicHandler.profiler
+        MusicHandler.profiler = Profiler(self.output_dir)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), MusicHandler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        MusicHandler.profiler = self.saved
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def get(self, path):
+        conn = HTTPConnection("127.0.0.1", self.httpd.server_address[1], timeout=5)
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def test_start_and_stop_over_http(self):
+        status, body = self.get("/debug/profile?action=start&duration=0")
+        self.assertEqual(status, 200)
+        self.assertTrue(json.loads(body)["active"])
+        self.get("/nowplaying")
+        status, body = self.get("/debug/profile?action=stop")
+        result = json.loads(body)
+        self.assertFalse(result["active"])
+        self.assertEqual(len(result["last_files"]), 4)
+
+    def test_bad_arguments(self):
+        self.assertEqual(self.get("/debug/profile?action=restart")[0], 400)
+        self.assertEqual(self.get("/debug/profile?action=start&duration=soon")[0], 400)
+        self.assertFalse(MusicHandler.profiler.active)
+
+if __name__ == "__main__":
+    unittest.main()
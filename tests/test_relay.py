@@ -0,0 +1,86 @@
+# tests/test_relay.py
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from jamdeck.server.relay import RelayProvider
+from jamdeck.server.state import TrackState
+
+COVER = b"\xff\xd8 upstream cover"
+
+class UpstreamStub(BaseHTTPRequestHandler):
+    """A Jam Deck server too old to long-poll, so the relay polls it."""
+
+    # Set per test
+    track = None
+    artwork_status = 200
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/nowplaying"):
+            status, body = 200, json.dumps(self.track).encode()
+        elif self.path.startswith("/artwork"):
+            status = self.artwork_status
+            body = COVER if status == 200 else b"Artwork not found"
+        else:
+            status, body = 404, b"404 Not Found"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class RelayArtworkTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.artwork_path = os.path.join(self.work_dir, "cover.jpg")
+        UpstreamStub.track = {"playing": True, "title": "Song", "artist": "Artist",
+                              "artworkPath": "/artwork?t=1700000000"}
+        UpstreamStub.artwork_status = 200
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), UpstreamStub)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.track_state = TrackState()
+        self.relay = RelayProvider(f"http://127.0.0.1:{self.httpd.server_address[1]}",
+                                   self.track_state, self.artwork_path)
+
+    def tearDown(self):
+        self.relay.stop()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def first_update(self):
+        self.relay.start()
+        deadline = time.monotonic() + 10
+        while self.track_state.get()[0] is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return json.loads(self.relay.get_apple_music_track())
+
+    def test_artwork_is_mirrored(self):
+        track = self.first_update()
+        self.assertEqual(track["title"], "Song")
+        self.assertEqual(track["artworkPath"], "/artwork?t=1700000000")
+        with open(self.artwork_path, "rb") as f:
+            self.assertEqual(f.read(), COVER)
+        self.assertEqual(self.relay.stats["artwork_fetches"], 1)
+
+    def test_missing_artwork_still_updates_the_track(self):
+        UpstreamStub.artwork_status = 404
+        track = self.first_update()
+        self.assertEqual((track["title"], track["playing"]), ("Song", True))
+        self.assertNotIn("artworkPath", track)
+        self.assertNotIn("error", track)
+        self.assertEqual(self.relay.stats["artwork_errors"], 1)
+        self.assertEqual(self.relay.stats["errors"], 0)
+        self.assertTrue(self.relay.stats["connected"])
+        # The error page isn't left behind as a half-written cover
+        self.assertEqual(os.listdir(self.work_dir), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+# tests/test_release_cache.py
+import os
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from jamdeck.menubar.release_cache import ReleaseCache, ReleaseCheckError, parse_response_headers
+
+RELEASE = {"tag_name": "v1.2.0", "body": "Notes\r\n\r\nHTTP/1.1 200 OK in the text"}
+ETAG = '"release-etag"'
+
+class GitHubStub(BaseHTTPRequestHandler):
+    """Answers like releases/latest, with ETag revalidation."""
+
+    # Set per test
+    interim = False
+    requests = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        type(self).requests.append(dict(self.headers))
+        if self.interim:
+            # An interim response before the real one, as some proxies send
+            self.wfile.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(RELEASE).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", "Mon, 19 Oct 2026 10:00:00 GMT")
+        self.end_headers()
+        self.wfile.write(body)
+
+class ReleaseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.cache_file = os.path.join(self.work_dir, "release_cache.json")
+        GitHubStub.interim = False
+        GitHubStub.requests = []
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), GitHubStub)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/releases/latest"
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def cache(self, url=None, min_check_interval=0):
+        return ReleaseCache(url or self.url, self.cache_file, min_check_interval)
+
+    def test_release_is_fetched_and_persisted(self):
+        self.assertEqual(self.cache().get_release(), RELEASE)
+        reloaded = self.cache()
+        self.assertEqual(reloaded.release, RELEASE)
+        self.assertEqual(reloaded.etag, ETAG)
+
+    def test_repeat_checks_are_conditional(self):
+        cache = self.cache()
+        cache.get_release()
+        self.assertEqual(cache.get_release(), RELEASE)
+        self.assertNotIn("If-None-Match", GitHubStub.requests[0])
+        self.assertEqual(GitHubStub.requests[1]["If-None-Match"], ETAG)
+
+    def test_checks_within_the_interval_stay_offline(self):
+        cache = self.cache(min_check_interval=3600)
+        cache.get_release()
+        cache.get_release()
+        self.assertEqual(len(GitHubStub.requests), 1)
+        # Manual checks skip the interval
+        cache.get_release(force=True)
+        self.assertEqual(len(GitHubStub.requests), 2)
+
+    def test_interim_response_is_skipped(self):
+        GitHubStub.interim = True
+        cache = self.cache()
+        self.assertEqual(cache.get_release(), RELEASE)
+        self.assertEqual(cache.etag, ETAG)
+        self.assertEqual(cache.get_release(), RELEASE)
+
+    def test_unreachable_server_falls_back_to_the_cache(self):
+        self.cache().get_release()
+        unreachable = f"http://127.0.0.1:{self.httpd.server_address[1]}/releases/latest"
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.assertEqual(self.cache(unreachable).get_release(), RELEASE)
+        os.remove(self.cache_file)
+        with self.assertRaises(ReleaseCheckError):
+            self.cache(unreachable).get_release()
+
+class ParseResponseHeadersTest(unittest.TestCase):
+    def test_last_header_block_wins(self):
+        raw = (b"HTTP/1.1 200 Connection established\r\n\r\n"
+               b"HTTP/1.1 100 Continue\r\n\r\n"
+               b"HTTP/2 304\r\nETag: \"abc\"\r\nlast-modified: Mon, 19 Oct 2026 10:00:00 GMT\r\n\r\n")
+        status, headers = parse_response_headers(raw)
+        self.assertEqual(status, 304)
+        self.assertEqual(headers["etag"], '"abc"')
+        self.assertEqual(headers["last-modified"], "Mon, 19 Oct 2026 10:00:00 GMT")
+
+    def test_invalid_headers(self):
+        for raw in (b"", b"garbage\r\n\r\n", b"HTTP/1.1\r\n\r\n"):
+            with self.subTest(raw=raw):
+                with self.assertRaises(ReleaseCheckError):
+                    parse_response_headers(raw)
+
+if __name__ == "__main__":
+    unittest.main()
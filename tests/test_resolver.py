@@ -0,0 +1,192 @@
+# tests/test_resolver.py
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from jamdeck.server.artwork import ArtworkManager
+from jamdeck.server.resolver import (
+    ArtworkResolver, ArtworkTier, ArtworkUnavailable, HttpTemplateTier, PersistentCacheTier,
+    LocalFolderTier, _curl_bytes,
+)
+
+class StubTier(ArtworkTier):
+    """A tier answering after delay seconds with data, or raising error."""
+
+    def __init__(self, name, data=None, delay=0.0, error=None, budget=1.0, cacheable=True):
+        self.name = name
+        self.data = data
+        self.delay = delay
+        self.error = error
+        self.budget = budget
+        self.cacheable = cacheable
+        self.calls = 0
+        self.finished = threading.Event()
+
+    def lookup(self, artist, title, album):
+        self.calls += 1
+        try:
+            time.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            return self.data
+        finally:
+            self.finished.set()
+
+class ResolverTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.cache = PersistentCacheTier(os.path.join(self.work_dir, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_local_hit_skips_the_network(self):
+        folder = os.path.join(self.work_dir, "covers", "Artist", "Album")
+        os.makedirs(folder)
+        with open(os.path.join(folder, "cover.jpg"), "wb") as f:
+            f.write(b"local cover")
+        local = LocalFolderTier(os.path.join(self.work_dir, "covers"),
+                                index_path=os.path.join(self.work_dir, "index.json"))
+        local.index.refresh()
+        itunes = StubTier("itunes", data=b"itunes cover")
+        resolver = ArtworkResolver([local, self.cache, itunes], cache_tier=self.cache)
+
+        self.assertEqual(resolver.resolve("Artist", "Song", "Album"), (b"local cover", "local"))
+        self.assertEqual(itunes.calls, 0)
+        # Local covers are not copied into the cache
+        self.assertIsNone(self.cache.lookup("Artist", "Song", "Album"))
+
+    def test_slow_tier_is_hedged_at_its_p90(self):
+        # Not cacheable: it answers after the test has cleaned up
+        slow = StubTier("itunes", data=b"slow cover", delay=0.5, budget=2.0, cacheable=False)
+        fast = StubTier("http", data=b"fast cover")
+        resolver = ArtworkResolver([slow, fast], cache_tier=self.cache)
+        for _ in range(5):
+            resolver.latency["itunes"].record(0.05)
+
+        started = time.monotonic()
+        self.assertEqual(resolver.resolve("Artist", "Song", "Album"), (b"fast cover", "http"))
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual(resolver.stats["hedged"], 1)
+
+    def test_no_hedge_before_enough_history(self):
+        slow = StubTier("itunes", data=b"slow cover", delay=0.2, budget=2.0)
+        fast = StubTier("http", data=b"fast cover")
+        resolver = ArtworkResolver([slow, fast], cache_tier=self.cache)
+        self.assertEqual(resolver.resolve("Artist", "Song", "Album"), (b"slow cover", "itunes"))
+        self.assertEqual(fast.calls, 0)
+
+    def test_late_result_is_cached(self):
+        late = StubTier("itunes", data=b"late cover", delay=0.3, budget=0.1)
+        miss = StubTier("http")
+        resolver = ArtworkResolver([self.cache, late, miss], cache_tier=self.cache)
+
+        with self.assertRaises(ArtworkUnavailable):
+            resolver.resolve("Artist", "Song", "Album")
+        self.assertEqual(resolver.stats["abandoned"], 1)
+        self.assertTrue(late.finished.wait(2))
+        # Stored by the abandoned tier's thread once it answered
+        for _ in range(50):
+            if self.cache.lookup("Artist", "Song", "Album"):
+                break
+            time.sleep(0.01)
+        self.assertEqual(resolver.resolve("Artist", "Song", "Album"), (b"late cover", "cache"))
+        self.assertEqual(late.calls, 1)
+
+    def test_all_tiers_missing_is_a_miss(self):
+        resolver = ArtworkResolver([self.cache, StubTier("itunes"), StubTier("http")], cache_tier=self.cache)
+        self.assertEqual(resolver.resolve("Artist", "Song", "Album"), (None, None))
+        self.assertEqual(resolver.stats["misses"], 1)
+
+    def test_failing_tier_makes_the_result_unavailable(self):
+        failing = StubTier("itunes", error=OSError("HTTP 503"))
+        resolver = ArtworkResolver([self.cache, failing, StubTier("http")], cache_tier=self.cache)
+        with self.assertRaises(ArtworkUnavailable):
+            resolver.resolve("Artist", "Song", "Album")
+        self.assertEqual(resolver.stats["misses"], 0)
+
+    def test_failing_tier_does_not_hide_a_later_hit(self):
+        failing = StubTier("itunes", error=OSError("HTTP 503"))
+        resolver = ArtworkResolver([failing, StubTier("http", data=b"cover")], cache_tier=self.cache)
+        self.assertEqual(resolver.resolve("Artist", "Song", "Album"), (b"cover", "http"))
+
+class CoverHandler(BaseHTTPRequestHandler):
+    """Stub cover server: /cover?artist=<name> has art for "Known Artist" only."""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        artist = query.get("artist", [""])[0]
+        if query.get("fmt") != ["{jpg}"]:
+            # Literal braces from the template must arrive as they are
+            self.send_response(400)
+            body = b""
+        elif artist == "Known Artist":
+            self.send_response(200)
+            body = b"stub cover"
+        elif artist == "Broken":
+            self.send_response(500)
+            body = b""
+        else:
+            self.send_response(404)
+            body = b""
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@unittest.skipUnless(shutil.which("curl"), "curl is not installed")
+class HttpTemplateTierTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.httpd = ThreadingHTTPServer(("127.0.0.1", 0), CoverHandler)
+        threading.Thread(target=cls.httpd.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.httpd.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+
+    def tier(self):
+        return HttpTemplateTier(self.base + "/cover?artist={artist}&album={album}&fmt={{jpg}}", _curl_bytes)
+
+    def test_found_missing_and_failing(self):
+        tier = self.tier()
+        self.assertEqual(tier.lookup("Known Artist", "Song", "Album"), b"stub cover")
+        self.assertIsNone(tier.lookup("Someone Else", "Song", "Album"))
+        with self.assertRaises(OSError):
+            tier.lookup("Broken", "Song", "Album")
+
+class TemplateValidationTest(unittest.TestCase):
+    def test_invalid_templates_are_rejected(self):
+        for template in ("http://x/{artist}/{}", "http://x/?q={year}", "http://x/{0}",
+                         "http://x/{", "http://x/{artist:{size}}"):
+            with self.subTest(template=template), self.assertRaises(ValueError):
+                HttpTemplateTier(template)
+
+    def test_literal_braces_are_allowed(self):
+        urls = []
+        tier = HttpTemplateTier("http://x/{{raw}}?a={artist}&t={title}",
+                                download=lambda url, budget: urls.append(url))
+        tier.lookup("AC/DC", "T.N.T.", None)
+        self.assertEqual(urls, ["http://x/{raw}?a=AC%2FDC&t=T.N.T."])
+
+    def test_manager_skips_an_invalid_secondary_source(self):
+        work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        try:
+            manager = ArtworkManager(artwork_path=os.path.join(work_dir, "cover.jpg"),
+                                     secondary_url="http://x/{artist}/{}",
+                                     cache_dir=os.path.join(work_dir, "cache"))
+            self.assertEqual([tier.name for tier in manager.resolver.tiers], ["cache", "itunes"])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+# tests/test_service_worker.py
+import os
+import json
+import shutil
+import unittest
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NODE = shutil.which("node")
+
+# Loads overlay-sw.js in a node vm context with an in-memory Cache
+# Storage and a stub network, then runs one scenario (an async function
+# body with `sw` in scope) and prints what it returns as JSON.
+HARNESS = r"""
+const fs = require('fs');
+const vm = require('vm');
+const [workerPath, scenarioBody] = process.argv.slice(-2);
+
+const ORIGIN = 'http://localhost:8080';
+const listeners = {};
+const stores = new Map();
+const network = {calls: [], offline: false, status: 200};
+const keyOf = request => typeof request === 'string' ? request : request.url;
+
+function cacheFor(name) {
+    if (!stores.has(name)) {
+        stores.set(name, new Map());
+    }
+    const entries = stores.get(name);
+    return {
+        match: request => Promise.resolve(entries.has(keyOf(request)) ? entries.get(keyOf(request)).clone() : undefined),
+        put: (request, response) => { entries.set(keyOf(request), response.clone()); return Promise.resolve(); },
+        delete: request => Promise.resolve(entries.delete(keyOf(request))),
+        keys: () => Promise.resolve([...entries.keys()].map(url => ({url}))),
+    };
+}
+
+const caches = {
+    open: name => Promise.resolve(cacheFor(name)),
+    keys: () => Promise.resolve([...stores.keys()]),
+    delete: name => Promise.resolve(stores.delete(name)),
+    match: request => {
+        for (const name of stores.keys()) {
+            const entries = stores.get(name);
+            if (entries.has(keyOf(request))) {
+                return Promise.resolve(entries.get(keyOf(request)).clone());
+            }
+        }
+        return Promise.resolve(undefined);
+    },
+};
+
+function fetch(request) {
+    network.calls.push(request.url.slice(ORIGIN.length));
+    if (network.offline) {
+        return Promise.reject(new TypeError('offline'));
+    }
+    return Promise.resolve(new Response(`network ${network.calls.length}`, {status: network.status}));
+}
+
+const self = {
+    location: new URL(ORIGIN),
+    addEventListener: (type, listener) => { listeners[type] = listener; },
+    skipWaiting: () => {},
+    clients: {claim: () => Promise.resolve()},
+};
+vm.runInNewContext(fs.readFileSync(workerPath, 'utf8'), {self, caches, fetch, URL, Response, Promise});
+
+const sw = {
+    network,
+    // Dispatch a fetch event; returns null if the worker left it to the browser
+    async get(path, {mode = 'no-cors', method = 'GET', origin = ORIGIN} = {}) {
+        let response = null;
+        const pending = [];
+        listeners.fetch({
+            request: {url: origin + path, method, mode},
+            respondWith: promise => { response = promise; },
+            waitUntil: promise => pending.push(promise),
+        });
+        if (response === null) {
+            return null;
+        }
+        const result = await response;
+        await Promise.all(pending);
+        return {status: result.status, body: await result.text()};
+    },
+    async activate() {
+        const pending = [];
+        listeners.activate({waitUntil: promise => pending.push(promise)});
+        await Promise.all(pending);
+    },
+    cached: name => [...(stores.get(name) || new Map()).keys()].map(url => url.slice(ORIGIN.length)),
+    caches: () => [...stores.keys()],
+    addCache: name => cacheFor(name),
+};
+
+(async () => {
+    const scenario = new Function('sw', `return (async () => { ${scenarioBody} })();`);
+    console.log(JSON.stringify(await scenario(sw)));
+})().catch(error => { console.error(error); process.exit(1); });
+"""
+
+@unittest.skipUnless(NODE, "node is needed to run the service worker")
+class ServiceWorkerTest(unittest.TestCase):
+    """Which requests overlay-sw.js answers, and how it keys its caches."""
+
+    def run_scenario(self, body):
+        result = subprocess.run([NODE, "-e", HARNESS, os.path.join(ROOT, "overlay-sw.js"), body],
+                                capture_output=True, text=True, timeout=30)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout)
+
+    def test_live_data_always_goes_to_the_network(self):
+        handled = self.run_scenario("""
+            const paths = ['/nowplaying?t=1', '/history', '/healthz', '/debug/profile',
+                           '/s/studio/nowplaying', '/overlay-sw.js', '/artwork'];
+            const results = [];
+            for (const path of paths) {
+                results.push(await sw.get(path) !== null);
+            }
+            results.push(await sw.get('/overlay.css', {method: 'POST'}) !== null);
+            results.push(await sw.get('/overlay.css', {origin: 'https://fonts.googleapis.com'}) !== null);
+            return results;
+        """)
+        self.assertEqual(handled, [False] * 9)
+
+    def test_artwork_is_cache_first_by_content_key(self):
+        result = self.run_scenario("""
+            const first = await sw.get('/artwork?t=1');
+            const again = await sw.get('/artwork?t=1');
+            const next = await sw.get('/artwork?t=2');
+            const session = await sw.get('/s/studio/artwork?t=abc');
+            const sessionAgain = await sw.get('/s/studio/artwork?t=abc');
+            return {bodies: [first, again, next, session, sessionAgain].map(r => r.body),
+                    calls: sw.network.calls, cached: sw.cached('jamdeck-artwork-v1')};
+        """)
+        self.assertEqual(result["bodies"], ["network 1", "network 1", "network 2", "network 3", "network 3"])
+        self.assertEqual(result["calls"], ["/artwork?t=1", "/artwork?t=2", "/s/studio/artwork?t=abc"])
+        self.assertEqual(result["cached"], ["/artwork?t=1", "/artwork?t=2", "/s/studio/artwork?t=abc"])
+
+    def test_artwork_cache_keeps_the_most_recently_used(self):
+        cached = self.run_scenario("""
+            for (let i = 0; i < 25; i++) {
+                await sw.get(`/artwork?t=${i}`);
+                if (i >= 20) {
+                    await sw.get('/artwork?t=0');   // keep the first cover in use
+                }
+            }
+            return sw.cached('jamdeck-artwork-v1');
+        """)
+        self.assertEqual(len(cached), 20)
+        self.assertIn("/artwork?t=0", cached)
+        self.assertNotIn("/artwork?t=1", cached)
+        self.assertIn("/artwork?t=24", cached)
+
+    def test_error_and_partial_responses_are_not_cached(self):
+        result = self.run_scenario("""
+            sw.network.status = 206;
+            await sw.get('/artwork?t=1');
+            await sw.get('/overlay.css');
+            sw.network.status = 404;
+            await sw.get('/artwork?t=2');
+            return {artwork: sw.cached('jamdeck-artwork-v1'), static: sw.cached('jamdeck-static-v1')};
+        """)
+        self.assertEqual(result, {"artwork": [], "static": []})
+
+    def test_static_files_are_stale_while_revalidate(self):
+        result = self.run_scenario("""
+            const first = await sw.get('/overlay.css');
+            const second = await sw.get('/overlay.css');
+            const third = await sw.get('/overlay.css');
+            return {bodies: [first.body, second.body, third.body], calls: sw.network.calls.length};
+        """)
+        # Each load is answered from the cache and refreshes it for the next
+        self.assertEqual(result, {"bodies": ["network 1", "network 1", "network 2"], "calls": 3})
+
+    def test_pages_are_network_first_with_a_cached_fallback(self):
+        result = self.run_scenario("""
+            const online = await sw.get('/?scene=a', {mode: 'navigate'});
+            sw.network.offline = true;
+            const offline = await sw.get('/?scene=a', {mode: 'navigate'});
+            let failed = false;
+            try {
+                await sw.get('/?scene=b', {mode: 'navigate'});
+            } catch (error) {
+                failed = true;
+            }
+            return {online: online.body, offline: offline.body, uncachedFails: failed};
+        """)
+        self.assertEqual(result, {"online": "network 1", "offline": "network 1", "uncachedFails": True})
+
+    def test_activate_drops_old_cache_versions(self):
+        names = self.run_scenario("""
+            sw.addCache('jamdeck-static-v0');
+            sw.addCache('jamdeck-artwork-v0');
+            sw.addCache('jamdeck-static-v1');
+            sw.addCache('other-app');
+            await sw.activate();
+            return sw.caches();
+        """)
+        self.assertEqual(sorted(names), ["jamdeck-static-v1", "other-app"])
+
+if __name__ == "__main__":
+    unittest.main()
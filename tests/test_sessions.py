@@ -0,0 +1,64 @@
+# tests/test_sessions.py
+import time
+import unittest
+
+from jamdeck.server.sessions import SessionRegistry, SessionError, SWEEP_INTERVAL
+
+COVER_A = b"\x89PNG first cover"
+COVER_B = b"\x89PNG second cover"
+
+class SessionArtworkTest(unittest.TestCase):
+    def artwork_path(self, registry, name="studio"):
+        snapshot, _ = registry.get(name).track_state.get()
+        return snapshot["artworkPath"]
+
+    def test_artwork_url_is_keyed_on_the_content(self):
+        registry = SessionRegistry("token")
+        registry.ingest("studio", {"playing": True, "title": "Song"})
+        registry.set_artwork("studio", COVER_A, "image/png")
+        first = self.artwork_path(registry)
+        self.assertTrue(first.startswith("/s/studio/artwork?t="))
+
+        registry.set_artwork("studio", COVER_B, "image/png")
+        self.assertNotEqual(self.artwork_path(registry), first)
+        registry.set_artwork("studio", COVER_A, "image/png")
+        self.assertEqual(self.artwork_path(registry), first)
+
+    def test_urls_are_not_reused_after_expiry_or_restart(self):
+        registry = SessionRegistry("token", idle_timeout=0)
+        registry.set_artwork("studio", COVER_A, "image/png")
+        first = self.artwork_path(registry)
+
+        # The session expires and comes back with a different cover
+        registry._swept_at = time.monotonic() - SWEEP_INTERVAL - 1
+        self.assertIsNone(registry.get("studio"))
+        registry.set_artwork("studio", COVER_B, "image/png")
+        self.assertNotEqual(self.artwork_path(registry), first)
+
+        # So does a restarted server
+        restarted = SessionRegistry("token")
+        restarted.set_artwork("studio", COVER_B, "image/png")
+        self.assertNotEqual(self.artwork_path(restarted), first)
+        self.assertEqual(restarted.get("studio").artwork, (COVER_B, "image/png"))
+
+    def test_new_track_drops_the_cover(self):
+        registry = SessionRegistry("token")
+        registry.ingest("studio", {"playing": True, "title": "Song"})
+        registry.set_artwork("studio", COVER_A, "image/png")
+        path = self.artwork_path(registry)
+        registry.ingest("studio", {"playing": False, "title": "Song"})
+        self.assertEqual(self.artwork_path(registry), path)
+        registry.ingest("studio", {"playing": True, "title": "Next Song"})
+        self.assertIsNone(registry.get("studio").artwork)
+        self.assertNotIn("artworkPath", registry.get("studio").track_state.get()[0])
+
+    def test_bad_artwork_is_rejected(self):
+        registry = SessionRegistry("token")
+        for body, content_type, status in ((COVER_A, "image/gif", 415), (b"", "image/png", 400)):
+            with self.subTest(content_type=content_type):
+                with self.assertRaises(SessionError) as raised:
+                    registry.set_artwork("studio", body, content_type)
+                self.assertEqual(raised.exception.status, status)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+# tests/test_settings.py
+import unittest
+
+from jamdeck.server.settings import DEFAULT_SERVER_SETTINGS, REDACTED, redact_settings, redact_url
+
+class RedactSettingsTest(unittest.TestCase):
+    def settings(self, **overrides):
+        return dict(DEFAULT_SERVER_SETTINGS, **overrides)
+
+    def test_secrets_are_redacted(self):
+        settings = self.settings(
+            ingest_token="s3cret-token",
+            webhooks=[
+                "https://discord.com/api/webhooks/123/abcdef",
+                {"url": "http://lights.local/hook?key=k3y", "topics": ["track"], "secret": "shared-secret"},
+            ],
+            artwork_secondary_url="https://covers.example/find?api_key=k3y&q={artist}",
+        )
+        redacted = redact_settings(settings)
+        text = repr(redacted)
+        for secret in ("s3cret-token", "shared-secret", "abcdef", "k3y"):
+            self.assertNotIn(secret, text)
+        self.assertEqual(redacted["ingest_token"], REDACTED)
+        self.assertEqual(redacted["webhooks"][1]["secret"], REDACTED)
+        self.assertEqual(redacted["webhooks"][1]["topics"], ["track"])
+        # The caller's settings are left alone
+        self.assertEqual(settings["ingest_token"], "s3cret-token")
+
+    def test_unset_secrets_stay_unset(self):
+        redacted = redact_settings(self.settings())
+        self.assertIsNone(redacted["ingest_token"])
+        self.assertEqual(redacted["webhooks"], [])
+        self.assertEqual(redacted["poll_interval"], DEFAULT_SERVER_SETTINGS["poll_interval"])
+
+    def test_url_labels(self):
+        self.assertEqual(redact_url("http://music-mac.local:8080/"), "http://music-mac.local:8080")
+        self.assertEqual(redact_url("https://user:pw@host.example"), "https://host.example")
+        first = redact_url("https://discord.com/api/webhooks/1/a")
+        self.assertTrue(first.startswith("https://discord.com/<"))
+        self.assertEqual(first, redact_url("https://discord.com/api/webhooks/1/a"))
+        self.assertNotEqual(first, redact_url("https://discord.com/api/webhooks/2/b"))
+
+if __name__ == "__main__":
+    unittest.main()
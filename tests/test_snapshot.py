@@ -0,0 +1,70 @@
+# tests/test_snapshot.py
+import os
+import shutil
+import tempfile
+import unittest
+
+from jamdeck.server.state import TrackState, TOPICS
+from jamdeck.server.history import PlayHistory
+from jamdeck.server.artwork import ArtworkManager
+from jamdeck.server.snapshot import StateSnapshot
+
+TRACK = {"playing": True, "title": "Song", "artist": "Artist", "album": "Album"}
+
+class WarmRestartTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def start(self):
+        """One server run: the state objects wired up like ServerRunner does."""
+        track_state = TrackState()
+        manager = ArtworkManager(
+            artwork_path=os.path.join(self.work_dir, "cover.jpg"),
+            cache_dir=os.path.join(self.work_dir, "cache"),
+        )
+        snapshot = StateSnapshot(track_state, manager, path=os.path.join(self.work_dir, "state.json"),
+                                 artwork_copy=os.path.join(self.work_dir, "state_cover.jpg"))
+        restored = snapshot.restore()
+        history = PlayHistory(path=os.path.join(self.work_dir, "history.jsonl"))
+        changes = []
+        track_state.add_listener(snapshot.on_track_change)
+        track_state.add_listener(history.on_track_change)
+        track_state.add_listener(lambda topics, data: changes.append(topics))
+        return track_state, snapshot, history, changes, restored
+
+    def stop(self, snapshot, history):
+        history.close()
+        snapshot.close()
+
+    def test_same_track_after_restart_reaches_listeners(self):
+        track_state, snapshot, history, _, _ = self.start()
+        track_state.update(dict(TRACK))
+        self.stop(snapshot, history)
+        entry = history.page()["items"][0]
+        self.assertIsNotNone(entry["endedAt"])
+
+        track_state, snapshot, history, changes, restored = self.start()
+        self.assertTrue(restored)
+        self.assertTrue(track_state.get()[0]["stale"])
+        version = track_state.version
+
+        # The first fresh query finds the same song still playing
+        self.assertEqual(sorted(track_state.update(dict(TRACK))), sorted(TOPICS))
+        self.assertEqual(changes, [list(TOPICS)])
+        self.assertGreater(track_state.version, version)
+
+        # The entry closed at shutdown is playing again, not duplicated
+        items = history.page()["items"]
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]["id"], entry["id"])
+        self.assertIsNone(items[0]["endedAt"])
+
+        # After that, repeats of the same snapshot are not changes
+        self.assertEqual(track_state.update(dict(TRACK)), [])
+        self.stop(snapshot, history)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+# tests/test_trace.py
+import os
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+
+from jamdeck.server.trace import replay_trace
+
+ARTWORK_MTIME = 1760870000
+
+# Music hangs twice (opening the breaker), is skipped while the breaker
+# is open, then answers with artwork once it has backed off
+EVENTS = [
+    {"t": 0.0, "kind": "query"},
+    {"t": 0.0, "kind": "running", "running": True},
+    {"t": 0.0, "kind": "applescript", "duration": 5.0, "timeout": True},
+    {"t": 5.0, "kind": "query"},
+    {"t": 5.0, "kind": "running", "running": True},
+    {"t": 5.0, "kind": "applescript", "duration": 5.0, "timeout": True},
+    {"t": 12.0, "kind": "query"},
+    {"t": 17.0, "kind": "query"},
+    {"t": 17.0, "kind": "running", "running": True},
+    {"t": 17.0, "kind": "applescript", "duration": 0.3,
+     "stdout": "true|||Song|||Artist|||Album|||true\n", "stderr": "", "artwork_size": 16},
+    {"t": 17.3, "kind": "artwork_mtime", "mtime": ARTWORK_MTIME},
+]
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="jamdeck-test-")
+        self.path = os.path.join(self.work_dir, "trace.jsonl.gz")
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            for event in EVENTS:
+                f.write(json.dumps(event) + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def replay(self, speed):
+        return [(offset, data) for offset, data, _ in replay_trace(self.path, speed)]
+
+    def test_breaker_and_artwork_follow_the_recording(self):
+        results = [data for _, data in self.replay(0)]
+        self.assertEqual([r.get("error") for r in results], [
+            "AppleScript timed out", "AppleScript timed out", "Music app not responding", None,
+        ])
+        self.assertEqual(results[3]["artworkPath"], f"/artwork?t={ARTWORK_MTIME}")
+        self.assertEqual(results[3]["breaker"], "closed")
+
+    def test_replays_are_identical_at_any_speed(self):
+        first = self.replay(0)
+        self.assertEqual(self.replay(0), first)
+        self.assertEqual(self.replay(40), first)
+
+if __name__ == "__main__":
+    unittest.main()
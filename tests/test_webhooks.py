@@ -0,0 +1,159 @@
+# tests/test_webhooks.py
+import hmac
+import json
+import time
+import hashlib
+import threading
+import unittest
+
+from jamdeck.server.webhooks import WebhookEndpoint, WebhookDispatcher, WEBHOOK_MAX_ATTEMPTS
+from jamdeck.server.state import TOPIC_TRACK, TOPIC_STATE
+
+RETRY = 0.02
+
+class StubReceiver:
+    """Stands in for the receiving server via WebhookEndpoint(send=).
+
+    Answers with the queued statuses in order (200 once they run out),
+    and can hold deliveries until released.
+    """
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.calls = []     # (time, event, headers, body)
+        self.release = threading.Event()
+        self.release.set()
+        self.delivered = threading.Event()
+        self._lock = threading.Lock()
+
+    def send(self, url, body, headers):
+        self.release.wait(5)
+        with self._lock:
+            self.calls.append((time.monotonic(), json.loads(body), dict(headers), body))
+            status = self.statuses.pop(0) if self.statuses else 200
+        if 200 <= status < 300:
+            self.delivered.set()
+        return status
+
+    def seqs(self):
+        return [event["seq"] for _, event, _, _ in self.calls]
+
+def event(seq):
+    return {"event": "track.changed", "topics": [TOPIC_TRACK], "seq": seq, "ts": 0,
+            "track": {"title": f"Song {seq}"}}
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.005)
+
+class WebhookEndpointTest(unittest.TestCase):
+    def endpoint(self, receiver, **kwargs):
+        endpoint = WebhookEndpoint("https://hooks.example/abc", send=receiver.send, retry=RETRY, **kwargs)
+        self.addCleanup(endpoint.stop)
+        return endpoint
+
+    def test_slow_receiver_gets_the_latest_event(self):
+        receiver = StubReceiver()
+        receiver.release.clear()
+        endpoint = self.endpoint(receiver)
+        endpoint.offer(event(1))
+        # Wait until the first delivery is in flight, then queue up more
+        wait_until(lambda: endpoint._pending is None)
+        for seq in (2, 3, 4):
+            endpoint.offer(event(seq))
+        receiver.release.set()
+
+        wait_until(lambda: endpoint.stats["delivered"] == 2)
+        self.assertEqual(receiver.seqs(), [1, 4])
+        self.assertEqual(endpoint.stats["coalesced"], 2)
+
+    def test_server_errors_are_retried_with_backoff(self):
+        receiver = StubReceiver([503, 500, 429])
+        endpoint = self.endpoint(receiver)
+        endpoint.offer(event(1))
+
+        wait_until(lambda: endpoint.stats["delivered"] == 1)
+        self.assertEqual(receiver.seqs(), [1, 1, 1, 1])
+        self.assertEqual(endpoint.stats["retries"], 3)
+        self.assertEqual(endpoint.stats["failed"], 3)
+        gaps = [b[0] - a[0] for a, b in zip(receiver.calls, receiver.calls[1:])]
+        for gap, delay in zip(gaps, (RETRY, RETRY * 2, RETRY * 4)):
+            self.assertGreaterEqual(gap, delay * 0.9)
+        self.assertGreater(gaps[2], gaps[0])
+
+    def test_gives_up_after_max_attempts(self):
+        receiver = StubReceiver([500] * WEBHOOK_MAX_ATTEMPTS)
+        endpoint = self.endpoint(receiver)
+        endpoint.offer(event(1))
+        wait_until(lambda: endpoint.stats["dropped"] == 1)
+        self.assertEqual(len(receiver.calls), WEBHOOK_MAX_ATTEMPTS)
+
+        # The next event is delivered normally
+        endpoint.offer(event(2))
+        wait_until(lambda: endpoint.stats["delivered"] == 1)
+
+    def test_client_errors_are_dropped_without_retrying(self):
+        for status in (400, 401, 404, 410):
+            with self.subTest(status=status):
+                receiver = StubReceiver([status])
+                endpoint = self.endpoint(receiver)
+                endpoint.offer(event(1))
+                wait_until(lambda: endpoint.stats["dropped"] == 1)
+                time.sleep(RETRY * 3)
+                self.assertEqual(len(receiver.calls), 1)
+                self.assertEqual(endpoint.stats["retries"], 0)
+
+    def test_newer_event_replaces_a_retry(self):
+        receiver = StubReceiver([503])
+        endpoint = WebhookEndpoint("https://hooks.example/abc", send=receiver.send, retry=0.3)
+        self.addCleanup(endpoint.stop)
+        endpoint.offer(event(1))
+        wait_until(lambda: endpoint.stats["retries"] == 1)
+        endpoint.offer(event(2))
+        wait_until(lambda: endpoint.stats["delivered"] == 1)
+        self.assertEqual(receiver.seqs(), [1, 2])
+
+    def test_body_is_signed_with_the_secret(self):
+        receiver = StubReceiver()
+        endpoint = self.endpoint(receiver, secret="shared-secret")
+        endpoint.offer(event(1))
+        self.assertTrue(receiver.delivered.wait(5))
+        _, _, headers, body = receiver.calls[0]
+        expected = hmac.new(b"shared-secret", body, hashlib.sha256).hexdigest()
+        self.assertEqual(headers["X-JamDeck-Signature"], f"sha256={expected}")
+        self.assertEqual(headers["X-JamDeck-Event"], "track.changed")
+
+    def test_unsigned_without_a_secret(self):
+        receiver = StubReceiver()
+        endpoint = self.endpoint(receiver)
+        endpoint.offer(event(1))
+        self.assertTrue(receiver.delivered.wait(5))
+        self.assertNotIn("X-JamDeck-Signature", receiver.calls[0][2])
+
+class WebhookDispatcherTest(unittest.TestCase):
+    def test_endpoints_get_only_their_topics(self):
+        dispatcher = WebhookDispatcher([
+            {"url": "https://hooks.example/tracks", "topics": [TOPIC_TRACK]},
+            "https://hooks.example/everything",
+        ])
+        self.addCleanup(dispatcher.close)
+        tracks, everything = StubReceiver(), StubReceiver()
+        dispatcher.endpoints[0].send = tracks.send
+        dispatcher.endpoints[1].send = everything.send
+
+        dispatcher.on_track_change([TOPIC_STATE], {"playing": False})
+        wait_until(lambda: len(everything.calls) == 1)
+        dispatcher.on_track_change([TOPIC_TRACK, TOPIC_STATE], {"playing": True, "title": "Song"})
+        wait_until(lambda: len(everything.calls) == 2 and len(tracks.calls) == 1)
+
+        self.assertEqual(tracks.seqs(), [2])
+        track_event = tracks.calls[0][1]
+        self.assertEqual(track_event["event"], "track.changed")
+        self.assertEqual(track_event["track"]["title"], "Song")
+        self.assertEqual(everything.calls[0][1]["event"], "track.updated")
+
+if __name__ == "__main__":
+    unittest.main()